@@ -8,6 +8,57 @@ from __future__ import division
 import gurobipy as gp
 import numpy as np
 import pickle
+import time
+import os
+import hashlib
+import itertools
+import multiprocessing
+import python.solver_backends as solver_backends
+import python.start_library as start_library
+
+#%% Naming:
+
+def _start_vals_by_name(filename):
+    """
+    Check if a start value file refers to variable names (True) or to 
+    variable indices (False).
+    """
+    with open(filename, "r") as fin:
+        line_split = fin.readline().replace("\"", "").split()
+    
+    return len(line_split) > 0 and not line_split[0].isdigit()
+
+def _use_names(options):
+    """
+    Decide whether variables and constraints receive names.
+    
+    Names can be enforced with options["names"]. Otherwise they are only 
+    generated for debugging (options["debug"]), for writing LP files 
+    (options["filename_lp"]) and for loading start value files that refer 
+    to variable names. In the name-free production mode start values are 
+    stored and loaded by variable index.
+    """
+    if "names" in options:
+        return options["names"]
+    
+    if options.get("debug", False) or options.get("filename_lp"):
+        return True
+    
+    if options["load_start_vals"]:
+        return _start_vals_by_name(options["filename_start_vals"])
+    
+    return False
+
+def _namer(use_names):
+    """
+    Return a function that concatenates its arguments to a name. If names 
+    are disabled, the string formatting is skipped and an empty name is 
+    returned (Gurobi then uses its default names).
+    """
+    if use_names:
+        return lambda *parts: "".join(str(part) for part in parts)
+    else:
+        return lambda *parts: ""
 
 #%% Start:
 
@@ -74,8 +125,93 @@ def compute(eco, devs, clustered, params, options, building, ref_building,
         - time_steps : time steps per day
         
     options : dict
-        -      
-        
+        - debug : Generate names for variables and constraints (optional)
+        - filename_lp : Write the model to this file before solving (optional)
+        - names : Enforce (True) or skip (False) naming (optional)
+        - tight_big_m : Derive big-M values from the inputs (default) or
+          use the former constant values (False, optional)
+        - tight_bounds : Add demand-based bounds and valid inequalities
+          (default) or not (False, optional)
+        - heater_formulation : Product heat_nom = y * capacity as "big_m"
+          (default), "indicator" or "semicont" (optional)
+        - reduce_model : Replace variables that are defined by an equation
+          with expressions (default) or keep them (False, optional)
+        - tier_formulation : Tiers of the EEG power stages and the KWKG full
+          load hour categories as "big_m" (default) or "indicator"
+          constraints (optional)
+        - sos_choices : Declare exclusive choice sets as SOS1 (optional)
+        - lazy_bounds : Add the per time step bounds of the heater capacities
+          and storage contents only for peak time steps and add the others
+          lazily from a callback (optional)
+        - model_cache : Directory in which built models are cached. Models
+          with identical inputs are reloaded instead of rebuilt (optional)
+        - modifications : Changes applied to the built or reloaded model
+          before solving (optional), dict with the keys
+            - lb / ub / obj : {(group, key) : value} for the variable
+              v[group][key] of the model, {group : value} for scalars
+            - rhs : {name or index of the constraint : value}
+        - solver_profile : "screening", "production" (default) or "exact"
+          (optional, see solver_profiles)
+        - solver_params : Gurobi parameters that override the profile
+          (optional)
+        - filename_params : Read Gurobi parameters from this file, e.g.
+          the result of run_tuning (optional)
+        - backend : Solver backend "gurobi" (default) or "highs" (optional,
+          see python.solver_backends)
+        - env : Gurobi environment of the model, e.g. from a
+          python.solver_backends.EnvironmentPool (optional)
+        - portfolio : Race several Gurobi configurations in parallel
+          processes and keep the first solution within the MIP gap. True
+          for all configurations of solver_backends.portfolio, a list of
+          their names or a dict of own configurations (optional). The
+          winner is logged in portfolio_log.csv next to the results.
+        - telemetry : Record incumbent, bound, gap and node count during the
+          solve and store them as <results>_trace.csv (optional, Gurobi
+          backend without portfolio)
+        - termination : Stop the solve early if the incumbent stagnates or
+          the gap trend does not reach the MIP gap in time (optional). True
+          or a dict with the keys improvement (relative, default 0.001),
+          window (s, default 30) and gap_trend (default True). The reason
+          is stored in the results as Termination. Gurobi backend without
+          portfolio.
+        - solution_pool : Number of distinct alternative designs that are
+          collected from the solution pool of Gurobi and stored as
+          <results>_pool.pkl (optional, Gurobi backend only)
+        - start_library : Directory of the start library. The designs of the
+          most similar solved buildings are used as MIP starts and the
+          solved building is added (optional, see python.start_library,
+          Gurobi backend without portfolio)
+        - start_number : Number of starts from the start library (default 3)
+        - design_start : Design of a previous solve, e.g. with fewer typical
+          days, as dict with the keys x, x_restruc and capacity (see
+          python.read_basic.read_design). It is used as partial MIP start
+          and as branching hints (optional, Gurobi backend only).
+        - screening : Relax the on/off decisions of all time steps and keep
+          the investment decisions integral for fast approximate costs
+          (optional). True, or "subsidy_steps" to relax the tiers of EEG
+          and KWKG as well. The results are marked as Approximate. With
+          relaxed tiers the costs are only a lower bound that can be off by
+          orders of magnitude (fractional KWKG categories: -1354 instead of
+          2112 €/a on a one-day test instance), use True for approximate
+          costs.
+        - lp_heuristic : Solve the LP relaxation, round and fix the
+          investment decisions and subsidy flags and pass the solution of
+          the remaining small MIP as MIP start (optional). True or a dict
+          with the keys threshold (default 0.5) and time_share (share of
+          the time limit for the remaining MIP, default 0.1). Gurobi
+          backend only.
+        - relax_and_fix : Fast mode for large models. The on/off decisions
+          are relaxed on all typical days but one and fixed day by day,
+          the result is polished by a short solve of the full model
+          (optional, not with portfolio). True or a dict with the keys
+          day_share (share of the time limit for all days, default 0.5)
+          and polish_share (default 0.2).
+        - profile : Record build time, size and coefficient ranges of every
+          block and store them next to the results (optional)
+        - scaling : State annual energy in MWh and KWKG payments in k€ and
+          solve with default numerics (default) or keep kWh, € and
+          NumericFocus 3 (False, optional)
+
     building : dict
         - U-values : Heat transition coefficients for different scenarios
         - dimensions : Building dimensions
@@ -123,1971 +259,177 @@ def compute(eco, devs, clustered, params, options, building, ref_building,
     max_cost : float
         - Upper bound for annual costs        
     """
-    
-    # Extract parameters
-    dt = params["dt"]
-    time_steps = range(params["time_steps"])
-    days       = range(params["days"])    
-        
-    # Define subsets
-    heater  = ("boiler", "chp", "eh", "hp_air", "hp_geo","pellet")
-    storage = ("bat", "tes")
-    solar   = ("pv", "stc")
-    
-    subsidy_devs = ("chp", "bat", "hp_air", "hp_geo", "stc", "pellet", "pv")
-    
-    building_components = ("Window","OuterWall","GroundFloor","Rooftop")
-    
-    restruc_scenarios   = ("standard", "retrofit", "adv_retr")
-    
-    kfw_standards       = ("kfw_eff_55","kfw_eff_70","kfw_eff_85",
-                           "kfw_eff_100","kfw_eff_115")
 
-    # Maximal for solar collectors and pv useable Rooftoparea
-    A_max = (building["usable_roof"] * 
-             building["dimensions"]["Area"] * 
-             building["dimensions"]["Rooftop"])
-    
+    _check_backend(options)
+
+    start = time.time()
+    data = _prepare_data(eco, devs, clustered, params, options, building,
+                         ref_building, shell_eco, sub_par, ep_table,
+                         max_emi, max_cost)
+    time_data = time.time() - start
+
+    model = None
     try:
-        model = gp.Model("Design computation")
-        
-#%% Define variables
-        
-        #%% Economic variables 
-        
-        # Costs: There are cost-variables for investment, operation & maintenance,
-        # demand costs (fuel costs) and fix costs for electricity and gas tariffs
-        
-        c_inv  = {dev: model.addVar(vtype="C", name="c_inv_"+dev)
-                 for dev in (list(devs.keys()) + list(building_components))}
-                     
-        c_om   = {dev: model.addVar(vtype="C", name="c_om_"+dev)
-                 for dev in list(devs.keys())}
-                     
-        c_dem  = {dev: model.addVar(vtype="C", name="c_dem_"+dev)
-                 for dev in ("boiler", "chp", "pellet", "grid_house", "grid_hp")}   
-                 
-        c_fix  = {dev: model.addVar(vtype="C", name="c_fix_"+dev)
-                 for dev in ("el", "gas")}    
-        
-        # Revenues and Subsidies                
-        revenue = {dev: model.addVar(vtype="C", name="revenue_"+dev)
-                  for dev in ("chp", "pv")} 
-                     
-        subsidy = {dev: model.addVar(vtype="C", name="subsidy_"+dev)
-                   for dev in (subsidy_devs + building_components + kfw_standards)}  
-        
-        # Different subsidy possiblities for chps          
-        sub     = {dev: model.addVar(vtype="C", name="sub_"+dev)
-                   for dev in ("kwkg", "bafa")} 
-
-        #%% Technical variables
-                                   
-        # Purchase and activation decision variables        
-        x = {}  # Purchase (all devices)         
-        for dev in devs.keys():
-            x[dev] = model.addVar(vtype="B", name="x_"+dev)
+        (model, v, profile) = _cached_model(data, (eco, devs, clustered, params,
+                                                   building, ref_building,
+                                                   shell_eco, sub_par, ep_table,
+                                                   max_emi, max_cost), options)
 
-        # Acitivation heater 
-        y = {}  
-        for d in days:
-            for t in time_steps:
-                timetag = "_"+str(d)+"_"+str(t)
-                for dev in heater:
-                    y[dev,d,t] = model.addVar(vtype="B", name="y_"+dev+"_"+timetag) 
-                y["stc",d,t] = model.addVar(vtype="B", name="y_"+"stc"+"_"+timetag) 
-        
-        # Capacities (thermal output, area, volume,...)
-        capacity = {}
-        for dev in devs.keys():
-            capacity[dev] = model.addVar(vtype="C", name="Capacity_"+dev , lb = 0) 
-       
-        # Power, Heat and Energy for heater and solar components      
-        power_nom = {}
-        power = {}
-        heat_nom = {}        
-        heat = {}
-        energy = {}
-          
-        for d in days:
-            for t in time_steps:
-                timetag = "_"+str(d)+"_"+str(t)
-                
-                for dev in heater:
-                    heat_nom[dev,d,t] = model.addVar(vtype="C", 
-                                                     name="Q_nom_"+dev+"_"+timetag)
-                
-                for dev in ("hp_air", "hp_geo"):
-                    power_nom[dev,d,t] = model.addVar(vtype="C", name="P_nom_"
-                                                              +dev+"_"+timetag) 
-                    
-                    heat[dev,d,t] = model.addVar(vtype="C",  name="Q_"+dev+"_"
-                                                                      +timetag)
-                    
-                    power[dev,d,t] = model.addVar(vtype="C", name="P_"+dev+"_"
-                                                                      +timetag)
-                
-                for dev in ("pellet","boiler"):
-                    heat[dev,d,t] = model.addVar(vtype="C", name="Q_"+dev+"_"
-                                                                      +timetag)
-                    
-                    energy[dev,d,t] = model.addVar(vtype="C", name="E_"+dev+"_"
-                                                                      +timetag)
-                
-                dev = "eh"
-                power[dev,d,t] = model.addVar(vtype="C", name="P_"+dev+"_"+timetag)
-                
-                heat[dev,d,t] = model.addVar(vtype="C", name="Q_"+dev+"_"+timetag)
-                
-                dev = "chp"
-                power[dev,d,t] = model.addVar(vtype="C", name="P_"+dev+"_"+timetag)
-                
-                heat[dev,d,t] = model.addVar(vtype="C", name="Q_"+dev+"_"+timetag)
-                
-                energy[dev,d,t] = model.addVar(vtype="C", name="E_"+dev+"_"+timetag)
-                
-                dev = "pv"
-                power[dev,d,t] = model.addVar(vtype="C", name="P_"+dev+"_"+timetag)
-                
-                dev = "stc"
-                heat[dev,d,t] = model.addVar(vtype="C", name="Q_"+dev+"_"+timetag)
-                    
-        # State of charge (SOC) for storage systems
-        ch = {}
-        dch = {}
-        soc = {}
-        soc_nom = {}
-        soc_init = {}
-        
-        for dev in storage:
-            soc_nom[dev] = model.addVar(vtype="C", name="SOC_nom_"+dev)
-            for d in days:
-                soc_init[dev,d] = model.addVar(vtype="C", name="SOC_init_"
-                                                           +dev + "_" + str(d))
-                for t in time_steps:
-                    timetag = "_"+str(d)+"_"+str(t)
-
-                    soc[dev,d,t] = model.addVar(vtype="C", name="SOC_"+dev+"_"
-                                                              +timetag, lb = 0)
-                    
-                    ch[dev,d,t] = model.addVar(vtype="C", name="ch"+dev+timetag)
-                    
-                    dch[dev,d,t] = model.addVar(vtype="C", name="dch"+dev+timetag)
-                
-        # Electricity imports, sold, self-used and transferred (to heat pump) electricity
-        p_grid  = {}
-        p_use   = {}
-        p_sell  = {}
-        p_hp    = {}
-        
-        for d in days:
-            for t in time_steps:
-                timetag = "_"+str(d)+"_"+str(t)
-                
-                p_grid["grid_house",d,t] = model.addVar(vtype="C", name="p_grid_house"+timetag)
-                
-                p_grid["grid_hp",d,t]  = model.addVar(vtype="C", name="p_grid_hp"+timetag)
-                
-                # Note: bat is referring to the discharge power
-                for dev in ("pv", "bat","chp"):
-                    p_use[dev,d,t]  = model.addVar(vtype="C", name="P_use_"+dev+timetag)
-                    
-                    p_sell[dev,d,t] = model.addVar(vtype="C", name="P_sell_"+dev+timetag)
-                    
-                    p_hp[dev,d,t]   = model.addVar(vtype="C", name="P_hp_"+dev+timetag)
-
-        # Split EH for HP tariff
-        eh_split = {}
-        
-        for d in days:
-            for t in time_steps:
-                timetag = "_"+str(d)+"_"+str(t)                
-                eh_split["eh_w/o_hp",d,t] = model.addVar(vtype="C", 
-                                                    name="p_eh_w/o_hp"+timetag)
-                
-                eh_split["eh_w/_hp",d,t]  = model.addVar(vtype="C", 
-                                                     name="p_eh_w/_hp"+timetag)
-                
-        # Design heat load following DIN EN 12831
-        dsh = model.addVar(vtype = "C", name = "dsh" )
-        
-#%% Variables for restructuring measures
-            
-        # Variable for building-shell components
-        x_restruc  ={}
-        for dev in building_components:
-            for n in restruc_scenarios:
-                x_restruc[dev,n] = model.addVar(vtype="B", name="x_"+dev+"_"+str(n))
-        
-        # Variable if restrictions for renovation programmes are satisfied
-        b_sub_restruc = {} 
-        for dev in (building_components + kfw_standards):
-            b_sub_restruc[dev] = model.addVar(vtype = "B", name = "b_sub_restruc"+dev)
-        
-        # Heating demand depending on to the chosen building shell components
-        heat_mod = {}  
-        for d in days:
-            for t in time_steps:
-                heat_mod[d,t] = model.addVar(vtype = "C", name = "heat_mod", lb = 0)
-        
-        # Transmission losses
-        Q_Ht = {}  
-        for d in days:
-            for t in time_steps:
-                Q_Ht[d,t] = model.addVar(vtype = "C", name = "HT")
-        
-        # Real solar gains
-        Q_s = {}  
-        for d in days:
-            for t in time_steps:
-                Q_s[d,t] = model.addVar(vtype = "C", name = "Qs")               
-        
-        # Primary energy demand in accordance with DIIN V 4108
-        Q_p_DIN = model.addVar(vtype = "C", name = "Q_p_DIN")
-        
-        # Transmission coefficient in accordance with DIN V 4108
-        H_t = model.addVar(vtype = "C", name = "H_t", lb = 0)  
-        
-        # Deciscion if individual measure is allowed although the individual 
-        # U-value is too high
-        b_ind_mea= model.addVar(vtype = "B", name = "b_ind_mea")
-
-        # Variable for chosen heating concept (relevant for primary energy demand)
-        heating_concept = {}
-        lin_H_t = {}        
-        for n in ep_table["ep"].keys():
-            heating_concept[n] = model.addVar(vtype = "B", 
-                                              name = "heating_concept_"+str(n))
-            
-            lin_H_t[n] = model.addVar(vtype = "C", name = "lin_H_t_+str(n)", lb = 0)      
-        
-        # Variables for flow temperature
-        b_TVL = {}
-        for temp in ("35","55"):
-            b_TVL[temp] = model.addVar(vtype = "B", name = "b_TVL_"+str(temp))
-            
-        lin_TVL = {}
-        for temp in ("35","55"):
-            for dev in ("hp_geo","hp_air"):
-                for d in days:
-                    for t in time_steps:
-                        lin_TVL[temp,dev,d,t] = model.addVar(vtype = "C", 
-                                           name = "lin_TVL_"+str(temp), lb = 0) 
-         
-        #%% Variables for Subsidies 
-         
-        #EEG for PV
-        b_eeg = {}
-        for powerstep in ("10","40","750","10000"):
-            b_eeg[powerstep] = model.addVar(vtype="B",
-                                            name="b_eeg_"+str(powerstep))            
-                    
-        p_sell_pv = {}
-        for powerstep in ("total","10","40","750","10000"):
-            p_sell_pv[powerstep] = model.addVar(vtype="C",
-                                            name="p_sell_pv_"+str(powerstep))               
-        
-        pv_power = model.addVar(vtype="C", name = "pv_power")
-        
-        #Battery subsidy program (KfW 275)       
-        b_pv_power = {}
-        lin_pv_power = {} 
-        
-        for i in ("kfw", "eeg"):
-            lin_pv_power[i] = model.addVar(vtype="C", name = "lin_pv_power_" + i)
-            b_pv_power[i]   = model.addVar(vtype="B", name = "b_pv_power_" + i)
-
-        #KWKG for CHP
-
-        p_chp_total = {}
-        for usage in ("use","sell","total"):
-            p_chp_total[usage] = model.addVar(vtype = "C",
-                                            name ="p_chp_total_"+str(usage)) 
-                        
-        sub_kwkg_temp = model.addVar(vtype="C", name = "sub_kwkg_temp", lb = 0)
-            
-        b_kwkg = {}
-        lin_kwkg_1 = {}
-        lin_kwkg_2 = {}
-        for n in sub_par["kwkg"]["vls"].keys():   
-            b_kwkg[n] = model.addVar(vtype="B", name="b_sub_kwkg_"+str(n))
-            lin_kwkg_1[n] = model.addVar(vtype = "C", name = "lin_kwkg_1_" + str(n), lb = 0)
-            lin_kwkg_2[n] = model.addVar(vtype = "C", name = "lin_kwkg_2_" + str(n), lb = 0)
-                                            
-        #BAFA for MINI-CHP
-        x_chp = {}
-        for dev in ("micro","mini","large"):
-            x_chp[dev] = model.addVar(vtype="B", name="x_chp_"+dev)        
-                
-        chp_powerstep = {}
-        for i in range (1,5):
-            chp_powerstep[i] = model.addVar(vtype = "C", 
-                                         name = "kwk_powerstep"+str(i), lb = 0)
-            
-        sub_chp_basic = model.addVar(vtype="C", name="sub_chp_basic", lb = 0 )
-        
-        #STC
-        b_bafa_stc = {}
-        for i in ("basic_fix","basic_var","inno","add1"):
-            b_bafa_stc[i] = model.addVar(vtype = "B", name = "b_bafa_stc_"+i)
-         
-        sub_bafa_stc = {}
-        for i in ("basic_var", "basic_fix", "inno", "build_eff"):
-            sub_bafa_stc[i] = model.addVar(vtype = "C", 
-                                          name = "sub_bafa_stc_"+i, lb = 0)
+        if options.get("modifications"):
+            _apply_modifications(model, v, options["modifications"])
 
-        lin_sub_stc = model.addVar(vtype = "C", 
-                            name = "lin_sub_stc", lb = 0, ub = A_max)
-        
-        #HP
-        lin_hp_sub_basic = {}
-        for dev in ("hp_air", "hp_geo"):
-            lin_hp_sub_basic[dev] = model.addVar(vtype="C", 
-                                          name="lin_hp_sub_basic_"+dev, lb = 0)
-        
-        lin_hp_sub_inno = {}
-        for dev in ("hp_air", "hp_geo"):
-            lin_hp_sub_inno[dev] = model.addVar(vtype="C", 
-                                           name="lin_hp_sub_inno_"+dev, lb = 0)   
-            
-        lin_hp_sub_add = {}
-        for dev in ("hp_air", "hp_geo"):
-            lin_hp_sub_add[dev] = model.addVar(vtype="C", 
-                                            name="lin_hp_sub_add_"+dev, lb = 0)
-                
-        b_bafa_hp= {}
-        for dev in ("hp_air", "hp_geo"):
-            b_bafa_hp[dev] = {}
-            for i in ("basic_fix", "basic_var", "inno_var", "inno_fix", "add1"):
-                b_bafa_hp[dev][i] = model.addVar(vtype = "B", 
-                                                    name = "b_bafa_"+dev+"_"+i)
-            
-        sub_bafa_hp = {}
-        for dev in ("hp_air", "hp_geo"):
-            sub_bafa_hp[dev] = {}
-            for i in ("basic", "inno", "build_eff"):
-                sub_bafa_hp[dev][i] = model.addVar(vtype = "C", 
-                                          name = "sub_bafa_"+dev+"_"+i, lb = 0)
-                
-        energy_hp = {}
-        for dev in ("hp_air", "hp_geo"):
-            energy_hp[dev] = {}
-            for i in ("total_heat", "total_power"):
-                energy_hp[dev][i] = model.addVar(vtype = "C", 
-                                         name = "energy_hp_"+dev+"_"+i, lb = 0)
-        
-        #PELLET           
-        b_bafa_pellet = {}
-        for i in ("basic_fix", "basic_storage", "basic_var", 
-                  "inno_fix", "inno_storage", "add1"):
-            b_bafa_pellet[i] = model.addVar(vtype = "B", 
-                                                     name = "b_bafa_pellet_"+i)
-            
-        sub_bafa_pellet = {}
-        for i in ("basic", "inno", "build_eff"):
-            sub_bafa_pellet[i] = model.addVar(vtype = "C", 
-                                           name = "sub_bafa_pellet_"+i, lb = 0)
+        # Screening mode: approximate costs with relaxed on/off decisions
+        if options.get("screening"):
+            _relax(model, v, _screening_groups(options))
 
-        lin_sub_pellet = {}
-        for i in ("basic", "inno", "storage"):        
-            lin_sub_pellet[i]= model.addVar(vtype = "C", 
-                                            name = "lin_sub_pellet_"+i, lb = 0)            
-            
-#%% Set Objectives      
-                   
-        c_total = model.addVar(vtype="C", name="c_total", lb= -gp.GRB.INFINITY)
-        
-        emission = model.addVar(vtype="C", name= "CO2_emission", lb= -gp.GRB.INFINITY)      
+            if options["screening"] == "subsidy_steps":
+                print("")
+                print("Warning: With relaxed EEG and KWKG tiers the costs are "
+                      "only a lower bound and can be off by orders of "
+                      "magnitude (see the screening study of run_benchmark)")
 
-        model.update()
+        #%% Set start values and branching priority
+        # Start values are either stored by name or - in the name-free
+        # production mode - by the index of the variable in the model
+        if options["load_start_vals"]:
+            variables = model.getVars()
+            with open(options["filename_start_vals"], "r") as fin:
+                for line in fin:
+                    line_split = line.replace("\"", "").split()
+                    if line_split[0].isdigit():
+                        var = variables[int(line_split[0])]
+                    else:
+                        var = model.getVarByName(line_split[0])
+                    # Variables of disabled subsidy programs do not exist
+                    if var is not None:
+                        var.Start = float(line_split[1])
 
-        if options["opt_costs"]:
-            model.setObjective(c_total, gp.GRB.MINIMIZE)
-                    
-        else:
-            model.setObjective(emission, gp.GRB.MINIMIZE)
-
-#%% Define Constraints
-
-        # Differentiation between old and new buildings because of different 
-        # regulations in the "Marktanreizprogramm" for HP and STC
-        if options["New_Building"]:
-            alpha = 0
-            model.addConstr(b_TVL["35"] == 1)
-       
-        else: 
-            alpha = 1
-            model.addConstr(b_TVL["55"] == 1)
-            
-        # Flow temperature is either 35 or 55°c
-        # Choice depends on the age of the building       
-        model.addConstr(b_TVL["35"] + b_TVL["55"] == 1)        
-            
-        # Differentiation between SFH and MFH because of different 
-        # regulations in the "Marktanreizprogramm" STC 
-        if options["MFH"]:
-            MFH = 1
-        else:
-            MFH = 0      
-            
-        #%% Capacitybounds:
-        for d in days:
-            for t in time_steps:
-                for dev in heater:
-                    model.addConstr(capacity[dev] >= heat_nom[dev,d,t],                      
-                                    name="Capacity_"+dev+"_"+str(d)+"_"+str(t))
-        
-        #Heater
-        for dev in heater:
-            model.addConstr(capacity[dev] >= x[dev] * devs[dev]["Q_nom_min"],
-                            name="Capacity_min_"+dev)
-        
-            model.addConstr(capacity[dev] <= x[dev] * devs[dev]["Q_nom_max"],
-                            name="Capacity_max_"+dev)
-                    
-        #Solar Components               
-        for dev in solar:
-            # Minimum area for each device
-            model.addConstr(capacity[dev] >= x[dev] * devs[dev]["area_min"],
-                            name="Minimum_area_"+dev)
-            
-            # Maximum area for each device
-            model.addConstr(capacity[dev] <= x[dev] * A_max,
-                            name="Maximum_area_"+dev)
-                            
-        # Area of stc + pv <= A_max
-        model.addConstr(sum(capacity[dev] for dev in solar) <= A_max,
-                        name="Maximum_total_area")
-        
-        #Thermal Energy Storage
-        dev = "tes"
-        model.addConstr(x["tes"] == 1)
-        
-        model.addConstr(capacity[dev] >= x[dev] * devs[dev]["volume_min"], 
-                                                  name="Storage_Volume_min")
-        
-        model.addConstr(capacity[dev] <= x[dev] * devs[dev]["volume_max"], 
-                                                  name="Storage_Volume_max")  
-        
-        model.addConstr(soc_nom[dev] == capacity[dev] * params["rho_w"] * 
-                                        params["c_w"] * devs[dev]["dT_max"] / 
-                                        3600000, name="Storage_Volume")
-        
-        #Battery storage
-        dev = "bat"
-        model.addConstr(capacity[dev] == soc_nom[dev], name="Capacity_"+dev)
-        
-        model.addConstr(soc_nom[dev] >= x[dev] * devs[dev]["cap_min"],
-                                                 name="Battery_capacity_min")
-        
-        model.addConstr(soc_nom[dev] <= x[dev] * devs[dev]["cap_max"],
-                                                 name="Battery_capacity_max")  
+        for key in v["x"].keys():
+            v["x"][key].BranchPriority = 100
 
-#%% Economic constraints
-        
-        model.addConstr(c_total ==  (sum(c_inv[key]   for key in c_inv.keys())       
-                                   + sum(c_om[key]    for key in c_om.keys())
-                                   + sum(c_dem[key]   for key in c_dem.keys())
-                                   + sum(c_fix[key]   for key in c_fix.keys())
-                                   - sum(revenue[key] for key in revenue.keys())
-                                   - sum(subsidy[key] for key in subsidy.keys())))     
-        
-        #%% Investments
-        
-        #Devices
-        for dev in devs.keys():
-            model.addConstr(c_inv[dev] == eco["crf"] * devs[dev]["rval"] *
-                                         (x[dev] * (devs[dev]["c_inv_fix"] + 
-                                          eco["inst_costs"]["EFH"][dev] * (1 - MFH) + 
-                                          eco["inst_costs"]["MFH"][dev] * MFH) +                                         
-                                          capacity[dev] * devs[dev]["c_inv_var"]),
-                                          name="Investment_costs_"+dev)
-            
-        # Investment costs for restruturing measures
-        # For Rooftop, GroundFloor and Outerwall the costs are calculated in 
-        # relation to the thickness of the additional insulation in comparision
-        # to the standard-scenario. The standard scenario is free of cost. 
-        for dev in ("Rooftop", "GroundFloor", "OuterWall"):
-            model.addConstr(c_inv[dev] == building["dimensions"]["Area"] * 
-                                          eco["crf"] * shell_eco[dev]["rval"] *                 
-                                          building["dimensions"][dev] *
-                                          (x_restruc[dev,"standard"] * 0 + 
-                                           sum(x_restruc[dev,n] * 
-                                          (shell_eco[dev]["c_const"] + 
-                                           shell_eco[dev]["c_var"] * 100 *
-                                           building["U-values"][n][dev]["thick_insu_add"])
-                                           for n in ("retrofit", "adv_retr"))),
-                                           name = "C_inv_restruc_"+dev)
-             
-        # For Windows the costs are calculated in relation to the U-value of the
-        # chosen Window. The standard scenario is free of cost.
-        dev = "Window"
-        model.addConstr(c_inv[dev] == building["dimensions"]["Area"] * 
-                                      eco["crf"] * shell_eco[dev]["rval"] *
-                                      building["dimensions"][dev] *
-                                      (x_restruc[dev,"standard"] * 0 +
-                                       sum(x_restruc[dev,n] * 
-                                      (shell_eco[dev]["c_const"] + 
-                                       shell_eco[dev]["c_var"] * 
-                                       building["U-values"][n][dev]["U-Value"])
-                                       for n in ("retrofit", "adv_retr"))),
-                                       name = "C_inv_restruc_"+dev)
-        
-        #%% Operation and maintenance
-        
-        for dev in devs.keys():
-            model.addConstr(c_om[dev] == eco["b"]["infl"] * devs[dev]["c_om_rel"] * c_inv[dev])
+#%% Set Parameters and start optimization
 
-        #%% Demand related costs:
-        
-        #Household Electricity
-        dev = "grid_house"
-            
-        el_total_house = (dt * sum(clustered["weights"][d] * sum(p_grid[dev,d,t] 
-                          for t in time_steps) for d in days) * dt)
-        
-        model.addConstr(c_dem[dev] == eco["crf"] * eco["b"]["el"] * 
-                                      el_total_house * eco["el"]["el_sta"]["var"][0])
-        
-        #Electricity for HP               
-        dev = "grid_hp"
-        el_total_hp = (dt * sum(clustered["weights"][d] * sum(p_grid[dev,d,t] 
-                       for t in time_steps) for d in days) * dt)
-        
-        model.addConstr(c_dem[dev] == eco["crf"] * eco["b"]["el"] *  
-                                       el_total_hp * eco["el"]["el_hp"]["var"][0])
-                
-        #CHP:
-        dev = "chp"
-        gas_total_chp = (dt * sum(clustered["weights"][d] * sum(energy[dev,d,t] 
-                         for t in time_steps) for d in days))
-        
-        model.addConstr(c_dem[dev] == eco["crf"] * eco["b"]["gas"] * gas_total_chp *
-                                     (eco["gas"]["gas_sta"]["var"][0] - eco["energy_tax"])) 
-                                                                  
-        #BOI
-        dev = "boiler"
-        gas_total_boi = (dt * sum(clustered["weights"][d] * sum(energy[dev,d,t] 
-                         for t in time_steps) for d in days))
-        
-        model.addConstr(c_dem[dev] == (eco["crf"] * eco["b"]["gas"] * 
-                                       gas_total_boi * eco["gas"]["gas_sta"]["var"][0]))
-        
-        #PELLET
-        dev = "pellet"
-        
-        pel_total = (dt * sum(clustered["weights"][d] * sum(energy[dev,d,t]
-                     for t in time_steps) for d in days))
-        
-        model.addConstr(c_dem[dev] == eco["crf"] * eco["b"]["pel"] * pel_total *
-                                      eco["pel"]["pel_sta"]["var"][0])     
-    
-        #%% Fixed administration costs:                    
-                         
-        # Electricity
-        model.addConstr(c_fix["el"] == eco["el"]["el_sta"]["fix"][0])
-                                                 
-        # Gas
-        model.addConstr(c_fix["gas"] == eco["gas"]["gas_sta"]["fix"][0])
-                                                                                                                           
-        #%% Revenues for selling chp-electricity to the grid
-        
-        dev = "chp"        
-        model.addConstr(revenue[dev] == eco["b"]["eex"] * eco["crf"] * dt * 
-                                        eco["price_sell_el"] *
-                                        sum(clustered["weights"][d] * 
-                                        sum(p_sell[dev,d,t]
-                                        for t in time_steps) 
-                                        for d in days),
-                                        name="Feed_in_rev_"+dev)
-                                                   
-#%% TECHNICAL CONSTRAINTS                                        
-                                        
-#%%Calculation of space heating in accordance with DIN V 4108
+        #Set solver parameters
+        _set_solver_parameters(model, params, options)
 
-        #Transmission losses for windows, wall, rooftop and ground incl. surcharge for thermal bridges 
-        #as a function of the selected u-values and the temperature difference:
-        
-        #It is only possible to choose one scenrio per shellpart
-        for dev in building_components:    
-            model.addConstr(sum(x_restruc[dev,n] for n in restruc_scenarios) == 1)
-            
-        #In Accordance to EnEV 2009 the restructuring measures for the individual
-        #building parts have to fulfill the required U-Values. If the complete 
-        #building has at least KfW-100 status, the individual building parts
-        #do not have to fulfill this criteria
-        
-        for dev in building_components:
-            for n in ("retrofit", "adv_retr"):  
-            
-                u_ref = ref_building["U-values"][dev]
-                u_var = building["U-values"][n][dev]["U-Value"]
-                
-                total_shell = (building["dimensions"]["Area"] * 
-                               sum(building["dimensions"][n] 
-                               for n in building_components))
-                
-                Q_p_ref = ref_building["Q_p"]
-                H_t_ref = ref_building["H_t_spec"]
-                M = Q_p_ref * 50
-                                       
-                model.addConstr(x_restruc[dev,n] <=  u_ref / u_var + b_ind_mea)
-                
-                M = H_t_ref * 10   
-                model.addConstr(H_t / total_shell <= H_t_ref + (1 - b_ind_mea) * M) 
-            
-                M = Q_p_ref * 10          
-                model.addConstr(Q_p_DIN <= Q_p_ref + (1.0 - b_ind_mea) * M)
-        
-        #Correction factors for components that have no contact with the ambient ait
-        Fx = {}
-        Fx["Window"] = 1
-        Fx["OuterWall"] = 1 
-        Fx["GroundFloor"] = 0.6
-        Fx["Rooftop"] = 1
-        
-        model.addConstr(H_t == building["dimensions"]["Area"] * 
-                               (sum(building["dimensions"][dev] * Fx[dev] * 
-                                sum(x_restruc[dev,n] * 
-                                building["U-values"][n][dev]["U-Value"] 
-                                for n in restruc_scenarios) 
-                                for dev in building_components)
-                                + 0.05 * sum(building["dimensions"][dev] 
-                                         for dev in building_components)))
-                                      
-        for d in days:
-            for t in time_steps:
-                model.addConstr(Q_Ht[d,t] == clustered["temp_delta"][d,t] / 1000 * H_t)                                     
-                                           
-        
-        #Ventilation Losses
-        vol = 0.76 * building["dimensions"]["Area"] * building["dimensions"]["Volume"]
-        ro_cp = 0.34 #Wh/m³K
-        n = 0.7 #1/h 
-        
-        H_v = ro_cp * n * vol
-      
-        # Total heating losses
-        G_t = 3380 #Kd - Gradtagzahl
-        f_na = 0.95 #Parameter for switching off the heater in the night
-        f_ql = 0.024 * G_t * f_na
-        
-        Q_l =  H_v * f_ql / 8760 #kWh
-        
-        #Solar Gains for all windowareas as a function of the solar radiation 
-        #of the respective direction:
-                                            
-        #Correction factors in accordance with DIN V 4108 and EnEV                                    
-        F_solar = 0.9 * 1 * 0.7 * 0.85
-        
-        for d in days:
-            for t in time_steps:
-                model.addConstr(Q_s[d,t] == F_solar * sum(x_restruc["Window",n] * 
-                                            building["U-values"][n]["Window"]["G-Value"] 
-                                            for n in restruc_scenarios)  *     
-                                            (building["dimensions"]["Window_east"] * 
-                                             clustered["solar_e"][d,t] + 
-                                             building["dimensions"]["Window_west"] * 
-                                             clustered["solar_w"][d,t] +
-                                             building["dimensions"]["Window_north"] * 
-                                             clustered["solar_n"][d,t] + 
-                                             building["dimensions"]["Window_south"] * 
-                                             clustered["solar_s"][d,t]))
-                                
-        # For every timestep die heating demand is calculated in considering of 
-        # the transmissionen and ventilation losses as well as internal and solar gains
-        for d in days:
-            for t in time_steps:
-                 model.addConstr(heat_mod[d,t] >= Q_Ht[d,t] + Q_l - Q_s[d,t] - clustered["int_gains"][d,t])
-                 
-                 model.addConstr(heat_mod[d,t] <= Q_Ht[d,t] + Q_l) 
+        if options.get("filename_lp"):
+            model.write(options["filename_lp"])
 
-#%% Heating systems
-    
-        # Devices can be switched on only if they have been purchased       
-        for dev in heater:
-            model.addConstr(params["time_steps"] * 
-                            params["days"] * 
-                            x[dev] >= sum(sum(y[dev,d,t] 
-                                      for t in time_steps) 
-                                      for d in days), 
-                                      name="Activation_"+dev)
-                                  
-        # Devices nominal values (heat_nom = y * capacity)
-        for dev in heater:
-            for d in days:
-                for t in time_steps:
-                    # Abbreviations
-                    timetag = "_" + str(d) + "_" + str(t)
-                    
-                    q_nom_min = devs[dev]["Q_nom_min"]
-                    q_nom_max = devs[dev]["Q_nom_max"]
-                    
-                    model.addConstr(heat_nom[dev,d,t] <= q_nom_max * y[dev,d,t],
-                                            name="Max_heat_1_"+dev+"_"+timetag)
-                    
-                    model.addConstr(heat_nom[dev,d,t] >= q_nom_min * y[dev,d,t],
-                                            name="Min_heat_1_"+dev+"_"+timetag)
-                        
-                    model.addConstr(capacity[dev] <= heat_nom[dev,d,t] + 
-                                                     q_nom_max * 
-                                                     (x[dev] - y[dev,d,t]),
-                                                     name="Max_heat_2_"+dev+"_"+timetag)
-                    
-                    model.addConstr(capacity[dev] >= heat_nom[dev,d,t] + 
-                                                     q_nom_min * 
-                                                     (x[dev] - y[dev,d,t]),
-                                                     name="Min_heat_2_"+dev+"_"+timetag)
-        
-        for dev in ("boiler","pellet"):
-            for d in days:
-                for t in time_steps:
-                    # Abbreviations
-                    timetag = "_" + str(d) + "_" + str(t)
-                    
-                    model.addConstr(heat[dev,d,t] <= heat_nom[dev,d,t],
-                                                     name="Max_heat_operation_"
-                                                     +dev+"_"+timetag)
-                    
-                    model.addConstr(heat[dev,d,t] >= heat_nom[dev,d,t] * 
-                                                     devs[dev]["mod_lvl"],
-                                                     name="Min_heat_operation_"
-                                                     +dev+"_"+timetag)                    
-                            
-                    model.addConstr(heat[dev,d,t] == energy[dev,d,t] * 
-                                                     devs[dev]["eta"],
-                                                     name="Energy_equation_"
-                                                     +dev+"_"+timetag)       
-        
-        dev = "chp"
-        for d in days:
-            for t in time_steps:
-                # Abbreviations
-                timetag = "_" + str(d) + "_" + str(t)
-                
-                mod_lvl = devs[dev]["mod_lvl"]
-                omega   = devs[dev]["omega"]
-                sigma   = devs[dev]["sigma"]
-                
-                model.addConstr(heat[dev,d,t] <= heat_nom[dev,d,t],
-                                name="Max_heat_operation_"+dev+"_"+timetag)
-                
-                model.addConstr(heat[dev,d,t] >= heat_nom[dev,d,t] * mod_lvl,
-                                name="Min_heat_operation_"+dev+"_"+timetag)                    
-  
-                model.addConstr(power[dev,d,t] == sigma * heat[dev,d,t],
-                                name="Power_equation_"+dev+"_"+timetag)
-                        
-                model.addConstr(energy[dev,d,t] * omega == (heat[dev,d,t] + 
-                                                            power[dev,d,t]),
-                                                            name="Energy_equation_"+
-                                                            dev+"_"+timetag)
-                    
-        dev = "eh"
-        for d in days:
-            for t in time_steps:
-                # Abbreviations
-                timetag = "_" + str(d) + "_" + str(t)
+        #Execute calculation
+        backend = options.get("backend", "gurobi")
 
-                model.addConstr(heat[dev,d,t] <= heat_nom[dev,d,t],
-                                                 name="Max_heat_operation_"
-                                                 +dev+"_"+timetag)
-                
-                model.addConstr(heat[dev,d,t] >= heat_nom[dev,d,t] * 
-                                                 devs[dev]["mod_lvl"],
-                                                 name="Min_heat_operation_"
-                                                 +dev+"_"+timetag)                    
-  
-                model.addConstr(heat[dev,d,t] == power[dev,d,t] * 
-                                                 devs[dev]["eta"],
-                                                 name="Power_equation_"
-                                                 +dev+"_"+timetag)
-                                                 
-        for dev in ("hp_air","hp_geo"):
-            for d in days:
-                for t in time_steps:
+        # Callbacks of the Gurobi backend
+        model._callbacks = []
+        if v.get("lazy"):
+            model._lazy_upper = [bound[0] for bound in v["lazy"]]
+            model._lazy_lower = [bound[1] for bound in v["lazy"]]
+            model._lazy_added = set()
 
-                    timetag = "_" + str(d) + "_" + str(t)
-                    
-                    mod_lvl = devs[dev]["mod_lvl"]
-                    
-                    model.addConstr(heat_nom[dev,d,t] == power_nom[dev,d,t] * 
-                                                         devs[dev]["cop_a2w35"],
-                                                         name="Power_nom_"+dev+"_"+timetag)
-                                           
-                    model.addConstr(power[dev,d,t] <= power_nom[dev,d,t],
-                                                      name="Max_pow_operation_"
-                                                      +dev+"_"+timetag)
-                    
-                    model.addConstr(power[dev,d,t] >= power_nom[dev,d,t] * 
-                                                      mod_lvl,
-                                                      name="Min_pow_operation_"
-                                                      +dev+"_"+timetag)
-                
-                    model.addConstr(power[dev,d,t] == sum(lin_TVL[temp,dev,d,t] / 
-                                                      devs[dev]["cop_w"+temp][d,t] 
-                                                      for temp in b_TVL.keys()),
-                                                      name="Min_pow_operation_"
-                                                      +dev+"_"+timetag)
-                    
-                    M = devs[dev]["Q_nom_max"]
-                    for temp in b_TVL.keys():
-                        model.addConstr(lin_TVL[temp,dev,d,t] <= M * b_TVL[temp])
-                        
-                        model.addConstr(heat[dev,d,t] - lin_TVL[temp,dev,d,t] >= 0)
-                        
-                        model.addConstr(heat[dev,d,t] - lin_TVL[temp,dev,d,t] <=
-                                                          M * (1 - b_TVL[temp]))
-                
-#%% Solar components
+            model.Params.LazyConstraints = 1
+            model._callbacks.append(_lazy_bounds_callback)
 
-        dev = "pv"
-        eta_inverter = 0.97
-        model.addConstr(pv_power == capacity[dev] * devs[dev]["p_nom"] / devs[dev]["area_mean"])  
-        for d in days:
-            for t in time_steps:
-                timetag = "_" + str(d) + "_" + str(t)
-                
-                model.addConstr(power[dev,d,t] <= capacity[dev] * 
-                                                  devs[dev]["eta_el"][d][t] *
-                                                  eta_inverter *
-                                                  clustered["solar_roof"][d][t],
-                                                  name="Solar_electrical_"
-                                                  +dev+"_"+timetag)
-                                                      
-        dev = "stc"
-        for d in days:
-            for t in time_steps:
-                timetag = "_" + str(d) + "_" + str(t)
-
-                model.addConstr(heat[dev,d,t] <= capacity[dev] * 
-                                                 devs[dev]["eta_th"][d][t] *
-                                                 clustered["solar_roof"][d][t],
-                                                 name="Solar_thermal_"
-                                                 +dev+"_"+timetag)
-                               
-#%% Storages      
-                               
-        # Nominal storage content (SOC)
-        for dev in storage:
-            for d in days:
-                #Inits
-                model.addConstr(soc_nom[dev] >= soc_init[dev,d], 
-                                                name="SOC_nom_inits_"
-                                                +dev+"_"+str(d))
-                for t in time_steps:
-                    # Regular storage loads
-                    model.addConstr(soc_nom[dev] >= soc[dev,d,t],
-                                                    name="SOC_nom_"
-                                                    +dev+"_"+str(d)+"_"+str(t))
-                    
-        # SOC repetitions
-        for dev in storage:
-            for d in range(params["days"]):
-                if np.max(clustered["weights"]) > 1:
-                    model.addConstr(soc_init[dev,d] == soc[dev,d,params["time_steps"]-1],
-                                                       name="repetitions_" +dev+"_"+str(d))
-                      
-        #TES
-        dev = "tes"
-        
-        k_loss = devs[dev]["k_loss"]
-        eta_ch = devs[dev]["eta_ch"]
-        eta_dch = devs[dev]["eta_dch"]
-        
-        for d in days:
-            for t in time_steps:
-                if t == 0:
-                    if np.max(clustered["weights"]) == 1:
-                        if d == 0:
-                           soc_prev = soc_init[dev,d]
-                        else:
-                           soc_prev = soc[dev,d-1,params["time_steps"]-1]
-                    else:
-                        soc_prev = soc_init[dev,d]
-                else:
-                    soc_prev = soc[dev,d,t-1]
-                
-                timetag = "_" + str(d) + "_" + str(t)
-                
-                charge = eta_ch * ch[dev,d,t]
-                discharge = 1 / eta_dch * dch[dev,d,t]
-                
-                model.addConstr(soc[dev,d,t] == (1 - k_loss) * soc_prev + 
-                                dt * (charge - discharge),
-                                name="Storage_bal_"+dev+timetag)
-
-        #BAT
-        dev = "bat"
-        
-        k_loss = devs[dev]["k_loss"]
-        eta_ch = devs[dev]["eta"]
-        eta_dch = devs[dev]["eta"]
-        
-        for d in days:
-            for t in time_steps:
-                if t == 0:
-                    if np.max(clustered["weights"]) == 1:
-                        if d == 0:
-                           soc_prev = soc_init[dev,d]
-                        else:
-                           soc_prev = soc[dev,d-1,params["time_steps"]-1]
-                    else:
-                        soc_prev = soc_init[dev,d]
-                else:
-                    soc_prev = soc[dev,d,t-1]
+        if options.get("telemetry"):
+            model._trace = []
+            model._trace_last = (-1, None, None)
+            model._callbacks.append(_telemetry_callback)
 
-                timetag = "_" + str(d) + "_" + str(t)
-                
-                charge = eta_ch * ch[dev,d,t]
-                discharge = 1 / eta_dch * dch[dev,d,t]
-    
-                model.addConstr(soc[dev,d,t] == (1 - k_loss) * soc_prev + dt *
-                                                (charge - discharge),
-                                                name="Storage_bal_"+dev+timetag)             
-    
-                model.addConstr(ch[dev,d,t] <= x[dev] * devs[dev]["P_ch_fix"] + 
-                                               capacity[dev] * devs[dev]["P_ch_var"],
-                                               name="P_ch_max"+timetag)
-    
-                model.addConstr(dch[dev,d,t] <= x[dev] * devs[dev]["P_dch_fix"] + 
-                                                capacity[dev] * devs[dev]["P_dch_var"],
-                                                name="P_dch_max"+timetag)
-        
-                            
-#%% Thermal balance and electricity balance
-                            
-        # Differentiation for dhw-heating: either electric or via heating system
-        if options["dhw_electric"]:    
-            
-            #Thermal balance
-            dev = "tes"        
-            for d in days:
-                for t in time_steps:
-                    timetag = "_" + str(d) + "_" + str(t)
-                    
-                    model.addConstr(dch[dev,d,t] == heat_mod[d,t], 
-                                                    name="Thermal_max_discharge"
-                                                    +timetag)
-                    
-                    model.addConstr(ch[dev,d,t]  == heat["stc",d,t] + 
-                                                    sum(heat[dv,d,t] 
-                                                    for dv in heater),
-                                                    name="Thermal_max_charge"+
-                                                    timetag)
-          
-            #Electricity balance            
-            for d in days:
-                for t in time_steps:
-                    timetag = "_" + str(d) + "_" + str(t)
-                    
-                    # For components without hp-tariff (p_use["bat"] referring to discharge)
-                    model.addConstr(clustered["electricity"][d,t] +
-                                    clustered["dhw"][d,t] +
-                                    eh_split["eh_w/o_hp",d,t] + 
-                                    ch["bat",d,t] == p_grid["grid_house",d,t] + 
-                                                     sum(p_use[dev,d,t] 
-                                                     for dev in ("pv","bat","chp")),
-                                                     name="El_bal_w/o_HPtariff"
-                                                     +timetag)
- 
-                    # For components with hp-tariff (p_hp["bat"] referring to discharge)
-                    model.addConstr(power["hp_air",d,t] + 
-                                    power["hp_geo",d,t] + 
-                                    eh_split["eh_w/_hp",d,t] == p_grid["grid_hp",d,t] + 
-                                                                sum(p_hp[dev,d,t] 
-                                                                for dev in ("pv","bat","chp")),
-                                                                name="El_bal_w/_HPtariff"
-                                                                +timetag)    
-        
-        else:     
-            
-            #Thermal balance
-            dev = "tes"        
-            for d in days:
-                for t in time_steps:    
-                    timetag = "_" + str(d) + "_" + str(t)
-                    
-                    model.addConstr(dch[dev,d,t] == heat_mod[d,t] + 
-                                                    clustered["dhw"][d,t], 
-                                                    name="Thermal_max_discharge"
-                                                    +timetag)
-                    
-                    model.addConstr(ch[dev,d,t] == heat["stc",d,t] + 
-                                                   sum(heat[dv,d,t] 
-                                                   for dv in heater),
-                                                   name="Thermal_max_charge"
-                                                   +timetag)
-            #Electricity balance            
-            for d in days:
-                for t in time_steps:
-                    timetag = "_" + str(d) + "_" + str(t)
-                    
-                    # For components without hp-tariff (p_use["bat"] referring to discharge)
-                    model.addConstr(clustered["electricity"][d,t] +
-                                    eh_split["eh_w/o_hp",d,t] + 
-                                    ch["bat",d,t] == p_grid["grid_house",d,t] + 
-                                                     sum(p_use[dev,d,t] 
-                                                     for dev in ("pv","bat","chp")),
-                                                     name="El_bal_w/o_HPtariff"
-                                                     +timetag)
- 
-                    # For components with hp-tariff (p_hp["bat"] referring to discharge)
-                    model.addConstr(power["hp_air",d,t] + 
-                                    power["hp_geo",d,t] + 
-                                    eh_split["eh_w/_hp",d,t] == p_grid["grid_hp",d,t] + 
-                                                                sum(p_hp[dev,d,t] 
-                                                                for dev in ("pv","bat","chp")),
-                                                                name="El_bal_w/_HPtariff"
-                                                                +timetag)    
-                    
-        
-        #Split CHP and PV generation and bat discharge Power into 
-        #self-consumed, sold and transferred powers
-        for d in days:
-            for t in time_steps:
-                timetag = "_" + str(d) + "_" + str(t)
-                
-                dev = "bat"
-                model.addConstr(dch[dev,d,t] == p_sell[dev,d,t] + 
-                                                p_use[dev,d,t] + 
-                                                p_hp[dev,d,t],
-                                                name="power=sell+use+hp_"
-                                                +dev+timetag)
-                
-                for dev in ("pv", "chp"):
-                    model.addConstr(power[dev,d,t] == p_sell[dev,d,t] + 
-                                                      p_use[dev,d,t] + 
-                                                      p_hp[dev,d,t],
-                                                      name="power=sell+use+hp_"
-                                                      +dev+timetag)
-                    
-        # Split EH power consumption into cases with and without heat pump installed
-        dev = "eh"              
-        for d in days:
-            for t in time_steps:
-                model.addConstr(power["eh",d,t] == eh_split["eh_w/o_hp",d,t] + 
-                                                   eh_split["eh_w/_hp",d,t])
-                                
-                model.addConstr(eh_split["eh_w/_hp",d,t]  <= (x["hp_air"] + 
-                                                              x["hp_geo"]) * 
-                                                              devs[dev]["Q_nom_max"])   
-                                                  
-                model.addConstr(eh_split["eh_w/o_hp",d,t] <= (1 - x["hp_air"] 
-                                                                - x["hp_geo"]) * 
-                                                                  devs[dev]["Q_nom_max"])                    
-                            
-#%% HP and STC operation depends on storage temperature
-                
-        for dev in ("hp_geo", "hp_air", "stc"):
-            for d in days:
-                for t in time_steps:
-                    timetag = "_" + str(d) + "_" + str(t)
-                    
-                    # Abbreviations
-                    dT_relative = (devs[dev]["dT_max"] / 
-                                   devs["tes"]["dT_max"])
-                    
-                    # Residual storage content
-                    resSC = (devs["tes"]["volume_max"] * 
-                             devs["tes"]["dT_max"] *
-                             params["rho_w"] * 
-                             params["c_w"] * 
-                             (1 - dT_relative) / 
-                             3600000)     
-                    
-                    model.addConstr(soc["tes",d,t] <= soc_nom["tes"] * 
-                                                      dT_relative +
-                                                      (1 - y[dev,d,t]) * resSC,
-                                                      name="Renew_heater_act_"
-                                                      +dev+timetag)      
-                
-#%% Design heat load following DIN EN 12831 has to be covered
-        
-        if options["Design_heat_load"]:
-            
-            delta_temp = clustered["temp_indoor"] - clustered["temp_design"] 
-            
-            model.addConstr(dsh == (H_t + 0.5 * 0.34 * 
-                                    building["dimensions"]["Volume"] * 
-                                    building["dimensions"]["Area"]) *
-                                    delta_temp / 1000,
-                                    name = "dsh1")
-        
-            model.addConstr(dsh <= sum(capacity[dev] 
-                                       for dev in ("boiler","chp","eh")) +
-                                       sum(capacity[hp] * devs[hp]["cop_a2w55"]
-                                       for hp in ("hp_air", "hp_geo")),
-                                       name="dsh2")
-        
+        if options.get("termination"):
+            model._termination = None
+            model._stagnation = {"incumbent" : gp.GRB.INFINITY,
+                                 "time" : 0,
+                                 "gaps" : []}
+            model._termination_policy = _termination_policy(options)
+            model._callbacks.append(_termination_callback)
+
+        # MIP starts from the most similar buildings of the start library
+        if options.get("start_library"):
+            library = options["start_library"]
+            feature = start_library.features(clustered, building, options)
+            signature = start_library.structure(model, options)
+            found = start_library.neighbours(library, feature, signature,
+                                             options.get("start_number", 3))
+            _set_start_values(model, options,
+                              [entry["binaries"] for (dist, entry) in found])
+
+            model._first_solution = None
+            model._callbacks.append(_first_solution_callback)
+
+        # Design of a previous solve, e.g. with fewer typical days
+        if options.get("design_start"):
+            _set_start_values(model, options,
+                              _design_starts(v, options["design_start"]))
+
+        # Constructive start from the rounded LP relaxation
+        if options.get("lp_heuristic"):
+            heuristic = _lp_heuristic(model, v, backend, options)
+            if heuristic is not None:
+                _set_start_values(model, options, [heuristic["start"]])
+
+            model._first_solution = None
+            if _first_solution_callback not in model._callbacks:
+                model._callbacks.append(_first_solution_callback)
+
+        # Collect further solutions for alternative designs
+        if options.get("solution_pool"):
+            model.Params.PoolSearchMode = 2
+            model.Params.PoolSolutions = 10 * options["solution_pool"]
+
+        if options.get("portfolio"):
+            (winner, solution) = solver_backends.solve_portfolio(model,
+                                                    _portfolio(options))
+            _log_portfolio(options["filename_results"], winner, solution)
+        elif options.get("relax_and_fix"):
+            solution = _relax_and_fix(model, v, data, backend, options)
+        elif model._callbacks:
+            solution = solver_backends.solve(model, backend, _callback)
         else:
-            
-            model.addConstr(dsh == 0)
-     
-#%% CO2-Emissions
-            
-        emission_pellet = eco["pel"]["pel_sta"]["emi"] * pel_total
+            solution = solver_backends.solve(model, backend)
 
-        emissions_gas = eco["gas"]["gas_sta"]["emi"] * (gas_total_chp + gas_total_boi)
-        
-        emissions_grid = eco["el"]["el_sta"]["emi"] * (el_total_hp + el_total_house)
-               
-        emissions_feedin = 0.566 * sum(clustered["weights"][d] * dt * 
-                                   sum(sum(p_sell[dev,d,t] 
-                                   for dev in ("pv","bat","chp"))
-                                   for t in time_steps) for d in days)
-        
-        model.addConstr(emission == emission_pellet + 
-                                    emissions_gas + 
-                                    emissions_grid - 
-                                    emissions_feedin)
-                                                          
-#%% Subsidies:      
-
-#%% For EEG and KfW-battery program:
-        
-        # Bestrict sold electricity from PV to 70% of the rated power without
-        # battery storage and 50% with storage system       
-        dev = "pv" 
-        
-        for d in days:
-            for t in time_steps:                                                
-                model.addConstr(p_sell["pv",d,t] + 
-                                p_sell["bat",d,t] <= devs[dev]["p_nom"]/
-                                                     devs[dev]["area_mean"] * 
-                                                     (capacity[dev] - 0.3 * 
-                                                      lin_pv_power["eeg"]))
-        for d in days:
-            for t in time_steps:                                                
-                model.addConstr(p_sell["pv",d,t] + 
-                                p_sell["bat",d,t] <= devs[dev]["p_nom"]/
-                                                     devs[dev]["area_mean"] * 
-                                                     (capacity[dev] - 0.5 * 
-                                                      lin_pv_power["kfw"]))
-
-        # Linearization of b_pv_power[i] * capacity["pv"]
-        for i in ("eeg", "kfw"):  
-            model.addConstr(lin_pv_power[i] <= A_max * b_pv_power[i])            
-            model.addConstr(lin_pv_power[i] >= devs[dev]["area_min"] * b_pv_power[i])            
-            model.addConstr(capacity[dev] - lin_pv_power[i] >= 0)            
-            model.addConstr(capacity[dev] - lin_pv_power[i] <= (1 - b_pv_power[i]) * A_max)                                                    
-                                                          
-#%% EEG           
-            dev = "pv"  
-            # Sold electricity from PV
-            model.addConstr(p_sell_pv["total"] == sum(clustered["weights"][d] * 
-                                                  sum(p_sell[dev,d,t]
-                                                  for t in time_steps)
-                                                  for d in days) * dt)   
-            
-        if options["EEG"]:   
-          
-            model.addConstr(b_pv_power["eeg"] <= x["pv"])
-            
-            pv_powerstages = ("10","40","750","10000")
-            
-            # Differentiation of funding rate depending on installed PV-power                       
-            model.addConstr(pv_power <= sum(float(n) * b_eeg[n] 
-                                        for n in pv_powerstages))
-            
-            model.addConstr(x[dev] >= sum(b_eeg[n] for n in pv_powerstages))
- 
-            model.addConstr(p_sell_pv["total"] == sum(p_sell_pv[n] 
-                                                      for n in pv_powerstages))
-            
-            #Calculate max. annual PV-Electricity for available Rooftoparea
-            irr_ann = np.sum(clustered["weights"] * 
-                             np.sum(clustered["solar_roof"], axis = 1)) #kwh/m²
-            
-            eta_max_pv = np.max(devs["pv"]["eta_el"]) #%
-           
-            p_pv_max = irr_ann * A_max * eta_max_pv #kWh/a
-            
-            for n in pv_powerstages:
-                model.addConstr(p_sell_pv[n]  <=  p_pv_max * b_eeg[n])
-            
-            # If EEG is available: subsidy instead of revenue
-            # Calculation of total earnings from sold electricity
-            model.addConstr(subsidy[dev] == eco["crf"] * sub_par["eeg_temp"] *
-                                            sum(p_sell_pv[n] * sub_par["eeg"][n]
-                                            for n in pv_powerstages),
-                                            name="Feed_in_rev_"+dev)
-            
-            M = eco["crf"] * sub_par["eeg_temp"] * p_pv_max * sub_par["eeg"]["10"]
-            
-            model.addConstr(subsidy[dev] <= M * b_pv_power["eeg"])
-            model.addConstr(revenue[dev] == 0)
-                                                   
-        else:            
-            # If EEG is not available: revenue instead of subsidy
-            model.addConstr(subsidy[dev] == 0)            
-            model.addConstr(revenue[dev] == eco["b"]["eex"] * eco["crf"] *
-                                            eco["price_sell_el"] *
-                                            p_sell_pv["total"],
-                                            name="Feed_in_rev_"+dev)    
-
-        #%% KfW-Subsidy for Battery
-        
-        dev = "bat"
-        
-        if options["kfw_battery"]:
-            
-            model.addConstr(b_pv_power["kfw"] <= x["bat"])               
-            
-            M = (eco["crf"] * A_max * 
-                 devs["pv"]["p_nom"] / 
-                 devs["pv"]["area_mean"] * 
-                 sub_par["bat"]["share_max"] * 
-                 sub_par["bat"]["sub_bat_max"])
-            
-            model.addConstr(subsidy[dev] <= M * b_pv_power["kfw"])
-            
-            model.addConstr(subsidy[dev] <= eco["crf"] * 
-                                            sub_par["bat"]["share_max"] *                            
-                                            sub_par["bat"]["sub_bat_max"] *                                             
-                                            pv_power,                                            
-                                            name="Bat_Subsidies_1")
-            
-            model.addConstr(subsidy[dev] <= c_inv["pv"] + c_inv["bat"] -                            
-                                            eco["crf"] * 
-                                            sub_par["bat"]["share_max"] *                                                                                          
-                                            sub_par["bat"]["sub_bat"] *                                              
-                                            pv_power,            
-                                            name="Bat_Subsidies_2")
-        else:            
-            model.addConstr(subsidy[dev] == 0)
-          
-#%% CHP                
-        # There are two subsidy-possibilities for chps
-        # 1. Remuneration system in accordance with the KWKG
-        # 2. Investment subsidy for small chps
-        dev = "chp"
-        model.addConstr(subsidy[dev] == sub["kwkg"] + sub["bafa"],
-                                        name = "chp_sub") 
-                                            
-        #BAFA-Subsidy for Mirco-CHP
-        #Program has three parts: basic-subsidy, thermal-efficiency-bonus and 
-        #power-efficiency-bonus - Further informations:
-        #http://www.bafa.de/DE/Energie/Energieeffizienz/Kraft_Waerme_Kopplung/Mini_KWK/mini_kwk_node.html
-        
-        if options["Bafa_chp"]:               
-            # Only devices with p_el <= 20 kW can achieve a subsidy
-            # For the modeling we distinguish betweeen three power-categories: 
-            # micro: < 1kW, mini: 1 - 20 kW, large: >20kW
-            
-            model.addConstr(x["chp"] == x_chp["micro"] + 
-                                        x_chp["mini"] + 
-                                        x_chp["large"],
-                                        name = "chp_size")
-            
-            power_chp = capacity[dev] * devs[dev]["sigma"]
-                       
-            model.addConstr(power_chp <= 1 * x_chp["micro"] + 
-                                        20 * x_chp["mini"] +
-                                       100 * x_chp["large"], 
-                                         name = "chp_sum_powerstep_ub")          
-            
-            model.addConstr(power_chp >= sum(chp_powerstep[i] 
-                                         for i in chp_powerstep.keys()), 
-                                         name = "chp_sum_powerstep")
+        if v.get("lazy"):
+            print("")
+            print("Lazy bounds: " + str(len(model._lazy_added)) + " of " +
+                  str(len(v["lazy"])) + " added")
 
-            model.addConstr(chp_powerstep[1] == 1 * x_chp["mini"], 
-                                                name = "chp_powerstep1")
-            
-            model.addConstr(chp_powerstep[2] <= 3 * x_chp["mini"],
-                                                name = "chp_powerstep1")
-            
-            model.addConstr(chp_powerstep[3] <= 6 * x_chp["mini"],
-                                                name = "chp_powerstep2")
-            
-            model.addConstr(chp_powerstep[4] <= 10 * x_chp["mini"],
-                                                name = "chp_powerstep3")          
-            
-            # Bounds for Basic CHP Subsidy                                   
-            model.addConstr(sub_chp_basic <= sub_par["bafa_chp"]["sub_basic_max"] * 
-                                             x_chp["mini"] + 
-                                             sub_par["bafa_chp"]["sub_step_1"] * 
-                                             x_chp["micro"], 
-                                             name = "chp_sub_basic_ub")
-            
-            model.addConstr(sub_chp_basic <= sub_par["bafa_chp"]["sub_step_1"] * 
-                                             (x_chp["micro"] + chp_powerstep[1]) + 
-                                             sub_par["bafa_chp"]["sub_step_2"] * 
-                                             chp_powerstep[2] + 
-                                             sub_par["bafa_chp"]["sub_step_3"] * 
-                                             chp_powerstep[3] + 
-                                             sub_par["bafa_chp"]["sub_step_4"] * 
-                                             chp_powerstep[4],
-                                             name = "chp_sub_basic_calcutation")     
-           
-            # Calculate annual subsidy value
-            model.addConstr(sub["bafa"] == eco["crf"] * devs[dev]["rval"] *
-                                           sub_chp_basic * (1 + 
-                                           sub_par["bafa_chp"]["share_therm_eff"] * 
-                                           devs[dev]["therm_eff_bonus"] +
-                                           sub_par["bafa_chp"]["share_elec_eff"] * 
-                                           devs[dev]["power_eff_bonus"]),
-                                           name = "chp_bafa_total_calculation")           
-      
-        else:            
-            model.addConstr(sub["bafa"] == 0)
-                      
-        #KWKG for CHP 
-        if options["KWKG"]:
-            
-            # Total electricity produced by CHP per year
-            model.addConstr(p_chp_total["total"] == dt * sum(clustered["weights"][d] *
-                                                         sum(p_sell[dev,d,t] + 
-                                                             p_use[dev,d,t] + 
-                                                             p_hp[dev,d,t]
-                                                             for t in time_steps) 
-                                                             for d in days))
-    
-            # Self consumed electricity from CHP                            
-            model.addConstr(p_chp_total["use"] == dt * sum(clustered["weights"][d] *
-                                                       sum(p_use[dev,d,t] + 
-                                                           p_hp[dev,d,t]                            
-                                                           for t in time_steps) 
-                                                           for d in days))
-                                                      
-            # Sold electricity from CHP
-            model.addConstr(p_chp_total["sell"] == dt * sum(clustered["weights"][d] *
-                                                        sum(p_sell[dev,d,t]                           
-                                                        for t in time_steps) 
-                                                        for d in days))
-                
-            # Differentiation between discrete categories of full load hours
-            model.addConstr(sum(b_kwkg[n] for n in b_kwkg.keys()) <= 1)
-            
-            # Constant annual payment - In the following the interest effect
-            # has to be considered!
-            model.addConstr(sub_kwkg_temp == p_chp_total["use"] * 
-                                             sub_par["kwkg"]["self_50"] + 
-                                             p_chp_total["sell"] * 
-                                             sub_par["kwkg"]["sell_50"])
-            
-            # Here the full load hours per year are determined
-            # The amount of full load hours per year decides in how many years
-            # the kwkg-subsidy is paid 
-            model.addConstr(p_chp_total["total"] <= sum(lin_kwkg_1[n] * 
-                                                        sub_par["kwkg"]["vls"][n]
-                                                        for n in sub_par["kwkg"]["vls"].keys()))
-            
-            #Linearization part 1: b_kwkg[n] * capacity["chp"]                   
-            U = 50 #kWh        
-            for n in b_kwkg.keys():
-                model.addConstr(lin_kwkg_1[n] <= U * b_kwkg[n])
-                model.addConstr(devs["chp"]["sigma"] * capacity["chp"] - lin_kwkg_1[n] >= 0)
-                model.addConstr(devs["chp"]["sigma"] * capacity["chp"] - lin_kwkg_1[n] <= U * (1-b_kwkg[n]))
-                
-            #Linearization part 2: b_kwkg[n] * sub_kwkg_temp                  
-            U = 50 * 8760 * sub_par["kwkg"]["sell_50"] #€
-            for n in b_kwkg.keys():
-                model.addConstr(lin_kwkg_2[n] <= U * b_kwkg[n])
-                model.addConstr(sub_kwkg_temp - lin_kwkg_2[n] >= 0)
-                model.addConstr(sub_kwkg_temp - lin_kwkg_2[n] <= U * (1-b_kwkg[n])) 
-            
-            # Here the correct annuity is determined (incl. interest effect)
-            model.addConstr(sub["kwkg"] == eco["crf"] * sum(lin_kwkg_2[n] * 
-                                                            sub_par["kwkg"]["i"][n]
-                                                            for n in sub_par["kwkg"]["i"].keys()))
-                                
-        else:            
-            model.addConstr(sub["kwkg"] == 0)
-            
-        #%% MAP-Subsidy for STC  
-                   
-        #The "Marktanreizprogramm" MAP is a subsidy-program for STC by BAFA
-        #The prorgam has three parts: basic, innovation and additional subsidy
-        #Further Information:
-        #http://www.bafa.de/DE/Energie/Heizen_mit_Erneuerbaren_Energien/Solarthermie/solarthermie_node.html 
-        
-        dev = "stc"                    
-        if options["Bafa_stc"]:            
-            
-            #It is only possible to get either basic_fix, basic_var or inno
-            model.addConstr(x["stc"] >= b_bafa_stc["basic_fix"] + 
-                                        b_bafa_stc["basic_var"] + 
-                                        b_bafa_stc["inno"],                          
-                                        name = "stc_bafa_x_stc")
-            
-            model.addConstr(x["tes"] >= b_bafa_stc["basic_fix"] + 
-                                        b_bafa_stc["basic_var"] + 
-                                        b_bafa_stc["inno"],
-                                        name = "stc_bafa_x_tes")
-            
-            #Thermal storage restriction
-            #At least 50 l/m² are necessary
-            model.addConstr(capacity["tes"] * 
-                            params["rho_w"] >= sub_par[dev]["min_storage"] * 
-                                               lin_sub_stc, 
-                                               name = "stc_bafa_tes_restr")
-            
-            # Linearization for storage constraint
-            model.addConstr(lin_sub_stc <= A_max * (b_bafa_stc["basic_fix"] + 
-                                                    b_bafa_stc["basic_var"] + 
-                                                    b_bafa_stc["inno"]),
-                                                    name = "stc_bafa_lin_1") 
-            
-            model.addConstr(capacity[dev] - lin_sub_stc >= 0,
-                                                    name = "stc_bafa_lin_2")  
-            
-            model.addConstr(capacity[dev] - lin_sub_stc <=  A_max * (1 - 
-                                                    (b_bafa_stc["basic_fix"] + 
-                                                     b_bafa_stc["basic_var"] + 
-                                                     b_bafa_stc["inno"])),
-                                                     name = "stc_bafa_lin_3")         
-                                                    
-            #Basic program
-            #Area restriction   
-            #At least 9 m² are necessary
-            model.addConstr(capacity[dev] / sub_par[dev]["basic_area_min"] >= 
-                                                    (b_bafa_stc["basic_var"] + 
-                                                     b_bafa_stc["basic_fix"]),
-                                                     name = "stc_bafa_basic_area_restr")   
-
-            #Just for old buildings
-            model.addConstr(sub_bafa_stc["basic_fix"] <= sub_par[dev]["basic_fix"] * 
-                                                         b_bafa_stc["basic_fix"] * 
-                                                         alpha,
-                                                         name = "stc_bafa_basic_fix")
-            
-            model.addConstr(sub_bafa_stc["basic_var"] <= sub_par[dev]["basic_var"] * 
-                                                         capacity[dev],
-                                                         name = "stc_bafa_basic_var")   
-                 
-            model.addConstr(sub_bafa_stc["basic_var"] <= sub_par[dev]["basic_var"] * 
-                                                         sub_par[dev]["basic_area_max"] * 
-                                                         b_bafa_stc["basic_var"] * 
-                                                         alpha,
-                                                         name = "stc_bafa_basic_ub")                                 
-            
-            #Innovation prorgram
-            #Annual gain restriction
-            #At least 300kWh/m2 are necessary
-            model.addConstr(float(devs[dev]["annual_gain"]) >= sub_par[dev]["annual_gain"] * 
-                                                               b_bafa_stc["inno"],
-                                                               name = "stc_bafa_gain_restr")            
-            
-            #Area restriction
-            #At least 20 m² are necessary           
-            model.addConstr(b_bafa_stc["inno"] <= capacity[dev] / 
-                                                  sub_par[dev]["inno_area_min"],
-                                                  name = "stc_bafa_inno_area_restr")        
-            
-            #Program only available for MFH
-            model.addConstr(sub_bafa_stc["inno"] <= (sub_par["stc"]["inno_new_b"] + 
-                                                     sub_par["stc"]["inno_existing_b"] * 
-                                                     alpha) * capacity[dev] * MFH,
-                                                     name = "stc_bafa_inno_var")
-            
-            model.addConstr(sub_bafa_stc["inno"] <= (sub_par["stc"]["inno_new_b"] + 
-                                                     sub_par["stc"]["inno_existing_b"] * 
-                                                     alpha) * b_bafa_stc["inno"] * MFH *                                                     
-                                                     sub_par["stc"]["inno_area_max"],
-                                                     name = "stc_bafa_inno_ub")            
-            
-            #Additional program
-            #STC in combination with HP is necessary
-            model.addConstr(x["stc"] >= b_bafa_stc["add1"], name = "stc_bafa_add_1")
-                            
-            model.addConstr(x["hp_air"] + x["hp_geo"] >= b_bafa_stc["add1"],
-                                                         name = "stc_bafa_add_2")
-            
-            #Additional program only available if basic or inno program available          
-            model.addConstr(b_bafa_stc["add1"] <= (b_bafa_stc["basic_fix"] + 
-                                                   b_bafa_stc["basic_var"] +
-                                                   b_bafa_stc["inno"]),
-                                                   name = "stc_bafa_add_3")
-                                                   
-            #Additional Building-Efficiency-Subsidy
-            M = A_max * (sub_par["stc"]["inno_new_b"] + sub_par["stc"]["inno_existing_b"] * alpha)
-            
-            model.addConstr(sub_bafa_stc["build_eff"] <= M * b_sub_restruc["kfw_eff_55"], 
-                                                         name = "stc_bafa_b_e_1")
-           
-            model.addConstr(sub_bafa_stc["build_eff"] <= sub_par[dev]["build_eff"] * 
-                                                        (sub_bafa_stc["inno"] + 
-                                                         sub_bafa_stc["basic_fix"] +
-                                                         sub_bafa_stc["basic_var"]), 
-                                                         name = "stc_bafa_b_e_2")                                       
-           
-            #Calculation of annaul subsid value      
-            model.addConstr(subsidy[dev] == eco["crf"] * devs[dev]["rval"] *
-                                             (sub_bafa_stc["basic_fix"] + 
-                                              sub_bafa_stc["basic_var"] + 
-                                              sub_bafa_stc["inno"] + 
-                                              b_bafa_stc["add1"] * 
-                                              sub_par[dev]["stc_hp_combi"] +
-                                              sub_bafa_stc["build_eff"]),
-                                              name = "stc_bafa_total_value")
-        
-        else:             
-            model.addConstr(subsidy[dev] == 0)
-
-        #%% MAP-Subsidy for HP  
-                   
-        #The "Marktanreizprogramm" MAP is a subsidy-program for HP by BAFA
-        #The prorgam has three parts: basic, innovation and additional subsidy
-        #Further Information:
-        #http://www.bafa.de/DE/Energie/Heizen_mit_Erneuerbaren_Energien/Waermepumpen/waermepumpen_node.html
-        
-        if options["Bafa_hp"]:
-            
-            for dev in ("hp_air", "hp_geo"):
-                
-                model.addConstr(energy_hp[dev]["total_heat"] == dt * 
-                                                  sum(clustered["weights"][d] * 
-                                                  sum(heat[dev,d,t] 
-                                                  for t in time_steps) 
-                                                  for d in days))
-                                                      
-                model.addConstr(energy_hp[dev]["total_power"] == dt * 
-                                                  sum(clustered["weights"][d] * 
-                                                  sum(power[dev,d,t] 
-                                                  for t in time_steps) 
-                                                  for d in days))
-                        
-                #It is only possible to get either basic_fix, basic_var, 
-                #inno_fix or inno_var
-                model.addConstr(x[dev] >= b_bafa_hp[dev]["basic_fix"] + 
-                                          b_bafa_hp[dev]["basic_var"] + 
-                                          b_bafa_hp[dev]["inno_fix"] + 
-                                          b_bafa_hp[dev]["inno_var"],
-                                          name = "hp_bafa_x_hp")      
-                
-                #Basic program
-                #For the basic_program  the seasonal coefficient of performance  
-                #has to at least 3.5                 
-                M = 10000
-                
-                model.addConstr(M * (1 - (b_bafa_hp[dev]["basic_fix"] + 
-                                          b_bafa_hp[dev]["basic_var"]))  >= sub_par[dev]["basic_scop"] * 
-                                                                           energy_hp[dev]["total_power"] -
-                                                                           energy_hp[dev]["total_heat"] )
-                
-                model.addConstr(sub_bafa_hp[dev]["basic"] <= ((sub_par[dev]["basic_fix"] + 
-                                                               sub_par[dev]["basic_fix_pc"] * 
-                                                               devs[dev]["pc"]) *
-                                                               b_bafa_hp[dev]["basic_fix"] + 
-                                                               sub_par[dev]["basic_var"] * 
-                                                               lin_hp_sub_basic[dev]),
-                                                               name = "hp_bafa_basic_sub")                
-                
-                model.addConstr(sub_bafa_hp[dev]["basic"] <= sub_par[dev]["basic_var"] *
-                                                             sub_par[dev]["max_cap"] * alpha * 
-                                                             (b_bafa_hp[dev]["basic_var"] + 
-                                                              b_bafa_hp[dev]["basic_fix"]),
-                                                             name = "hp_bafa_basic_sub_ub")
-                
-                # Linearization because of capacity[dev] * b_bafa_hp["basic_var"]
-                model.addConstr(lin_hp_sub_basic[dev] <= devs[dev]["Q_nom_max"] * 
-                                                         b_bafa_hp[dev]["basic_var"],
-                                                         name = "hp_bafa_lin_basic_1")
-                
-                model.addConstr(capacity[dev] - lin_hp_sub_basic[dev] >= 0,
-                                          name = "hp_bafa_lin_basic_2")
-                
-                model.addConstr(capacity[dev] - lin_hp_sub_basic[dev] <= (1 - b_bafa_hp[dev]["basic_var"]) *
-                                                                          devs[dev]["Q_nom_max"],
-                                                                          name = "hp_bafa_lin_basic_3")  
-               
-                #Innovation program
-                #For the basic_program the seasonal coefficient of performance  
-                #has to be at least 4.5 or higher 
-                M = 10000
-                
-                model.addConstr(M * (1 - (b_bafa_hp[dev]["inno_fix"] + 
-                                          b_bafa_hp[dev]["inno_var"])) >= sub_par[dev]["inno_scop"] * 
-                                                                          energy_hp[dev]["total_power"] - 
-                                                                          energy_hp[dev]["total_heat"])           
-        
-                model.addConstr(sub_bafa_hp[dev]["inno"] <= ((sub_par[dev]["inno_fix"] + 
-                                                              sub_par[dev]["inno_fix_pc"] * 
-                                                              devs[dev]["pc"]) * alpha +
-                                                             (sub_par[dev]["basic_fix"] + 
-                                                              sub_par[dev]["basic_fix_pc"] * 
-                                                              devs[dev]["pc"]) * (1-alpha)) +
-                                                              b_bafa_hp[dev]["inno_fix"] +
-                                                             (sub_par[dev]["basic_var"] +
-                                                              sub_par[dev]["inno_var"] * alpha) * 
-                                                              lin_hp_sub_inno[dev],
-                                                              name = "hp_bafa_inno_sub")
-                
-                model.addConstr(sub_bafa_hp[dev]["inno"] <= (sub_par[dev]["basic_var"] *
-                                                             sub_par[dev]["max_cap"] +
-                                                             sub_par[dev]["inno_var"] *
-                                                             sub_par[dev]["max_cap"] * alpha) * 
-                                                            (b_bafa_hp[dev]["inno_var"] + 
-                                                             b_bafa_hp[dev]["inno_fix"]),
-                                                             name = "hp_bafa_inno_sub_ub") 
-                
-                # Linearization because of capacity[dev] * b_bafa_hp["inno_var"]
-                model.addConstr(lin_hp_sub_inno[dev] <= devs[dev]["Q_nom_max"] * 
-                                                        b_bafa_hp[dev]["inno_var"],
-                                                        name = "hp_bafa_lin_inno_1")
-                
-                model.addConstr(capacity[dev] - lin_hp_sub_inno[dev] >= 0,
-                                                name = "hp_bafa_lin_inno_2")
-                
-                model.addConstr(capacity[dev] - lin_hp_sub_inno[dev] <= (1 - b_bafa_hp[dev]["inno_var"]) * 
-                                                                        devs[dev]["Q_nom_max"],
-                                                                        name = "hp_bafa_lin_inno_3")
-                
-                #Additional program
-                #Only available if HP is "Smart-Grid-Ready"
-                #Only available if basic- or inno-program is available
-                #Only available if storage has at least 30l/kW
-                
-                model.addConstr(b_bafa_hp[dev]["add1"] <= devs[dev]["Smart_Grid"] *
-                                                          (b_bafa_hp[dev]["basic_fix"] + 
-                                                           b_bafa_hp[dev]["basic_var"] + 
-                                                           b_bafa_hp[dev]["inno_fix"] + 
-                                                           b_bafa_hp[dev]["inno_var"]),
-                                                           name = "hp_bafa_add")
-                                                          
-                #Thermal storage restriction
-                model.addConstr(capacity["tes"] * 
-                                params["rho_w"] >= sub_par[dev]["stor_restr"] * 
-                                                   lin_hp_sub_add[dev], 
-                                                   name = "hp_bafa_tes_restr_"+dev)    
-            
-                # Linearization for storage constraint
-                M = devs[dev]["Q_nom_max"]
-                
-                model.addConstr(lin_hp_sub_add[dev] <= M * b_bafa_hp[dev]["add1"],
-                                                       name = "hp_bafa_lin_add_1_"+dev) 
-            
-                model.addConstr(capacity[dev] - lin_hp_sub_add[dev] >= 0,
-                                               name = "hp_bafa_lin_add_2_"+dev)  
-            
-                model.addConstr(capacity[dev] - lin_hp_sub_add[dev] <=  M * 
-                                                  (1 - b_bafa_hp[dev]["add1"]),
-                                              name =  "hp_bafa_lin_add_3_"+dev)
-                                              
-                #Additional Building-Efficiency-Subsidy
-                M = (sub_par[dev]["basic_var"] * sub_par[dev]["max_cap"] + 
-                     sub_par[dev]["inno_var"]  * sub_par[dev]["max_cap"] * alpha) 
-                
-                model.addConstr(sub_bafa_hp[dev]["build_eff"] <= M * b_sub_restruc["kfw_eff_55"], 
-                                                                 name = dev+"_bafa_b_e_1")
-           
-                model.addConstr(sub_bafa_hp[dev]["build_eff"] <= sub_par[dev]["build_eff"] * 
-                                                                (sub_bafa_hp[dev]["inno"] + 
-                                                                 sub_bafa_hp[dev]["basic"]), 
-                                                                 name = dev+"_bafa_b_e_2")
-                
-                #Calculation of annaul subsidy value  
-                model.addConstr(subsidy[dev] == eco["crf"] * devs[dev]["rval"] *
-                                               (sub_bafa_hp[dev]["basic"] + 
-                                                sub_bafa_hp[dev]["inno"] + 
-                                                b_bafa_hp[dev]["add1"] * 
-                                                sub_par[dev]["smart_grid"]+
-                                                sub_bafa_hp[dev]["build_eff"]),
-                                                name = "hp_bafa_total_value")
-        
-        else:             
-            for dev in ("hp_air", "hp_geo"):         
-                model.addConstr(subsidy[dev] == 0)
-
-        #%% MAP-Subsidy for Pellet
-                   
-        #The "Marktanreizprogramm" MAP is a subsidy-program for Pellet heatings by BAFA
-        #The prorgam has three parts: basic, innovation and additional subsidy
-        #Further Information:
-        #http://www.bafa.de/DE/Energie/Heizen_mit_Erneuerbaren_Energien/Biomasse/biomasse_node.html
-        
-        dev = "pellet"  
-        if options["Bafa_pellet"]:            
-            
-            #It is only possible to get either basic_storage, basic_fix, 
-            #basic_var, inno_storage or inno_fix            
-            model.addConstr(x["pellet"] >= b_bafa_pellet["basic_fix"] + 
-                                           b_bafa_pellet["basic_storage"] +
-                                           b_bafa_pellet["basic_var"] + 
-                                           b_bafa_pellet["inno_fix"] +
-                                           b_bafa_pellet["inno_storage"],
-                                           name = "pellet_bafa_x_pellet")
-
-            #Capacity restriction: At least 5kW are necessary
-            model.addConstr(b_bafa_pellet["basic_fix"] + 
-                            b_bafa_pellet["basic_storage"] +
-                            b_bafa_pellet["basic_var"] + 
-                            b_bafa_pellet["inno_fix"] +
-                            b_bafa_pellet["inno_storage"] <= capacity[dev] / 
-                                                             sub_par[dev]["min_cap"],
-                                                             name = "pellet_bafa_cap_restr")   
-
-            #Thermal storage restriction: At least 30 l/kW are necessary
-            model.addConstr(capacity["tes"] * 
-                            params["rho_w"] >= sub_par[dev]["stor_restr"] * 
-                                               lin_sub_pellet["storage"], 
-                                               name = "stc_bafa_tes_restr")
-            
-            # Linearization for storage constraint
-            model.addConstr(lin_sub_pellet["storage"] <= devs[dev]["Q_nom_max"] * 
-                                                        (b_bafa_pellet["basic_storage"] + 
-                                                         b_bafa_pellet["inno_storage"]),
-                                                         name = "pellet_bafa_lin_storage_1") 
-            
-            model.addConstr(capacity[dev] >= lin_sub_pellet["storage"], 
-                                             name = "pellet_bafa_lin_storage_2")  
-            
-            model.addConstr(capacity[dev] <=lin_sub_pellet["storage"] + 
-                                            devs[dev]["Q_nom_max"] * (1 - 
-                                           (b_bafa_pellet["basic_storage"] + 
-                                            b_bafa_pellet["inno_storage"])),
-                                            name = "pellet_bafa_lin_storage_3")        
-                                                            
-            # Linearization because of capacity[dev] * b_bafa_pellet["basic_var"]
-            model.addConstr(lin_sub_pellet["basic"] <= devs[dev]["Q_nom_max"] * 
-                                                       b_bafa_pellet["basic_var"],
-                                                       name = "pellet_bafa_lin_basic_1")
-            
-            model.addConstr(capacity[dev] >= lin_sub_pellet["basic"], 
-                                             name = "pellet_bafa_lin_basic_2")
-            
-            model.addConstr(capacity[dev] <= lin_sub_pellet["basic"] + 
-                                            (1 - b_bafa_pellet["basic_var"]) *
-                                             devs[dev]["Q_nom_max"],
-                                             name = "pellet_bafa_lin_basic_3")  
-
-            #Basic-Subsidy: Just for existing buildings
-            model.addConstr(sub_bafa_pellet["basic"] <= (sub_par[dev]["basic_fix"] * 
-                                                         b_bafa_pellet["basic_fix"] +
-                                                         sub_par[dev]["basic_storage"] * 
-                                                         b_bafa_pellet["basic_storage"] +
-                                                         sub_par[dev]["basic_var"] * 
-                                                         lin_sub_pellet["basic"]) *
-                                                         alpha,
-                                                         name = "pellet_bafa_basic")
-                                                         
-            #Innovation-Subsidy
-            model.addConstr(sub_bafa_pellet["inno"] <=  devs[dev]["inno_ability"] *            
-                                                         (b_bafa_pellet["inno_fix"] *                                                         
-                                                          (sub_par["pellet"]["inno_fix_new"] + 
-                                                           sub_par["pellet"]["inno_fix_old"] * 
-                                                           alpha) +
-                                                          b_bafa_pellet["inno_storage"] *                                                         
-                                                          (sub_par["pellet"]["inno_fix_new_stor"] + 
-                                                           sub_par["pellet"]["inno_fix_old_stor"] * 
-                                                           alpha)), name = "pellet_bafa_inno")
-            
-            #Additional program
-            #STC in combination with Pellet is necessary
-            model.addConstr(x["stc"] >= b_bafa_pellet["add1"], 
-                                        name = "pellet_bafa_add_1")
-                            
-            model.addConstr(x["pellet"] >= b_bafa_pellet["add1"], 
-                                           name = "pellet_bafa_add_2")
-            
-            #Additional program only available if basic or inno program available          
-            model.addConstr(b_bafa_pellet["add1"] <= (b_bafa_pellet["basic_fix"] + 
-                                                      b_bafa_pellet["basic_storage"] +
-                                                      b_bafa_pellet["basic_var"] + 
-                                                      b_bafa_pellet["inno_fix"] +
-                                                      b_bafa_pellet["inno_storage"]),
-                                                      name = "pellet_bafa_add_3")
-           
-            #Additional Building-Efficiency-Subsidy
-            
-            M = sub_par[dev]["basic_var"] * sub_par[dev]["max_cap"]
-            
-            model.addConstr(sub_bafa_pellet["build_eff"] <= M * b_sub_restruc["kfw_eff_55"], 
-                                                            name = "pellet_bafa_b_e_1")
-           
-            model.addConstr(sub_bafa_pellet["build_eff"] <= sub_par[dev]["build_eff"] * 
-                                                           (sub_bafa_pellet["inno"] + 
-                                                            sub_bafa_pellet["basic"]), 
-                                                            name = "pellet_bafa_b_e_2")
-            
-            #Calculation of annaul subsid value      
-            model.addConstr(subsidy[dev] == eco["crf"] * devs[dev]["rval"] *
-                                            (sub_bafa_pellet["basic"] + 
-                                             sub_bafa_pellet["inno"] +                                       
-                                             b_bafa_pellet["add1"] * 
-                                             sub_par[dev]["stc_pellet_combi"]) + 
-                                             sub_bafa_pellet["build_eff"],
-                                             name = "pellet_bafa_total_value")
-        
-        else: 
-            model.addConstr(subsidy[dev] == 0)          
-                                                                                                                          
-        #%%KfW-Subsidies for individual measures
-                                                                                                                                  
-        #Subsidy is only available if chosen restruction scenario satisfies the necessary Standard 
-        M = 6
-        
-        for dev in building_components:                                                                                                         
-            model.addConstr(sum(x_restruc[dev,n] * 
-                                building["U-values"][n][dev]["U-Value"]
-                                for n in restruc_scenarios) <= sub_par["building"]["u_value"][dev] + 
-                                                               (1 - b_sub_restruc[dev]) * M)                                                                                                         
-             
-        #5000€ grant for every individual measure but max. 10% of the respective investment                                                                                                       
-        if options["kfw_single_mea"]:
-            for dev in building_components:
-                
-                grant = sub_par["building"]["grant"]["ind_mea"]
-                 
-                model.addConstr(subsidy[dev] <= eco["crf"] * shell_eco[dev]["rval"] * 
-                                                b_sub_restruc[dev] * grant * (1-MFH))   
-                
-                share_max = sub_par["building"]["share_max"]["ind_mea"]
-                
-                model.addConstr(subsidy[dev] <= c_inv[dev] * share_max)        
-
-        else:                              
-            for dev in building_components:  
-                model.addConstr(subsidy[dev] == 0)    
-
-        #%%KfW-Subsides for Efficient Buildings (KfW-Effizienzhaeuser)
-       
-        #Calculation of the Primary Energy demand in accordance with DIN 4108
-        #Just the Transmission losses are variable with regard to the restruction
-        #measures. Ventilation losses, internal and solar gains are determined 
-        #with a static method (such as for the reference building)
-        
-        #There are different heating concepts that are regaderd:       
-        model.addConstr(1 == sum(heating_concept[n] 
-                             for n in heating_concept.keys()))
-        
-        for n in heating_concept.keys():
-            model.addConstr(heating_concept[n] >= sum(ep_table[dev][n] * x[dev] +
-                                                 (1 - ep_table[dev][n]) * (1 - x[dev]) 
-                                                  for dev in ("boiler", "chp", "eh", "hp_air", 
-                                                              "hp_geo","pellet","stc")) + 
-                                                  ep_table["TVL35"][n] * b_TVL["35"] +
-                                                  (1 - ep_table["TVL35"][n]) * 
-                                                  (1 - b_TVL["35"]) - 7) 
-                                                                              
-        model.addConstr(x["boiler"] + x["eh"]  <= 1)
-        model.addConstr(x["chp"]    + x["eh"]  <= 1)
-        model.addConstr(x["chp"]    + x["stc"] <= 1)
-        model.addConstr(x["hp_air"] + x["hp_geo"] >= x["eh"])
-        model.addConstr(x["pellet"] + x["hp_geo"] + x["hp_air"] + x["chp"] <= 1)
-
-        #Linearization: Product of H_t (continuous) and heating_concept (binary)               
-        
-        M = ref_building["H_t_spec"] * 10
-        
-        total_shell = (building["dimensions"]["Area"] * 
-                       sum(building["dimensions"][n] 
-                       for n in building_components))
-        
-        for n in heating_concept.keys():                
-            model.addConstr(lin_H_t[n] / total_shell <= M * heating_concept[n])
-            model.addConstr((H_t - lin_H_t[n]) / total_shell >= 0)            
-            model.addConstr((H_t - lin_H_t[n]) / total_shell <= M * (1 - heating_concept[n]))
-
-        #Determination of the primary energy demand 
-        model.addConstr(Q_p_DIN == 1/1000 * (ref_building["f_ql"] * 
-                                             sum(ep_table["ep"][n] * lin_H_t[n] 
-                                             for n in lin_H_t.keys()) +  
-                                             ref_building["H_v"] * ref_building["f_ql"] + 
-                                             ref_building["Q_tw"] - ref_building["eta"] * 
-                                             (ref_building["Q_i"] + ref_building["Q_s"]) * 
-                                             sum(heating_concept[n] * ep_table["ep"][n] 
-                                             for n in heating_concept.keys())))
-                          
-        #There are two restrictions for subsidies for kfw-efficiency-buildings
-        #Specific transmission losses and primary energy demand have to be lower 
-        #than the respective values for an reference building
-        #The "efficiency-factor" differentiates between the different levels of
-        #kfw-efficiency buildings
-        
+        if options.get("start_library") and solution["X"] is not None:
+            start_library.log(library, options["filename_results"],
+                              len(found), found[0][0] if found else None,
+                              model._first_solution, solution["Runtime"])
+            print("")
+            print("Start library: " + str(len(found)) + " starts, first " +
+                  "incumbent after " + str(model._first_solution) + " s")
 
-        
-        M = ref_building["H_t_spec"] * 10
-        for dev in kfw_standards:
-            model.addConstr(H_t / total_shell <= 
-                            sub_par["building"]["eff_fact_H"][dev] * 
-                            ref_building["H_t_spec"] + 
-                            (1.0 - b_sub_restruc[dev]) * M) 
-                             
-        
-        M = ref_building["Q_p"] * 10    
-        
-        for dev in kfw_standards:
-            model.addConstr(Q_p_DIN <= sub_par["building"]["eff_fact_Q"][dev] * 
-                                       ref_building["Q_p"] + 
-                                       (1 - b_sub_restruc[dev]) * M)
-                                                                        
-        #Just one Subsidy-Package is available
-        model.addConstr(1 >= sum(b_sub_restruc[n] 
-                             for n in kfw_standards))
-        
-        #Either subsidies for individual measurers OR for efficiency buildings
-        for dev in building_components:
-            model.addConstr(1 >= b_sub_restruc[dev] + 
-                                 sum(b_sub_restruc[n] 
-                                 for n in kfw_standards))                                        
-               
-        if options["kfw_eff_buildings"]:
-            for dev in kfw_standards:
-                
-                grant = sub_par["building"]["grant"][dev]
-                
-                model.addConstr(subsidy[dev] <= eco["crf"] * shell_eco["Window"]["rval"] * 
-                                                b_sub_restruc[dev] * grant * (1 - MFH))
-                                                
-                model.addConstr(subsidy[dev] <= sub_par["building"]["share_max"][dev] * 
-                                                sum(c_inv[n] for n in building_components))     
-
-        else:                              
-            for dev in kfw_standards:
-                model.addConstr(subsidy[dev] == 0)                         
-        
-#%% Define Scenarios 
-        
-        model.addConstr(0.001 * emission <= max_emi)
-        model.addConstr(c_total <= max_cost)
-                
-        if options["scenario"] == "free":
-            pass
-        
-        elif options ["scenario"] == "benchmark":
-            model.addConstr(x["boiler"] == 1)    
-            model.addConstr(x["pv"] == 0)
-            for i in building_components:
-                model.addConstr(x_restruc[i,"standard"] == 1)
-        
-        elif options ["scenario"] == "s1":
-#            for i in building_components:
-#            model.addConstr(x_restruc["Window","retrofit"] == 1)
-#            model.addConstr(x_restruc["GroundFloor","retrofit"] == 1)
-#            model.addConstr(x_restruc["Rooftop","retrofit"] == 1)
-#            model.addConstr(x_restruc["OuterWall","adv_retr"] == 1)
-            model.addConstr(x["bat"] == 1)
-#            model.addConstr(x["pv"] == 1)
-#            model.addConstr(capacity["pv"] == 31.7)
-#            model.addConstr(capacity["boiler"] == 18)
-#            model.addConstr(capacity["tes"] == 0.6)
-            
-        #%% Set start values and branching priority
-        if options["load_start_vals"]:
-            with open(options["filename_start_vals"], "r") as fin:
-                for line in fin:
-                    line_split = line.replace("\"", "").split()
-                    (model.getVarByName(line_split[0])).Start = float(line_split[1])
+            binaries = {var.index: int(round(solution["X"][var.index]))
+                        for var in model.getVars() if var.VType == "B"}
+            key = _cache_key((eco, devs, clustered, params, building,
+                              ref_building, shell_eco, sub_par, ep_table,
+                              max_emi, max_cost), options)
+            start_library.store(library, key, feature, signature, binaries)
 
-        for key in x.keys():
-            x[key].BranchPriority = 100       
+        if options.get("lp_heuristic"):
+            print("")
+            if heuristic is None:
+                print("LP heuristic: no feasible solution")
+            else:
+                print("LP heuristic: objective " + str(heuristic["ObjVal"]) +
+                      " after " + str(round(heuristic["Runtime"], 1)) + " s")
+                # Benchmarks compare the total time including the heuristic
+                solution["Runtime"] += heuristic["Runtime"]
+            print("First incumbent after " + str(model._first_solution) +
+                  " s")
 
-#%% Set Parameters and start optimization
-        
-        #Set solver parameters
-        model.Params.TimeLimit = 250
-        model.Params.MIPGap = 0.02
-        model.Params.NumericFocus = 3
-        model.Params.MIPFocus = 3
-        model.Params.Aggregate = 1
+        if options.get("telemetry"):
+            model._trace.append((solution["Runtime"], "end",
+                                 solution["ObjVal"], None, solution["MIPGap"],
+                                 None))
+            _store_trace(options["filename_results"], model._trace)
+
+        if solution["X"] is None:
+            print("")
+            print("Error: No feasible solution found")
+            return
 
-        #Execute calculation
-        model.optimize()
-                        
  #%%Check feasibility
-                       
+
 #        model.computeIIS()
 #        model.write("model.ilp")
 #        print('\nConstraints:')
@@ -2099,223 +441,4316 @@ def compute(eco, devs, clustered, params, options, building, ref_building,
 #            if v.IISLB > 0 :
 #                print('Lower bound: %s' % v.VarName)
 #            elif v.IISUB > 0:
-#                print('Upper bound: %s' % v.VarName)   
+#                print('Upper bound: %s' % v.VarName)
 
 #%% Retrieve results
 
-        #Purchase        
-        res_x = {dev : x[dev].X  for dev in devs}
-        
-        # Operation
-        res_y = {}
-        for dev in ("pellet","stc","boiler","hp_geo","hp_air","eh","chp"):
-            res_y[dev] = np.array([[y[dev,d,t].X 
-                                   for t in time_steps] for d in days])
-
-        # heat and electricity output
-        res_power = {}
-        res_heat  = {}
-        res_energy = {}
-        for dev in ("boiler", "chp", "hp_air", "hp_geo", "eh", "stc", "pellet"): 
-            res_heat[dev]  = np.array([[heat[dev,d,t].X  
-                                       for t in time_steps] for d in days])
-       
-        for dev in ("hp_air", "hp_geo", "eh"):
-            res_power[dev] = np.array([[power[dev,d,t].X 
-                                       for t in time_steps] for d in days]) 
-     
-        for dev in ("boiler", "chp", "pellet"):
-            res_energy[dev] = np.array([[energy[dev,d,t].X 
-                                        for t in time_steps] for d in days])
-
-        # State of charge for storage systems
-        res_soc = {}
-        for dev in storage:
-            res_soc[dev] = np.array([[soc[dev,d,t].X 
-                                     for t in time_steps] for d in days])
-    
-        # Purchased power from the grid for either feeding a hp tariff component or a different (standard/eco tariff)
-        res_p_grid          = {}
-        res_p_grid["house"] = np.array([[p_grid["grid_house",d,t].X 
-                                        for t in time_steps] for d in days])
-    
-        res_p_grid["hp"]    = np.array([[p_grid["grid_hp",d,t].X  
-                                        for t in time_steps] for d in days])
-
-        # Charge and discharge power for storage
-        res_ch  = {}
-        res_dch = {}
-        for dev in ("bat","tes"):           
-            res_ch[dev]  = np.array([[ch[dev,d,t].X  
-                                     for t in time_steps] for d in days])
-    
-            res_dch[dev] = np.array([[dch[dev,d,t].X 
-                                     for t in time_steps] for d in days])
-
-        # Power going from an electricity offering component to the demand/the grid/a hp tariff component
-        res_p_use  = {}
-        res_p_sell = {}
-        res_p_hp   = {}
-        for dev in ("pv", "bat","chp"):
-            res_p_use[dev]  = np.array([[p_use[dev,d,t].X  
-                                        for t in time_steps] for d in days])
-    
-            res_p_sell[dev] = np.array([[p_sell[dev,d,t].X 
-                                        for t in time_steps] for d in days])
-    
-            res_p_hp[dev]   = np.array([[p_hp[dev,d,t].X  
-                                        for t in time_steps] for d in days])
-        
-        # Costs
-        res_c_inv   = {dev: c_inv[dev].X    for dev in c_inv.keys()}
-        res_c_om    = {dev: c_om[dev].X     for dev in c_om.keys()}
-        res_c_dem   = {dev: c_dem[dev].X    for dev in c_dem.keys()}
-        res_c_fix   = {dev: c_fix[dev].X    for dev in c_fix.keys()}
-        res_rev     = {dev: revenue[dev].X  for dev in revenue.keys()}
-        res_sub     = {dev: subsidy[dev].X  for dev in subsidy.keys()}
-        
-        res_c_total =   (sum(res_c_inv[key]  for key in c_inv.keys())
-                       + sum(res_c_om[key]   for key in c_om.keys())
-                       + sum(res_c_dem[key]  for key in c_dem.keys())
-                       + sum(res_c_fix[key]  for key in c_fix.keys())
-                       - sum(res_rev[key]    for key in revenue.keys())
-                       - sum(res_sub[key]    for key in subsidy.keys()))  
-                
-        res_soc_init = {}
-        for dev in storage:
-            res_soc_init[dev] = np.array([soc_init[dev,d].X for d in days])
-            
-        res_soc_nom = {dev: soc_nom[dev].X for dev in storage}
-        res_power_nom = {}
-        res_heat_nom = {}
-        for dev in heater:
-            res_heat_nom[dev] = np.array([[heat_nom[dev,d,t].X 
-                                          for t in time_steps] for d in days])
-
-        for dev in ("hp_air","hp_geo"):
-            res_power_nom[dev] = np.array([[power_nom[dev,d,t].X 
-                                           for t in time_steps] for d in days])        
-       
-        res_cap = {dev : capacity[dev].X for dev in capacity.keys()}
-        
-        res_eh_split = {}
-        for dev in ("eh_w/o_hp","eh_w/_hp"):
-            res_eh_split[dev] = np.array([[eh_split[dev,d,t].X 
-                                          for t in time_steps] for d in days])
-            
-        res_heat_mod = {}  
-        res_heat_mod[d,t] = np.array([[heat_mod[d,t].X 
-                                      for t in time_steps] for d in days])
-        
-        res_Ht = H_t.X/total_shell
-        
-        res_Qp_DIN = Q_p_DIN.X
-        
-        res_Q_Ht = {}
-        res_Q_Ht[d,t] = np.array([[Q_Ht[d,t].X for t in time_steps] for d in days])
-        
-        res_Qs = {}
-        res_Qs[d,t] = np.array([[Q_s[d,t].X for t in time_steps] for d in days])
+        results = _retrieve_results(v, data, solution)
+
+        # Reason for stopping: own termination policy or solver status
+        if getattr(model, "_termination", None):
+            results["Termination"] = model._termination
+        else:
+            results["Termination"] = solution["Status"]
+
+        # Costs of the screening mode underestimate the exact costs
+        results["Approximate"] = bool(options.get("screening"))
+        if results["Approximate"]:
+            print("")
+            print("Screening: approximate costs with relaxed on/off decisions")
 
-        res_x_restruc = {}
-        for n in restruc_scenarios:
-            for dev in building_components:
-                res_x_restruc[dev,n] = x_restruc[dev,n].X 
-            
-        res_heating_concept = {}
-        res_lin_Ht = {}
-        for n in heating_concept.keys():
-            res_heating_concept[n] = heating_concept[n].X
-            
-        for n in heating_concept.keys():    
-            res_lin_Ht[n] = lin_H_t[n].X
-              
-        res_b_sub_restruc   = {dev : b_sub_restruc[dev].X 
-                               for dev in b_sub_restruc.keys()}
-        
-        
-        res_heating_concept = {n : heating_concept[n].X 
-                               for n in heating_concept.keys()}
-        
-        res_sub_chp = {n: sub[n].X for n in sub.keys()}
-        
-        res_b_pv_power = {i: b_pv_power[i].X for i in ("kfw", "eeg")}
-        res_lin_pv_power = {i: lin_pv_power[i].X for i in ("kfw", "eeg")}
-        
-        res_p_chp_total = {}
-        for n in p_chp_total.keys():
-            res_p_chp_total[n] = p_chp_total[n].X
-                    
-        res_lin_kwkg_1={}
-        res_lin_kwkg_2={}
-        res_b_kwkg={}
-        for n in b_kwkg.keys():
-            res_lin_kwkg_2[n] = lin_kwkg_2[n].X
-            res_lin_kwkg_1[n] = lin_kwkg_1[n].X
-            res_b_kwkg[n] = b_kwkg[n].X
-       
-        res_sub_kwkg_temp = sub_kwkg_temp.X
-        
-        # Emissions 
-#        res_emission_max = max_emi
-        res_emission = emission.X / 1000
-        
         if options["store_start_vals"]:
             with open(options["filename_start_vals"], "w") as fout:
                 for var in model.getVars():
                     if var.VType == "B":
-                        fout.write(var.VarName + "\t" + str(int(var.X)) + "\n")
-
-        # Save results 
-        with open(options["filename_results"], "wb") as fout:
-            pickle.dump(res_x, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_y, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_power, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_heat, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_energy, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_p_grid, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_soc, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_soc_init, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_ch, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_dch, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_p_use, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_p_sell, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_p_hp, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_c_inv, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_c_om, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_c_dem, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_c_fix, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_c_total, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_rev, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_sub, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_emission, fout, pickle.HIGHEST_PROTOCOL)  
-            pickle.dump(model.ObjVal, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(model.Runtime, fout, pickle.HIGHEST_PROTOCOL)  
-            pickle.dump(model.MIPGap, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_soc_nom, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_power_nom, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_heat_nom, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_cap, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_heat_mod, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_b_sub_restruc, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_x_restruc, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_Ht, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_Qs, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_Qp_DIN, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_heating_concept, fout, pickle.HIGHEST_PROTOCOL)
-            pickle.dump(res_lin_Ht, fout, pickle.HIGHEST_PROTOCOL)         
-            pickle.dump(res_sub_chp, fout, pickle.HIGHEST_PROTOCOL)         
-            pickle.dump(res_b_pv_power, fout, pickle.HIGHEST_PROTOCOL)         
-            pickle.dump(res_lin_pv_power, fout, pickle.HIGHEST_PROTOCOL)    
-            pickle.dump(res_p_chp_total, fout, pickle.HIGHEST_PROTOCOL)      
-            pickle.dump(res_lin_kwkg_2, fout, pickle.HIGHEST_PROTOCOL)         
-            pickle.dump(res_lin_kwkg_1, fout, pickle.HIGHEST_PROTOCOL)    
-            pickle.dump(res_b_kwkg, fout, pickle.HIGHEST_PROTOCOL)      
-            pickle.dump(res_sub_kwkg_temp, fout, pickle.HIGHEST_PROTOCOL)      
+                        if data["use_names"]:
+                            key = var.VarName
+                        else:
+                            key = str(var.index)
+                        value = int(round(solution["X"][var.index]))
+                        fout.write(key + "\t" + str(value) + "\n")
+
+        # Save results
+        _store_results(options["filename_results"], results)
+
+        if solution.get("Pool"):
+            designs = _distinct_designs(v, data, solution["Pool"],
+                                        options["solution_pool"])
+            _store_pool(options["filename_results"], designs)
+            print_designs(designs)
+
+        if profile is not None:
+            profile.insert(0, {"block" : "data", "time" : time_data})
+            profile.append({"block" : "total",
+                            "time" : sum(e["time"] for e in profile),
+                            "vars" : model.NumVars,
+                            "bins" : model.NumBinVars,
+                            "constrs" : model.NumConstrs,
+                            "genconstrs" : model.NumGenConstrs,
+                            "sos" : model.NumSOS,
+                            "nonzeros" : model.NumNZs,
+                            "ranges" : _coefficient_ranges(model),
+                            "solve_time" : solution["Runtime"],
+                            "lazy_pool" : len(v.get("lazy", [])),
+                            "lazy_added" : len(getattr(model, "_lazy_added",
+                                                       ()))})
+            _store_profile(options["filename_results"], profile)
 
         # Return results
-        return(res_c_total, res_emission)
+        return(results["res_c_total"], results["res_emission"])
 
     except gp.GurobiError as e:
-        print("")        
-        print("Error: "+e.message)
\ No newline at end of file
+        print("")
+        print("Error: "+e.message)
+
+    finally:
+        # Free the model as soon as the results are stored, the environment
+        # is kept for the next model of the worker
+        if model is not None:
+            model.dispose()
+
+#%% Solver parameters
+
+# Options that need Gurobi callbacks or MIP starts
+_GUROBI_OPTIONS = ("telemetry", "termination", "start_library",
+                   "design_start", "solution_pool", "lp_heuristic")
+
+# Options that need a single solve: the processes of a portfolio solve the
+# model without callbacks and relax-and-fix replaces the solve
+_SINGLE_SOLVE_OPTIONS = ("telemetry", "termination", "start_library",
+                         "relax_and_fix")
+
+def _check_backend(options):
+    """
+    Reject options that would silently be ignored by other backends or by
+    a portfolio solve.
+    """
+    if options.get("portfolio"):
+        for key in _SINGLE_SOLVE_OPTIONS:
+            if options.get(key):
+                raise ValueError("The option " + key + " cannot be "
+                                 "combined with portfolio")
+
+    backend = options.get("backend", "gurobi")
+    if backend == "gurobi":
+        return
+
+    for key in _GUROBI_OPTIONS:
+        if options.get(key):
+            raise ValueError("The option " + key + " needs the Gurobi "
+                             "backend, not " + str(backend))
+
+# Named solver profiles (option solver_profile). The production profile
+# takes time limit and MIP gap from params (economics.xlsx).
+solver_profiles = {"screening"  : {"TimeLimit" : 30,
+                                   "MIPGap" : 0.05,
+                                   "MIPFocus" : 1},
+                   "production" : {"MIPFocus" : 3,
+                                   "Aggregate" : 1},
+                   "exact"      : {"MIPGap" : 0,
+                                   "NumericFocus" : 3}}
+
+def _solver_parameters(params, options):
+    """
+    Gurobi parameters of the chosen solver profile, overridden by the
+    parameters in options["solver_params"].
+    """
+    profile = options.get("solver_profile", "production")
+
+    parameters = {}
+    if profile == "production":
+        parameters["TimeLimit"] = params["time_limit"]
+        parameters["MIPGap"] = params["mip_gap"]
+    parameters.update(solver_profiles[profile])
+
+    # The scaled model is solved with the default numerics
+    if not options.get("scaling", True):
+        parameters["NumericFocus"] = 3
+
+    parameters.update(options.get("solver_params", {}))
+
+    return parameters
+
+def _set_solver_parameters(model, params, options):
+    """
+    Apply the solver profile and - if given - a parameter file, e.g. the
+    result of run_tuning (option filename_params).
+    """
+    for (name, value) in _solver_parameters(params, options).items():
+        model.setParam(name, value)
+
+    if options.get("filename_params"):
+        model.read(options["filename_params"])
+
+def _termination_policy(options):
+    """
+    Termination policy of the option termination, completed with the
+    defaults: improvement of 0.1 % within 30 s, gap trend on.
+    """
+    policy = {"improvement" : 0.001,
+              "window" : 30,
+              "gap_trend" : True}
+    if isinstance(options["termination"], dict):
+        policy.update(options["termination"])
+
+    return policy
+
+def _portfolio(options):
+    """
+    Configurations of the portfolio: all of solver_backends.portfolio
+    (option portfolio = True), a list of their names or a dict of own
+    configurations.
+    """
+    if isinstance(options["portfolio"], dict):
+        return options["portfolio"]
+    elif isinstance(options["portfolio"], (list, tuple)):
+        return {name: solver_backends.portfolio[name]
+                for name in options["portfolio"]}
+    else:
+        return solver_backends.portfolio
+
+def _log_portfolio(filename_results, winner, solution):
+    """
+    Print the winning configuration and append it to portfolio_log.csv in
+    the directory of the results.
+    """
+    print("")
+    print("Portfolio winner: " + str(winner))
+
+    filename = os.path.join(os.path.dirname(filename_results),
+                            "portfolio_log.csv")
+    with open(filename, "a") as fout:
+        fout.write("\t".join((filename_results, str(winner),
+                              str(solution["Runtime"]),
+                              str(solution["MIPGap"]),
+                              str(solution["ObjVal"]))) + "\n")
+
+def build_model(eco, devs, clustered, params, options, building, ref_building,
+                shell_eco, sub_par, ep_table, max_emi, max_cost):
+    """
+    Build the model of compute with its solver parameters, without solving
+    it (e.g. for tuning). The caller disposes the model.
+    """
+    data = _prepare_data(eco, devs, clustered, params, options, building,
+                         ref_building, shell_eco, sub_par, ep_table,
+                         max_emi, max_cost)
+    (model, v, profile) = _build_model(data, options)
+
+    _set_solver_parameters(model, params, options)
+
+    return model
+
+def evaluate_design(design, eco, devs, clustered, params, options, building,
+                    ref_building, shell_eco, sub_par, ep_table,
+                    max_emi=99999, max_cost=99999):
+    """
+    Price a given design. Devices, capacities and restructuring measures are
+    fixed through their bounds, only operation and subsidy eligibility are
+    optimized. With the option model_cache, the model of a building is
+    built once for all designs. The model is built without the demand-based
+    bounds (option tight_bounds), they only hold for optimal designs.
+
+    Parameters
+    ----------
+    design : dict
+        - x : devices {dev : 0 or 1}
+        - capacity : capacities {dev : value}
+        - x_restruc : restructuring measures {(component, scenario) : 0 or 1}
+        Missing entries are optimized (see python.read_basic.read_design).
+    eco, devs, clustered, params, options, ... : see compute
+
+    Returns
+    -------
+    results : dict
+        Results as stored by compute, None if the design is infeasible
+    """
+    options = dict(options, tight_bounds=False)
+
+    data = _prepare_data(eco, devs, clustered, params, options, building,
+                         ref_building, shell_eco, sub_par, ep_table,
+                         max_emi, max_cost)
+
+    model = None
+    try:
+        (model, v, profile) = _cached_model(data, (eco, devs, clustered,
+                                                   params, building,
+                                                   ref_building, shell_eco,
+                                                   sub_par, ep_table, max_emi,
+                                                   max_cost), options)
+        _set_solver_parameters(model, params, options)
+        solution = _solve_fixed(model, v, design,
+                                options.get("backend", "gurobi"))
+
+        if solution["X"] is None:
+            print("")
+            print("Error: The design is infeasible (" +
+                  solution["Status"] + ")")
+            return None
+
+        results = _retrieve_results(v, data, solution)
+        results["Termination"] = solution["Status"]
+        results["Approximate"] = False
+
+        return results
+
+    finally:
+        if model is not None:
+            model.dispose()
+
+def _fix_design(model, v, design):
+    """
+    Fix the variables of the design (see evaluate_design) through their
+    bounds. Returns the previous bounds {variable : (lb, ub)}.
+    """
+    fixed = {}
+    for group in ("x", "x_restruc"):
+        for (key, value) in design.get(group, {}).items():
+            fixed[v[group][key]] = int(round(value))
+
+    for (dev, value) in design.get("capacity", {}).items():
+        fixed[v["capacity"][dev]] = value
+
+    previous = {}
+    for (var, value) in fixed.items():
+        previous[var] = (var.LB, var.UB)
+        var.LB = value
+        var.UB = value
+
+    model.update()
+
+    return previous
+
+def _solve_fixed(model, v, design, backend, relax=False):
+    """
+    Solve the model with the design fixed (or its LP relaxation) and
+    restore the bounds afterwards, so that the model can be reused for the
+    next design. The bounds of the lazy pool are added for the solve.
+    """
+    previous = _fix_design(model, v, design)
+    # The design is solved without the lazy callback
+    pool = _add_lazy_pool(model, v)
+    try:
+        if relax:
+            relaxed = model.relax()
+            try:
+                solution = solver_backends.solve(relaxed, backend)
+            finally:
+                relaxed.dispose()
+        else:
+            model.reset()
+            solution = solver_backends.solve(model, backend)
+    finally:
+        for (var, (lb, ub)) in previous.items():
+            var.LB = lb
+            var.UB = ub
+        for constr in pool:
+            model.remove(constr)
+        model.update()
+
+    return solution
+
+#%% Decomposition over shell and heating system
+
+# Heaters whose combinations are enumerated by decompose
+_TOPOLOGY_HEATERS = ("boiler", "pellet", "chp", "eh", "hp_air", "hp_geo")
+
+def _heater_topologies():
+    """
+    Combinations of heaters that satisfy the exclusions of _build_devices.
+    """
+    topologies = []
+    for values in itertools.product((0, 1), repeat=len(_TOPOLOGY_HEATERS)):
+        x = dict(zip(_TOPOLOGY_HEATERS, values))
+        if (x["boiler"] + x["eh"] <= 1 and
+            x["chp"] + x["eh"] <= 1 and
+            x["hp_air"] + x["hp_geo"] >= x["eh"] and
+            x["pellet"] + x["hp_geo"] + x["hp_air"] + x["chp"] <= 1):
+            topologies.append(x)
+
+    return topologies
+
+def _shell_transmission(data, shell):
+    """
+    Transmission coefficient H_t of a shell combination {component :
+    scenario} (closed form of the constraint in _build_shell).
+    """
+    building = data["building"]
+    Fx       = data["Fx"]
+
+    return building["dimensions"]["Area"] * (
+           sum(building["dimensions"][dev] * Fx[dev] *
+               building["U-values"][shell[dev]][dev]["U-Value"]
+               for dev in data["building_components"]) +
+           0.05 * sum(building["dimensions"][dev]
+                      for dev in data["building_components"]))
+
+def _enumerate_designs(data, options):
+    """
+    Fixed-topology subproblems (designs with x of the heaters and x_restruc)
+    and the number of combinations that are pruned analytically:
+        - shell combinations with individual measures above the U-values of
+          the reference building need b_ind_mea and thus the reference H_t
+        - heater combinations whose maximum capacity is below the design
+          heat load of the shell combination
+    """
+    building     = data["building"]
+    ref_building = data["ref_building"]
+    devs         = data["devs"]
+    clustered    = data["clustered"]
+    components   = data["building_components"]
+    scenarios    = data["restruc_scenarios"]
+
+    delta_temp = clustered["temp_indoor"] - clustered["temp_design"]
+    H_vent = 0.5 * 0.34 * (building["dimensions"]["Volume"] *
+                           building["dimensions"]["Area"])
+
+    topologies = _heater_topologies()
+    capacities = [sum(x[dev] * devs[dev]["Q_nom_max"]
+                      for dev in ("boiler", "chp", "eh")) +
+                  sum(x[dev] * devs[dev]["Q_nom_max"] * devs[dev]["cop_a2w55"]
+                      for dev in ("hp_air", "hp_geo"))
+                  for x in topologies]
+
+    designs = []
+    pruned = {"enev" : 0, "design_heat_load" : 0}
+    for choice in itertools.product(scenarios, repeat=len(components)):
+        shell = dict(zip(components, choice))
+        H_t = _shell_transmission(data, shell)
+
+        individual = all(shell[dev] == "standard" or
+                         building["U-values"][shell[dev]][dev]["U-Value"] <=
+                         ref_building["U-values"][dev]
+                         for dev in components)
+        if (not individual and
+            H_t / data["total_shell"] > ref_building["H_t_spec"]):
+            pruned["enev"] += len(topologies)
+            continue
+
+        x_restruc = {(dev, n): int(shell[dev] == n)
+                     for dev in components for n in scenarios}
+
+        dsh = (H_t + H_vent) * delta_temp / 1000
+        for (x, capacity) in zip(topologies, capacities):
+            if options["Design_heat_load"] and capacity < dsh:
+                pruned["design_heat_load"] += 1
+                continue
+            designs.append({"x" : x, "x_restruc" : x_restruc})
+
+    return (designs, pruned)
+
+# Model of a decomposition worker process, built once per process
+_worker = {}
+
+def _init_worker(inputs, options):
+    (eco, devs, clustered, params, building, ref_building, shell_eco,
+     sub_par, ep_table, max_emi, max_cost) = inputs
+    data = _prepare_data(eco, devs, clustered, params, options, building,
+                         ref_building, shell_eco, sub_par, ep_table,
+                         max_emi, max_cost)
+    (model, v, profile) = _cached_model(data, inputs, options)
+
+    _set_solver_parameters(model, params, options)
+    # One thread per process, the processes share the cores
+    if "Threads" not in options.get("solver_params", {}):
+        model.Params.Threads = 1
+
+    _worker.update({"data" : data,
+                    "model" : model,
+                    "v" : v,
+                    "backend" : options.get("backend", "gurobi")})
+
+def _solve_subproblem(arguments):
+    (design, relax) = arguments
+    solution = _solve_fixed(_worker["model"], _worker["v"], design,
+                            _worker["backend"], relax)
+    if relax:
+        # The LP optimum is the bound, only the bound is passed back
+        solution["X"] = None
+        if solution["ObjVal"] is not None:
+            solution["MIPGap"] = 0.0
+    return solution
+
+def _subproblem_results(solution):
+    return _retrieve_results(_worker["v"], _worker["data"], solution)
+
+def _lower_bound(solution):
+    """
+    Lower bound of a subproblem from its solution: infinite if infeasible,
+    None if unknown.
+    """
+    if solution["Status"] == "infeasible":
+        return gp.GRB.INFINITY
+    elif solution["X"] is None and solution["ObjVal"] is None:
+        return None
+    elif solution["MIPGap"] is None:
+        return None
+    return solution["ObjVal"] - solution["MIPGap"] * abs(solution["ObjVal"])
+
+def decompose(eco, devs, clustered, params, options, building, ref_building,
+              shell_eco, sub_par, ep_table, max_emi=99999, max_cost=99999,
+              processes=None):
+    """
+    Solve compute by enumeration of the shell combinations and heater
+    combinations. Combinations are pruned analytically (see
+    _enumerate_designs), the LP relaxations of all remaining subproblems are
+    solved in a process pool and the subproblems are then solved in the
+    order of their bounds, in batches of one subproblem per process.
+    Subproblems whose bound is not below the incumbent are pruned.
+
+    The processes are spawned, so the calling script needs an
+    if __name__ == "__main__" guard. The results are stored as by compute.
+
+    Returns
+    -------
+    results : dict
+        Results of the best design (None if no design is feasible)
+    certificate : dict
+        - ObjVal : objective of the best design
+        - bound : lower bound over all subproblems
+        - gap : relative gap between both
+        - subproblems, solved, pruned_by_bound, infeasible : counts
+        - pruned_analytically : counts per reason
+    """
+    inputs = (eco, devs, clustered, params, building, ref_building,
+              shell_eco, sub_par, ep_table, max_emi, max_cost)
+    data = _prepare_data(eco, devs, clustered, params, options, building,
+                         ref_building, shell_eco, sub_par, ep_table,
+                         max_emi, max_cost)
+    (designs, pruned) = _enumerate_designs(data, options)
+
+    # Environments cannot be passed on to other processes. The subproblems
+    # are solved without the lazy callback, so all bounds are built directly.
+    worker_options = {key: value for (key, value) in options.items()
+                      if key not in ("env", "lazy_bounds")}
+
+    processes = processes or multiprocessing.cpu_count()
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(processes, initializer=_init_worker,
+                        initargs=(inputs, worker_options))
+    try:
+        relaxations = pool.map(_solve_subproblem,
+                               [(design, True) for design in designs])
+        bounds = [_lower_bound(solution) for solution in relaxations]
+
+        order = sorted((i for i in range(len(designs))
+                        if bounds[i] is None or bounds[i] < gp.GRB.INFINITY),
+                       key=lambda i: -gp.GRB.INFINITY if bounds[i] is None
+                                     else bounds[i])
+        infeasible = len(designs) - len(order)
+
+        best = None
+        solved = 0
+        for start in range(0, len(order), processes):
+            batch = [i for i in order[start:start + processes]
+                     if best is None or bounds[i] is None or
+                     bounds[i] < best[1]["ObjVal"]]
+            if not batch:
+                break
+            solutions = pool.map(_solve_subproblem,
+                                 [(designs[i], False) for i in batch])
+            solved += len(batch)
+            for (i, solution) in zip(batch, solutions):
+                bound = _lower_bound(solution)
+                if bound is not None and (bounds[i] is None or
+                                          bound > bounds[i]):
+                    bounds[i] = bound
+                if solution["Status"] == "infeasible":
+                    infeasible += 1
+                if solution["X"] is not None and (best is None or
+                        solution["ObjVal"] < best[1]["ObjVal"]):
+                    best = (i, solution)
+
+        results = None
+        if best is not None:
+            results = pool.apply(_subproblem_results, (best[1],))
+    finally:
+        pool.close()
+        pool.join()
+
+    known = [bound for bound in bounds if bound is not None]
+    bound = (min(known) if len(known) == len(bounds) and known
+             else None)
+    certificate = {"ObjVal" : best[1]["ObjVal"] if best else None,
+                   "bound" : bound,
+                   "gap" : None,
+                   "subproblems" : len(designs) + sum(pruned.values()),
+                   "solved" : solved,
+                   "pruned_by_bound" : len(order) - solved,
+                   "infeasible" : infeasible,
+                   "pruned_analytically" : pruned}
+    if best is not None and bound is not None:
+        certificate["gap"] = ((best[1]["ObjVal"] - min(bound, best[1]["ObjVal"]))
+                              / abs(best[1]["ObjVal"]))
+
+    print("")
+    print("Decomposition: " + str(certificate["subproblems"]) +
+          " subproblems, " + str(sum(pruned.values())) +
+          " pruned analytically, " + str(certificate["pruned_by_bound"]) +
+          " by bound, " + str(infeasible) + " infeasible, " + str(solved) +
+          " solved")
+    print("Objective " + str(certificate["ObjVal"]) + ", bound " +
+          str(certificate["bound"]) + ", gap " + str(certificate["gap"]))
+
+    if results is not None:
+        results["Termination"] = "decomposition"
+        results["Approximate"] = False
+        _store_results(options["filename_results"], results)
+
+    return (results, certificate)
+
+#%% Scaling diagnostics
+
+def _coefficient_ranges(model):
+    """
+    Smallest and largest absolute nonzero values of the constraint matrix,
+    the objective, the finite bounds and the right hand sides.
+    """
+    A = model.getA()
+    obj = model.getAttr("Obj", model.getVars())
+    lb = model.getAttr("LB", model.getVars())
+    ub = model.getAttr("UB", model.getVars())
+    rhs = model.getAttr("RHS", model.getConstrs())
+
+    values = {"matrix" : np.abs(A.data),
+              "objective" : np.abs(obj),
+              "bounds" : np.abs(np.concatenate((lb, ub))),
+              "rhs" : np.abs(rhs)}
+
+    ranges = {}
+    for (key, val) in values.items():
+        val = val[(val > 0) & (val < gp.GRB.INFINITY)]
+        if len(val) > 0:
+            ranges[key] = (np.min(val), np.max(val))
+        else:
+            ranges[key] = (0, 0)
+
+    return ranges
+
+def scaling_report(eco, devs, clustered, params, options, building,
+                   ref_building, shell_eco, sub_par, ep_table, max_emi,
+                   max_cost):
+    """
+    Build the model without and with the scaling layer and print the
+    coefficient ranges of both. The model is not solved.
+
+    Returns
+    -------
+    report : dict
+        - False / True : coefficient ranges without / with scaling
+    """
+    report = {}
+    for scaling in (False, True):
+        opts = dict(options)
+        opts["scaling"] = scaling
+
+        data = _prepare_data(eco, devs, clustered, params, opts, building,
+                             ref_building, shell_eco, sub_par, ep_table,
+                             max_emi, max_cost)
+        (model, v, profile) = _build_model(data, opts)
+
+        report[scaling] = _coefficient_ranges(model)
+        model.dispose()
+
+    print("")
+    print("Range".ljust(12) + "unscaled".rjust(24) + "scaled".rjust(24))
+    for key in ("matrix", "objective", "bounds", "rhs"):
+        print(key.ljust(12) +
+              ("[%.0e, %.0e]" % report[False][key]).rjust(24) +
+              ("[%.0e, %.0e]" % report[True][key]).rjust(24))
+
+    return report
+
+#%% Model cache
+
+# Options that do not change the structure or the data of the model
+_CACHE_IGNORE = ("filename_results", "filename_start_vals", "filename_lp",
+                 "store_start_vals", "load_start_vals", "model_cache",
+                 "modifications", "profile", "env", "start_library",
+                 "start_number", "design_start", "screening", "telemetry",
+                 "termination", "solver_profile", "solver_params",
+                 "filename_params", "portfolio", "backend", "solution_pool",
+                 "lp_heuristic", "relax_and_fix", "multi_fidelity")
+
+def _cache_key(inputs, options):
+    """
+    Hash of all inputs and options from which the model is built.
+    """
+    relevant = [(key, options[key]) for key in sorted(options.keys())
+                if key not in _CACHE_IGNORE]
+    # Backend and portfolio decide whether the lazy pool is used
+    relevant.append(("lazy_pool", _lazy_bounds(options)))
+
+    return hashlib.sha1(pickle.dumps((inputs, relevant), 2)).hexdigest()
+
+def _encode(item):
+    """
+    Replace the variables and expressions in the dictionary of variables
+    by the indices of the variables in the model.
+    """
+    if isinstance(item, gp.Var):
+        return ("var", item.index)
+    elif isinstance(item, gp.LinExpr):
+        return ("expr", [(item.getCoeff(i), item.getVar(i).index)
+                         for i in range(item.size())], item.getConstant())
+    elif isinstance(item, dict):
+        return ("dict", [(key, _encode(val)) for (key, val) in item.items()])
+    elif isinstance(item, list):
+        return ("list", [_encode(val) for val in item])
+    elif isinstance(item, tuple):
+        return ("tuple", [_encode(val) for val in item])
+    else:
+        return ("value", item)
+
+def _decode(item, variables):
+    """
+    Inverse of _encode for the variables of the reloaded model.
+    """
+    (kind, content) = item[:2]
+    if kind == "var":
+        return variables[content]
+    elif kind == "expr":
+        return gp.LinExpr([coef for (coef, i) in content],
+                          [variables[i] for (coef, i) in content]) + item[2]
+    elif kind == "dict":
+        return {key: _decode(val, variables) for (key, val) in content}
+    elif kind == "list":
+        return [_decode(val, variables) for val in content]
+    elif kind == "tuple":
+        return tuple(_decode(val, variables) for val in content)
+    else:
+        return content
+
+def _store_cached_model(directory, key, model, v):
+    """
+    Write the model as MPS file and the index map of its variables.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    # Parallel workers may store the same model: write to temporary files
+    # and replace atomically (Gurobi derives the format from the extension)
+    path = os.path.join(directory, key)
+    temp = path + "." + str(os.getpid()) + ".tmp"
+    model.write(temp + ".mps")
+    with open(temp + ".pkl", "wb") as fout:
+        pickle.dump(_encode(v), fout, pickle.HIGHEST_PROTOCOL)
+
+    os.replace(temp + ".mps", path + ".mps")
+    os.replace(temp + ".pkl", path + ".pkl")
+
+def _load_cached_model(directory, key, env=None):
+    """
+    Read a cached model with Gurobi's MPS reader. Returns None if the model
+    is not in the cache.
+    """
+    path = os.path.join(directory, key)
+    if not (os.path.isfile(path + ".mps") and os.path.isfile(path + ".pkl")):
+        return None
+
+    if env is None:
+        model = gp.read(path + ".mps")
+    else:
+        model = gp.read(path + ".mps", env=env)
+    with open(path + ".pkl", "rb") as fin:
+        v = _decode(pickle.load(fin), model.getVars())
+
+    return (model, v)
+
+def _cached_model(data, inputs, options):
+    """
+    Reload the model from the model cache (option model_cache) or build it
+    and store it in the cache. Reloaded models have no build profile.
+    """
+    if not options.get("model_cache"):
+        return _build_model(data, options)
+
+    key = _cache_key(inputs, options)
+    cached = _load_cached_model(options["model_cache"], key, options.get("env"))
+    if cached is not None:
+        return cached + (None,)
+
+    (model, v, profile) = _build_model(data, options)
+    _store_cached_model(options["model_cache"], key, model, v)
+
+    return (model, v, profile)
+
+def _apply_modifications(model, v, modifications):
+    """
+    Change bounds and objective coefficients of variables and right hand
+    sides of constraints (see option modifications of compute).
+    """
+    for attr in ("lb", "ub", "obj"):
+        for (path, value) in modifications.get(attr, {}).items():
+            if isinstance(path, tuple):
+                var = v[path[0]][path[1]]
+            else:
+                var = v[path]
+            var.setAttr(attr, value)
+
+    constraints = model.getConstrs()
+    for (name, value) in modifications.get("rhs", {}).items():
+        if isinstance(name, int):
+            constr = constraints[name]
+        else:
+            constr = model.getConstrByName(name)
+        constr.RHS = value
+
+    model.update()
+
+#%% Model data
+
+def _prepare_data(eco, devs, clustered, params, options, building,
+                  ref_building, shell_eco, sub_par, ep_table,
+                  max_emi, max_cost):
+    """
+    Collect all inputs, subsets and derived parameters that are shared by the
+    model blocks in one dictionary.
+    """
+    data = {"eco"          : eco,
+            "devs"         : devs,
+            "clustered"    : clustered,
+            "params"       : params,
+            "building"     : building,
+            "ref_building" : ref_building,
+            "shell_eco"    : shell_eco,
+            "sub_par"      : sub_par,
+            "ep_table"     : ep_table,
+            "max_emi"      : max_emi,
+            "max_cost"     : max_cost}
+
+    # Extract parameters
+    data["dt"]         = params["dt"]
+    data["time_steps"] = range(params["time_steps"])
+    data["days"]       = range(params["days"])
+
+    # Define subsets
+    data["heater"]  = ("boiler", "chp", "eh", "hp_air", "hp_geo","pellet")
+    data["storage"] = ("bat", "tes")
+    data["solar"]   = ("pv", "stc")
+
+    data["subsidy_devs"] = ("chp", "bat", "hp_air", "hp_geo", "stc", "pellet", "pv")
+
+    data["building_components"] = ("Window","OuterWall","GroundFloor","Rooftop")
+
+    data["restruc_scenarios"]   = ("standard", "retrofit", "adv_retr")
+
+    data["kfw_standards"]       = ("kfw_eff_55","kfw_eff_70","kfw_eff_85",
+                                   "kfw_eff_100","kfw_eff_115")
+
+    # Maximal for solar collectors and pv useable Rooftoparea
+    data["A_max"] = (building["usable_roof"] *
+                     building["dimensions"]["Area"] *
+                     building["dimensions"]["Rooftop"])
+
+    # Total area of the building shell
+    data["total_shell"] = (building["dimensions"]["Area"] *
+                           sum(building["dimensions"][n]
+                           for n in data["building_components"]))
+
+    #Correction factors for components that have no contact with the ambient air
+    data["Fx"] = {"Window"      : 1,
+                  "OuterWall"   : 1,
+                  "GroundFloor" : 0.6,
+                  "Rooftop"     : 1}
+
+    # Range of the transmission coefficient H_t over all shell combinations
+    data["H_t_range"] = _transmission_range(data)
+
+    #Ventilation Losses
+    vol = 0.76 * building["dimensions"]["Area"] * building["dimensions"]["Volume"]
+    ro_cp = 0.34 #Wh/m³K
+    n = 0.7 #1/h
+
+    H_v = ro_cp * n * vol
+
+    # Total heating losses
+    G_t = 3380 #Kd - Gradtagzahl
+    f_na = 0.95 #Parameter for switching off the heater in the night
+    f_ql = 0.024 * G_t * f_na
+
+    data["Q_l"] =  H_v * f_ql / 8760 #kWh
+
+    # Differentiation between old and new buildings because of different
+    # regulations in the "Marktanreizprogramm" for HP and STC
+    if options["New_Building"]:
+        data["alpha"] = 0
+    else:
+        data["alpha"] = 1
+
+    # Differentiation between SFH and MFH because of different
+    # regulations in the "Marktanreizprogramm" STC
+    if options["MFH"]:
+        data["MFH"] = 1
+    else:
+        data["MFH"] = 0
+
+    # Names for variables and constraints are only generated if they are
+    # needed (debugging, LP files or name-based start values).
+    data["use_names"] = _use_names(options)
+    data["nm"] = _namer(data["use_names"])
+
+    # Unit factors of the scaling layer: annual energy flows in MWh and
+    # undiscounted KWKG payments in k€ instead of kWh and €
+    if options.get("scaling", True):
+        data["scale"] = {"energy": 0.001, "payment": 0.001}
+    else:
+        data["scale"] = {"energy": 1, "payment": 1}
+
+    # Big-M values of the linearizations and indicator constraints
+    if options.get("tight_big_m", True):
+        data["M"] = _big_m(data)
+    else:
+        data["M"] = _big_m_constant(data)
+
+    # Bounds derived from the demands
+    if options.get("tight_bounds", True):
+        data["bounds"] = _demand_bounds(data, options)
+    else:
+        data["bounds"] = None
+
+    return data
+
+def _transmission_range(data):
+    """
+    Smallest and largest transmission coefficient H_t that can be reached by
+    combining the restructuring scenarios of the building components.
+    """
+    building = data["building"]
+    Fx       = data["Fx"]
+
+    def H_t(choose):
+        return building["dimensions"]["Area"] * (
+               sum(building["dimensions"][dev] * Fx[dev] *
+                   choose(building["U-values"][n][dev]["U-Value"]
+                          for n in data["restruc_scenarios"])
+                   for dev in data["building_components"]) +
+               0.05 * sum(building["dimensions"][dev]
+                          for dev in data["building_components"]))
+
+    return (H_t(min), H_t(max))
+
+def _big_m_constant(data):
+    """
+    Constant big-M values as used before they were derived from the inputs.
+    Only kept to benchmark the tightened model against the former one.
+    """
+    ref_building = data["ref_building"]
+    sub_par      = data["sub_par"]
+
+    M = {}
+    M["H_t_ind"] = ref_building["H_t_spec"] * 10
+    M["Q_p_ind"] = ref_building["Q_p"] * 10
+    M["U_ind"]   = {dev: 6 for dev in data["building_components"]}
+    M["lin_H_t"] = ref_building["H_t_spec"] * 10
+    M["H_t_kfw"] = {n: ref_building["H_t_spec"] * 10 for n in data["kfw_standards"]}
+    M["Q_p_kfw"] = {n: ref_building["Q_p"] * 10 for n in data["kfw_standards"]}
+    M["scop"]    = {(dev,n): 10000 for dev in ("hp_air", "hp_geo")
+                                   for n in ("basic", "inno")}
+    M["kwkg_cap"] = 50 #kWh
+    M["kwkg_sub"] = 50 * 8760 * sub_par["kwkg"]["sell_50"] #€
+
+    return M
+
+def _big_m(data):
+    """
+    Derive the big-M values from the bounds that are given by the inputs:
+    The U-values of all restructuring scenarios bound the transmission
+    coefficient and the primary energy demand, the catalog sizes of heat
+    pumps and CHP bound their annual energy flows.
+    """
+    devs                = data["devs"]
+    clustered           = data["clustered"]
+    building            = data["building"]
+    ref_building        = data["ref_building"]
+    sub_par             = data["sub_par"]
+    ep_table            = data["ep_table"]
+    dt                  = data["dt"]
+    building_components = data["building_components"]
+    restruc_scenarios   = data["restruc_scenarios"]
+    total_shell         = data["total_shell"]
+
+    (H_t_min, H_t_max) = data["H_t_range"]
+    H_t_spec_max = H_t_max / total_shell
+
+    # Maximal primary energy demand (DIN V 4108) over all heating concepts
+    # The demand is linear in H_t, therefore both bounds have to be checked
+    def Q_p(ep, H):
+        return 1/1000 * (ref_building["f_ql"] * ep * H +
+                         ref_building["H_v"] * ref_building["f_ql"] +
+                         ref_building["Q_tw"] - ref_building["eta"] *
+                         (ref_building["Q_i"] + ref_building["Q_s"]) * ep)
+
+    Q_p_max = max(Q_p(ep, H) for ep in ep_table["ep"].values()
+                             for H in (H_t_min, H_t_max))
+
+    M = {}
+
+    # Individual measures with too high U-values (EnEV)
+    M["H_t_ind"] = max(0, H_t_spec_max - ref_building["H_t_spec"])
+    M["Q_p_ind"] = max(0, Q_p_max - ref_building["Q_p"])
+
+    # Required U-values of the KfW-program for individual measures
+    M["U_ind"] = {}
+    for dev in building_components:
+        u_max = max(building["U-values"][n][dev]["U-Value"]
+                    for n in restruc_scenarios)
+        M["U_ind"][dev] = max(0, u_max - sub_par["building"]["u_value"][dev])
+
+    # Linearization of H_t * heating_concept
+    M["lin_H_t"] = H_t_spec_max
+
+    # KfW-efficiency-buildings
+    M["H_t_kfw"] = {}
+    M["Q_p_kfw"] = {}
+    for n in data["kfw_standards"]:
+        M["H_t_kfw"][n] = max(0, H_t_spec_max -
+                                 sub_par["building"]["eff_fact_H"][n] *
+                                 ref_building["H_t_spec"])
+        M["Q_p_kfw"][n] = max(0, Q_p_max -
+                                 sub_par["building"]["eff_fact_Q"][n] *
+                                 ref_building["Q_p"])
+
+    # Seasonal coefficient of performance for the BAFA-program:
+    # scop * E_power - E_heat is largest if the heat pump draws its nominal
+    # power (Q_nom_max / cop_a2w35) whenever the actual COP is below the
+    # required SCOP
+    M["scop"] = {}
+    for dev in ("hp_air", "hp_geo"):
+        cop = np.minimum(devs[dev]["cop_w35"], devs[dev]["cop_w55"])
+        for n in ("basic", "inno"):
+            scop = sub_par[dev][n + "_scop"]
+            M["scop"][dev,n] = (dt * devs[dev]["Q_nom_max"] /
+                                devs[dev]["cop_a2w35"] *
+                                np.sum(clustered["weights"] *
+                                np.sum(np.maximum(0, scop - cop), axis = 1)))
+
+    # KWKG: electrical capacity and annual payment of the CHP
+    dev = "chp"
+    M["kwkg_cap"] = devs[dev]["sigma"] * devs[dev]["Q_nom_max"]
+
+    p_chp_max = (dt * M["kwkg_cap"] * np.sum(clustered["weights"]) *
+                 data["params"]["time_steps"])
+
+    M["kwkg_sub"] = p_chp_max * max(sub_par["kwkg"]["self_50"],
+                                    sub_par["kwkg"]["sell_50"])
+
+    return M
+
+def _build_model(data, options):
+    """
+    Assemble the model block by block. Blocks of subsidy programs that are
+    disabled in the options are not added at all.
+
+    Returns the updated model, the dictionary of its variables and - if the
+    option profile is set - the build profile of all blocks (otherwise None).
+    """
+    if options.get("env") is None:
+        model = gp.Model("Design computation")
+    else:
+        model = gp.Model("Design computation", env=options["env"])
+    profiling = options.get("profile", False)
+
+    v = {}
+    marks = [("start", time.time(), 0, 0, 0, 0)]
+    for (block, builder) in _model_blocks(options):
+        builder(model, v, data, options)
+
+        # Gurobi adds pending modifications lazily, so the update is part
+        # of the build time of the block
+        if profiling:
+            model.update()
+            marks.append((block, time.time(), model.NumVars,
+                          model.NumConstrs, model.NumGenConstrs,
+                          model.NumSOS))
+
+    model.update()
+
+    if profiling:
+        return (model, v, _build_profile(model, marks))
+    else:
+        return (model, v, None)
+
+def _build_profile(model, marks):
+    """
+    Build time, model size and coefficient ranges of every block.
+
+    Variables and constraints are attributed to the block that created them,
+    the nonzeros and coefficient ranges to the block of the constraint.
+    """
+    A = model.getA().tocsr()
+    vtypes = np.array(model.getAttr("VType", model.getVars()))
+    rhs = np.abs(model.getAttr("RHS", model.getConstrs()))
+
+    profile = []
+    for (prev, mark) in zip(marks[:-1], marks[1:]):
+        rows = A[prev[3]:mark[3], :]
+        coefs = np.abs(rows.data[rows.data != 0])
+        rhs_block = rhs[prev[3]:mark[3]]
+        rhs_block = rhs_block[rhs_block > 0]
+
+        entry = {"block" : mark[0],
+                 "time" : mark[1] - prev[1],
+                 "vars" : mark[2] - prev[2],
+                 "bins" : int(np.sum(vtypes[prev[2]:mark[2]] == "B")),
+                 "constrs" : mark[3] - prev[3],
+                 "genconstrs" : mark[4] - prev[4],
+                 "sos" : mark[5] - prev[5],
+                 "nonzeros" : rows.nnz}
+        if len(coefs) > 0:
+            entry["matrix"] = (float(np.min(coefs)), float(np.max(coefs)))
+        if len(rhs_block) > 0:
+            entry["rhs"] = (float(np.min(rhs_block)), float(np.max(rhs_block)))
+        profile.append(entry)
+
+    return profile
+
+def _set_start_values(model, options, starts):
+    """
+    Add the starts (dicts of variable index and value) as additional MIP
+    starts. A start loaded from filename_start_vals is kept as first start.
+    """
+    if not starts:
+        return
+
+    first = getattr(model, "_num_starts",
+                    1 if options["load_start_vals"] else 0)
+    model.NumStart = first + len(starts)
+    model._num_starts = first + len(starts)
+    model.update()
+
+    variables = model.getVars()
+    for (n, start) in enumerate(starts):
+        model.Params.StartNumber = first + n
+        for (index, value) in start.items():
+            variables[index].Start = value
+
+def _design_starts(v, design):
+    """
+    MIP starts (variable index : value) from a design with the keys x,
+    x_restruc and capacity (as in the results): one with and one without
+    the capacities, which may be too small for the model at hand. The
+    binaries are also set as branching hints.
+    """
+    binaries = {}
+    for group in ("x", "x_restruc"):
+        for (key, value) in design.get(group, {}).items():
+            if key in v[group]:
+                var = v[group][key]
+                binaries[var.index] = int(round(value))
+                var.VarHintVal = int(round(value))
+
+    capacities = dict(binaries)
+    for (dev, value) in design.get("capacity", {}).items():
+        if isinstance(v["capacity"].get(dev), gp.Var):
+            capacities[v["capacity"][dev].index] = value
+
+    return [capacities, binaries]
+
+# Groups of v that the LP heuristic rounds: investment decisions are fixed
+# to 1 above the threshold, subsidy flags are rounded (0 only if the LP
+# does not use them at all)
+_HEURISTIC_INVESTMENTS = ("x", "x_restruc", "heating_concept")
+_HEURISTIC_SUBSIDIES = ("b_eeg", "b_kwkg", "b_sub_restruc", "b_bafa_stc",
+                        "b_bafa_hp", "b_bafa_pellet")
+
+def _lp_heuristic_policy(options):
+    """
+    Settings of the option lp_heuristic, completed with the defaults:
+    threshold 0.5, 10 % of the time limit for the fixed model.
+    """
+    policy = {"threshold" : 0.5,
+              "time_share" : 0.1}
+    if isinstance(options["lp_heuristic"], dict):
+        policy.update(options["lp_heuristic"])
+
+    return policy
+
+def _binaries(item):
+    """
+    All binary variables of a (nested) group of v.
+    """
+    if isinstance(item, gp.Var):
+        return [item] if item.VType == "B" else []
+    elif isinstance(item, dict):
+        return [var for val in item.values() for var in _binaries(val)]
+    elif isinstance(item, (list, tuple)):
+        return [var for val in item for var in _binaries(val)]
+    else:
+        return []
+
+# Binaries relaxed by the screening mode: on/off decisions of the heaters
+# and the STC, optionally the tiers of EEG and KWKG
+_SCREENING_DISPATCH = ("y",)
+_SCREENING_STEPS = ("b_eeg", "b_kwkg")
+
+def _screening_groups(options):
+    """
+    Groups of v that are relaxed by the option screening. Indicator
+    constraints need binary indicator variables.
+    """
+    groups = _SCREENING_DISPATCH
+    formulations = [options.get("heater_formulation", "big_m")]
+    if options["screening"] == "subsidy_steps":
+        groups += _SCREENING_STEPS
+        formulations.append(options.get("tier_formulation", "big_m"))
+
+    if "indicator" in formulations:
+        raise ValueError("The screening mode relaxes the indicator "
+                         "variables, use the big-M formulations")
+
+    return groups
+
+def _relax(model, v, groups):
+    """
+    Make all binary variables of the groups of v continuous.
+    """
+    for group in groups:
+        for var in _binaries(v.get(group, {})):
+            var.VType = "C"
+
+def _rounding(v, X, threshold, subsidies=True):
+    """
+    Fixed values (variable index : value) of the investment decisions and
+    subsidy flags for the LP solution X. Investment decisions below the
+    threshold remain free: the LP relaxation spreads the heat supply over
+    several devices, fixing them to 0 cuts off good designs.
+    """
+    fixed = {}
+    for group in _HEURISTIC_INVESTMENTS:
+        for var in _binaries(v.get(group, {})):
+            if X[var.index] >= threshold:
+                fixed[var.index] = 1
+
+    if subsidies:
+        for group in _HEURISTIC_SUBSIDIES:
+            for var in _binaries(v.get(group, {})):
+                if X[var.index] >= threshold:
+                    fixed[var.index] = 1
+                elif X[var.index] <= 1e-6:
+                    fixed[var.index] = 0
+
+    return fixed
+
+def _lp_heuristic(model, v, backend, options):
+    """
+    Constructive start: solve the LP relaxation, round and fix the
+    investment decisions (see _rounding) and solve the remaining small MIP
+    of operation and free decisions. If the subsidy flags cannot be fixed,
+    the model is solved again with free subsidy flags. Both solves contain
+    the lazy pool, as they run without the lazy callback.
+
+    Returns None if no feasible solution has been found, otherwise a dict
+    with the keys start (variable index : value), ObjVal and Runtime.
+    """
+    policy = _lp_heuristic_policy(options)
+    model.update()
+
+    relaxed = model.relax()
+    try:
+        _add_lazy_pool(relaxed, v)
+        relaxation = solver_backends.solve(relaxed, backend)
+    finally:
+        relaxed.dispose()
+
+    runtime = relaxation["Runtime"]
+    if relaxation["X"] is None:
+        return None
+
+    for subsidies in (True, False):
+        fixed = _rounding(v, relaxation["X"], policy["threshold"], subsidies)
+
+        restricted = model.copy()
+        try:
+            restricted.Params.TimeLimit = max(1, policy["time_share"] *
+                                                 model.Params.TimeLimit)
+            _add_lazy_pool(restricted, v)
+            variables = restricted.getVars()
+            for (index, value) in fixed.items():
+                variables[index].LB = value
+                variables[index].UB = value
+            solution = solver_backends.solve(restricted, backend)
+        finally:
+            restricted.dispose()
+
+        runtime += solution["Runtime"]
+        if solution["X"] is not None:
+            return {"start" : dict(enumerate(solution["X"])),
+                    "ObjVal" : solution["ObjVal"],
+                    "Runtime" : runtime}
+
+    return None
+
+def _relax_and_fix_policy(options):
+    """
+    Settings of the option relax_and_fix, completed with the defaults:
+    half of the time limit for the days, a fifth for the polish solve.
+    """
+    policy = {"day_share" : 0.5,
+              "polish_share" : 0.2}
+    if isinstance(options["relax_and_fix"], dict):
+        policy.update(options["relax_and_fix"])
+
+    return policy
+
+def _relax_and_fix(model, v, data, backend, options):
+    """
+    Relax-and-fix over the typical days. The design variables stay
+    integral, the on/off decisions y are relaxed on all days but one. The
+    days are solved in the order of their weights and the decisions of each
+    day are fixed afterwards. The solution with all days fixed is polished
+    by a short solve of the full model, in which it is the MIP start.
+
+    Returns the solution as returned by solver_backends.solve with the
+    runtime of all stages.
+    """
+    policy = _relax_and_fix_policy(options)
+    model.update()
+    time_limit = model.Params.TimeLimit
+
+    weights = data["clustered"]["weights"]
+    days = sorted(data["days"], key=lambda d: -weights[d])
+    decisions = {d: [] for d in days}
+    for ((dev, d, t), var) in v["y"].items():
+        decisions[d].append(var.index)
+
+    runtime = 0
+    fixed = model.copy()
+    try:
+        # The copy is solved without the lazy callback
+        _add_lazy_pool(fixed, v)
+
+        variables = fixed.getVars()
+        for d in days:
+            for index in decisions[d]:
+                variables[index].VType = "C"
+        fixed.Params.TimeLimit = max(1, policy["day_share"] * time_limit /
+                                        len(days))
+
+        for d in days:
+            for index in decisions[d]:
+                variables[index].VType = "B"
+
+            solution = solver_backends.solve(fixed, backend)
+            runtime += solution["Runtime"]
+            if solution["X"] is None:
+                print("")
+                print("Relax-and-fix: no feasible solution for day " + str(d))
+                solution["Runtime"] = runtime
+                return solution
+
+            for index in decisions[d]:
+                value = round(solution["X"][index])
+                variables[index].LB = value
+                variables[index].UB = value
+    finally:
+        fixed.dispose()
+
+    # Polish with the full model
+    _set_start_values(model, options, [dict(enumerate(solution["X"]))])
+    model.Params.TimeLimit = max(1, policy["polish_share"] * time_limit)
+    if model._callbacks:
+        polished = solver_backends.solve(model, backend, _callback)
+    else:
+        polished = solver_backends.solve(model, backend)
+
+    print("")
+    print("Relax-and-fix: objective " + str(solution["ObjVal"]) +
+          " with all days fixed after " + str(round(runtime, 1)) +
+          " s, polished " + str(polished["ObjVal"]))
+
+    polished["Runtime"] += runtime
+    if polished["X"] is None or (model.ModelSense * polished["ObjVal"] >
+                                 model.ModelSense * solution["ObjVal"]):
+        # Gap against the bound of the polish solve (the gap of the fixed
+        # model says nothing about the full model)
+        gap = None
+        if polished["X"] is not None:
+            bound = (polished["ObjVal"] -
+                     polished["MIPGap"] * abs(polished["ObjVal"]))
+            gap = (abs(solution["ObjVal"] - bound) /
+                   max(abs(solution["ObjVal"]), 1e-10))
+        solution.update({"Runtime" : polished["Runtime"],
+                         "MIPGap" : gap,
+                         "Status" : "relax_and_fix"})
+        return solution
+
+    return polished
+
+def _first_solution_callback(model, where):
+    """
+    Record the time of the first incumbent (start library statistics).
+    """
+    if where == gp.GRB.Callback.MIPSOL and model._first_solution is None:
+        model._first_solution = model.cbGet(gp.GRB.Callback.RUNTIME)
+
+def _callback(model, where):
+    """
+    Call all callbacks of the model (model._callbacks).
+    """
+    for callback in model._callbacks:
+        callback(model, where)
+
+def _telemetry_callback(model, where):
+    """
+    Record the progress of the branch and bound: every new solution and the
+    incumbent, best bound and node count whenever one of the objectives has
+    changed or at least one second has passed.
+    """
+    if where == gp.GRB.Callback.MIPSOL:
+        model._trace.append((model.cbGet(gp.GRB.Callback.RUNTIME), "solution",
+                             model.cbGet(gp.GRB.Callback.MIPSOL_OBJ),
+                             model.cbGet(gp.GRB.Callback.MIPSOL_OBJBND),
+                             None,
+                             model.cbGet(gp.GRB.Callback.MIPSOL_NODCNT)))
+
+    elif where == gp.GRB.Callback.MIP:
+        runtime = model.cbGet(gp.GRB.Callback.RUNTIME)
+        incumbent = model.cbGet(gp.GRB.Callback.MIP_OBJBST)
+        bound = model.cbGet(gp.GRB.Callback.MIP_OBJBND)
+
+        (last_time, last_incumbent, last_bound) = model._trace_last
+        if (runtime - last_time >= 1 or incumbent != last_incumbent or
+            bound != last_bound):
+            if abs(incumbent) < gp.GRB.INFINITY:
+                gap = abs(incumbent - bound) / max(abs(incumbent), 1e-10)
+            else:
+                gap = None
+            model._trace.append((runtime, "progress", incumbent, bound, gap,
+                                 model.cbGet(gp.GRB.Callback.MIP_NODCNT)))
+            model._trace_last = (runtime, incumbent, bound)
+
+def _termination_callback(model, where):
+    """
+    Termination policy (option termination). The solve is stopped if
+        - the incumbent has not improved by more than the relative
+          improvement within the window (seconds): "stagnation"
+        - the linear trend of the gap over the window does not reach the
+          MIP gap before the time limit: "gap_trend"
+    """
+    if where != gp.GRB.Callback.MIP:
+        return
+
+    policy = model._termination_policy
+    state = model._stagnation
+
+    runtime = model.cbGet(gp.GRB.Callback.RUNTIME)
+    incumbent = model.cbGet(gp.GRB.Callback.MIP_OBJBST)
+    bound = model.cbGet(gp.GRB.Callback.MIP_OBJBND)
+
+    if incumbent >= gp.GRB.INFINITY:
+        return
+
+    # Only improvements by more than the given share restart the window
+    if incumbent < state["incumbent"] - policy["improvement"] * abs(incumbent):
+        state["incumbent"] = incumbent
+        state["time"] = runtime
+
+    # Gap history of the window, sampled every half second
+    gap = abs(incumbent - bound) / max(abs(incumbent), 1e-10)
+    if not state["gaps"] or runtime - state["gaps"][-1][0] >= 0.5:
+        state["gaps"].append((runtime, gap))
+        state["gaps"] = [(t, g) for (t, g) in state["gaps"]
+                         if t >= runtime - policy["window"]]
+
+    if runtime - state["time"] > policy["window"]:
+        model._termination = "stagnation"
+        model.terminate()
+        return
+
+    (t_0, gap_0) = state["gaps"][0]
+    if policy["gap_trend"] and runtime - t_0 >= 0.9 * policy["window"]:
+        slope = (gap - gap_0) / (runtime - t_0)
+        target = model.Params.MIPGap
+        if slope >= 0:
+            remaining = gp.GRB.INFINITY
+        else:
+            remaining = (gap - target) / -slope
+        if runtime + remaining > model.Params.TimeLimit:
+            model._termination = "gap_trend"
+            model.terminate()
+
+def _lazy_bounds_callback(model, where):
+    """
+    Add the bounds of the lazy pool that are violated by a new incumbent.
+    """
+    if where == gp.GRB.Callback.MIPSOL:
+        upper = model.cbGetSolution(model._lazy_upper)
+        lower = model.cbGetSolution(model._lazy_lower)
+
+        for (i, (ub, lb)) in enumerate(zip(upper, lower)):
+            if lb - ub > 1e-6:
+                model.cbLazy(model._lazy_upper[i] >= model._lazy_lower[i])
+                model._lazy_added.add(i)
+
+def _add_lazy_pool(model, v):
+    """
+    Add all bounds of the lazy pool v["lazy"] as constraints to the model or
+    to a copy of it, for solves without the lazy callback. Returns the added
+    constraints.
+    """
+    variables = model.getVars()
+    constraints = [model.addConstr(_decode(_encode(upper), variables) >=
+                                   _decode(_encode(lower), variables))
+                   for (upper, lower) in v.get("lazy", [])]
+    model.update()
+
+    return constraints
+
+def print_profile(profile):
+    """
+    Print the build profile returned by compute (option profile).
+    """
+    print("")
+    print("Block".ljust(20) + "Time".rjust(8) + "Vars".rjust(8) +
+          "Bins".rjust(8) + "Constrs".rjust(9) + "NZs".rjust(9) +
+          "Matrix range".rjust(20))
+    for entry in profile:
+        if "matrix" in entry:
+            coef_range = "[%.0e, %.0e]" % entry["matrix"]
+        else:
+            coef_range = "-"
+        print(entry["block"].ljust(20) + ("%.2f" % entry["time"]).rjust(8) +
+              str(entry.get("vars", "")).rjust(8) +
+              str(entry.get("bins", "")).rjust(8) +
+              str(entry.get("constrs", "")).rjust(9) +
+              str(entry.get("nonzeros", "")).rjust(9) + coef_range.rjust(20))
+
+def _model_blocks(options):
+    """
+    List of (name, builder) for all blocks of the model in the order in which
+    they have to be added. Subsidy programs that are disabled in the options
+    are skipped, so that their variables and constraints are not created.
+    """
+    blocks = [("devices",   _build_devices),
+              ("storage",   _build_storage),
+              ("balances",  _build_balances),
+              ("shell",     _build_shell),
+              ("economics", _build_economics)]
+
+    if options.get("tight_bounds", True):
+        blocks.append(("bounds", _build_bounds))
+
+    if options["EEG"]:
+        blocks.append(("eeg", _build_eeg))
+
+    if options["kfw_battery"]:
+        blocks.append(("kfw_battery", _build_kfw_battery))
+
+    if options["KWKG"]:
+        blocks.append(("kwkg", _build_kwkg))
+
+    if options["Bafa_chp"]:
+        blocks.append(("bafa_chp", _build_bafa_chp))
+
+    # The KfW-standard of the building is required for the KfW-program and
+    # for the building-efficiency-bonus of the BAFA-programs
+    if (options["kfw_eff_buildings"] or options["Bafa_stc"] or
+        options["Bafa_hp"] or options["Bafa_pellet"]):
+        blocks.append(("kfw_standards", _build_kfw_standards))
+
+    if options["kfw_single_mea"]:
+        blocks.append(("kfw_single_mea", _build_kfw_single_mea))
+
+    if options["kfw_eff_buildings"]:
+        blocks.append(("kfw_eff_buildings", _build_kfw_eff_buildings))
+
+    if options["Bafa_stc"]:
+        blocks.append(("bafa_stc", _build_bafa_stc))
+
+    if options["Bafa_hp"]:
+        blocks.append(("bafa_hp", _build_bafa_hp))
+
+    if options["Bafa_pellet"]:
+        blocks.append(("bafa_pellet", _build_bafa_pellet))
+
+    blocks.append(("objective", _build_objective))
+    blocks.append(("scenario",  _build_scenario))
+
+    return blocks
+
+def _demand_bounds(data, options):
+    """
+    Upper bounds for capacities, nominal heat flows, storage contents and
+    grid purchases, derived from the clustered demands and the building.
+
+    The heat flow into the TES per time step is limited by the peak heat
+    demand of the least insulated shell and the storage size. A heater that
+    is larger than required for this heat flow, for its minimum part load
+    and for the design heat load is only more expensive. Devices for which
+    an active subsidy program rewards larger capacities are excluded.
+
+    With the largest TES of the catalog these bounds rarely undercut the
+    catalog capacities. bounds["capacity_tes"] therefore holds the same
+    bound as linear function of the purchased storage content,
+    capacity <= fix + soc_nom["tes"] * per_soc, see _build_bounds.
+    """
+    devs       = data["devs"]
+    clustered  = data["clustered"]
+    params     = data["params"]
+    building   = data["building"]
+    sub_par    = data["sub_par"]
+    dt         = data["dt"]
+
+    (H_t_min, H_t_max) = data["H_t_range"]
+
+    # Peak heat demand (space heating with maximal losses plus dhw)
+    peak_heat = np.max(clustered["temp_delta"]) / 1000 * H_t_max + data["Q_l"]
+    if not options["dhw_electric"]:
+        peak_heat += np.max(clustered["dhw"])
+
+    # Maximal charging power of the TES
+    tes = devs["tes"]
+    soc_max_tes = (tes["volume_max"] * params["rho_w"] * params["c_w"] *
+                   tes["dT_max"] / 3600000)
+    ch_max = (soc_max_tes / dt + peak_heat / tes["eta_dch"]) / tes["eta_ch"]
+
+    # Design heat load (DIN EN 12831) for the least and best insulated shell
+    delta_temp = clustered["temp_indoor"] - clustered["temp_design"]
+    H_vent = 0.5 * 0.34 * (building["dimensions"]["Volume"] *
+                           building["dimensions"]["Area"])
+    dsh = {"min": (H_t_min + H_vent) * delta_temp / 1000,
+           "max": (H_t_max + H_vent) * delta_temp / 1000}
+
+    bounds = {"dsh_min": dsh["min"] if options["Design_heat_load"] else 0,
+              "capacity": {},
+              "capacity_tes": {},
+              "soc_nom": {}}
+
+    for dev in data["heater"]:
+        # Subsidies that increase with the capacity
+        if ((dev == "pellet" and options["Bafa_pellet"]) or
+            (dev == "chp" and (options["KWKG"] or options["Bafa_chp"]))):
+            continue
+
+        # Heat output at minimum part load must fit into the TES
+        if devs[dev]["mod_lvl"] <= 0:
+            continue
+        if dev in ("hp_air", "hp_geo"):
+            cop_min = np.min(np.minimum(devs[dev]["cop_w35"], devs[dev]["cop_w55"]))
+            cap_share = (devs[dev]["cop_a2w35"] /
+                         (devs[dev]["mod_lvl"] * cop_min))
+        else:
+            cap_share = 1 / devs[dev]["mod_lvl"]
+        cap_oper = ch_max * cap_share
+
+        # Capacity that can be required by the design heat load
+        if not options["Design_heat_load"] or dev == "pellet":
+            cap_design = 0
+        elif dev in ("hp_air", "hp_geo"):
+            cap_design = dsh["max"] / devs[dev]["cop_a2w55"]
+        else:
+            cap_design = dsh["max"]
+
+        cap_sub = 0
+        if dev in ("hp_air", "hp_geo") and options["Bafa_hp"]:
+            cap_sub = sub_par[dev]["max_cap"]
+
+        bounds["capacity"][dev] = min(devs[dev]["Q_nom_max"],
+                                      max(devs[dev]["Q_nom_min"], cap_oper,
+                                          cap_design, cap_sub))
+
+        # The same bound with the purchased storage content instead of the
+        # largest TES (the sum overestimates the maximum)
+        cap_fix = max(devs[dev]["Q_nom_min"], cap_design, cap_sub,
+                      peak_heat / (tes["eta_dch"] * tes["eta_ch"]) * cap_share)
+        if cap_fix < bounds["capacity"][dev]:
+            bounds["capacity_tes"][dev] = (cap_fix,
+                                           cap_share / (dt * tes["eta_ch"]))
+
+    # Storage contents of the catalog devices
+    bounds["soc_nom"]["tes"] = soc_max_tes
+    bounds["soc_nom"]["bat"] = devs["bat"]["cap_max"]
+
+    # Grid purchases: demands, electrical heater and battery charging
+    bat = devs["bat"]
+    p_eh_max = devs["eh"]["Q_nom_max"]
+    p_ch_bat_max = bat["P_ch_fix"] + bat["cap_max"] * bat["P_ch_var"]
+
+    p_house = clustered["electricity"] + p_eh_max + p_ch_bat_max
+    if options["dhw_electric"]:
+        p_house = p_house + clustered["dhw"]
+
+    p_hp = p_eh_max + max(bounds["capacity"].get(dev, devs[dev]["Q_nom_max"]) /
+                          devs[dev]["cop_a2w35"]
+                          for dev in ("hp_air", "hp_geo"))
+
+    bounds["p_grid"] = {"grid_house" : p_house,
+                        "grid_hp"    : p_hp}
+
+    return bounds
+
+#%% Technical blocks
+
+def _add_choice_set(model, options, variables):
+    """
+    Declare a set of exclusive binary choices as SOS1 (optional). The sum
+    constraints of the set are kept, the declaration only guides branching.
+    """
+    if options.get("sos_choices", False) and len(variables) > 1:
+        model.addSOS(gp.GRB.SOS_TYPE1, list(variables),
+                     list(range(1, len(variables) + 1)))
+
+def _representative_steps(data):
+    """
+    Time steps of the peak temperature difference and the peak dhw demand of
+    every clustered day. Lazy bounds are always added for these time steps.
+    """
+    clustered = data["clustered"]
+
+    steps = set()
+    for d in data["days"]:
+        steps.add((d, int(np.argmax(clustered["temp_delta"][d,:]))))
+        steps.add((d, int(np.argmax(clustered["dhw"][d,:]))))
+
+    return steps
+
+def _lazy_bounds(options):
+    """
+    Whether bounds go to the lazy pool: lazy constraints are only available
+    with the Gurobi backend and without portfolio.
+    """
+    return bool(options.get("lazy_bounds", False) and
+                options.get("backend", "gurobi") == "gurobi" and
+                not options.get("portfolio"))
+
+def _add_lazy_bound(model, v, options, upper, lower, keep, name=""):
+    """
+    Add the bound upper >= lower. If the option lazy_bounds is set and the
+    bound is not kept, it is only stored in the lazy pool v["lazy"] and added
+    by the callback once a MIP solution violates it.
+    """
+    if keep or not _lazy_bounds(options):
+        model.addConstr(upper >= lower, name=name)
+    else:
+        v.setdefault("lazy", []).append((upper, lower))
+
+def _build_devices(model, v, data, options):
+    """
+    Purchase, sizing and operation of heaters and solar components.
+    """
+    nm         = data["nm"]
+    devs       = data["devs"]
+    clustered  = data["clustered"]
+    days       = data["days"]
+    time_steps = data["time_steps"]
+    heater     = data["heater"]
+    solar      = data["solar"]
+    A_max      = data["A_max"]
+
+    formulation = options.get("heater_formulation", "big_m")
+
+    # Variables that are defined by an equation are replaced by expressions
+    reduce_model = options.get("reduce_model", True)
+
+    #%% Variables
+
+    # Purchase and activation decision variables
+    x = {}  # Purchase (all devices)
+    for dev in devs.keys():
+        x[dev] = model.addVar(vtype="B", name=nm("x_", dev))
+
+    # Acitivation heater
+    y = {}
+    for d in days:
+        for t in time_steps:
+            timetag = nm("_", d, "_", t)
+            for dev in heater:
+                y[dev,d,t] = model.addVar(vtype="B", name=nm("y_", dev, "_", timetag))
+            y["stc",d,t] = model.addVar(vtype="B", name=nm("y_", "stc", "_", timetag))
+
+    # Capacities (thermal output, area, volume,...)
+    capacity = {}
+    for dev in devs.keys():
+        capacity[dev] = model.addVar(vtype="C", name=nm("Capacity_", dev) , lb = 0)
+
+    # Power, Heat and Energy for heater and solar components
+    power_nom = {}
+    power = {}
+    heat_nom = {}
+    heat = {}
+    energy = {}
+
+    for d in days:
+        for t in time_steps:
+            timetag = nm("_", d, "_", t)
+
+            for dev in heater:
+                if formulation == "semicont":
+                    # Either 0 or between minimal and maximal capacity
+                    heat_nom[dev,d,t] = model.addVar(vtype="S",
+                                                     lb=devs[dev]["Q_nom_min"],
+                                                     ub=devs[dev]["Q_nom_max"],
+                                                     name=nm("Q_nom_", dev, "_", timetag))
+                else:
+                    heat_nom[dev,d,t] = model.addVar(vtype="C",
+                                                     name=nm("Q_nom_", dev, "_", timetag))
+
+            for dev in ("hp_air", "hp_geo"):
+                power_nom[dev,d,t] = model.addVar(vtype="C",
+                                                  name=nm("P_nom_", dev, "_", timetag))
+
+                heat[dev,d,t] = model.addVar(vtype="C",  name=nm("Q_", dev, "_", timetag))
+
+                power[dev,d,t] = model.addVar(vtype="C", name=nm("P_", dev, "_", timetag))
+
+            for dev in ("pellet","boiler"):
+                if reduce_model:
+                    energy[dev,d,t] = model.addVar(vtype="C", name=nm("E_", dev, "_", timetag))
+
+                    heat[dev,d,t] = devs[dev]["eta"] * energy[dev,d,t]
+                else:
+                    heat[dev,d,t] = model.addVar(vtype="C", name=nm("Q_", dev, "_", timetag))
+
+                    energy[dev,d,t] = model.addVar(vtype="C", name=nm("E_", dev, "_", timetag))
+
+            dev = "eh"
+            power[dev,d,t] = model.addVar(vtype="C", name=nm("P_", dev, "_", timetag))
+
+            heat[dev,d,t] = model.addVar(vtype="C", name=nm("Q_", dev, "_", timetag))
+
+            dev = "chp"
+            if reduce_model:
+                heat[dev,d,t] = model.addVar(vtype="C", name=nm("Q_", dev, "_", timetag))
+
+                power[dev,d,t] = devs[dev]["sigma"] * heat[dev,d,t]
+            else:
+                power[dev,d,t] = model.addVar(vtype="C", name=nm("P_", dev, "_", timetag))
+
+                heat[dev,d,t] = model.addVar(vtype="C", name=nm("Q_", dev, "_", timetag))
+
+            energy[dev,d,t] = model.addVar(vtype="C", name=nm("E_", dev, "_", timetag))
+
+            dev = "pv"
+            power[dev,d,t] = model.addVar(vtype="C", name=nm("P_", dev, "_", timetag))
+
+            dev = "stc"
+            heat[dev,d,t] = model.addVar(vtype="C", name=nm("Q_", dev, "_", timetag))
+
+    # Installed PV power
+    pv_power = model.addVar(vtype="C", name = nm("pv_power"))
+
+    # Variables for flow temperature
+    b_TVL = {}
+    for temp in ("35","55"):
+        b_TVL[temp] = model.addVar(vtype = "B", name = nm("b_TVL_", temp))
+
+    lin_TVL = {}
+    for temp in ("35","55"):
+        for dev in ("hp_geo","hp_air"):
+            for d in days:
+                for t in time_steps:
+                    lin_TVL[temp,dev,d,t] = model.addVar(vtype = "C",
+                                       name = nm("lin_TVL_", temp, "_",
+                                                 dev, "_", d, "_", t), lb = 0)
+
+    v.update({"x"         : x,
+              "y"         : y,
+              "capacity"  : capacity,
+              "power_nom" : power_nom,
+              "power"     : power,
+              "heat_nom"  : heat_nom,
+              "heat"      : heat,
+              "energy"    : energy,
+              "pv_power"  : pv_power,
+              "b_TVL"     : b_TVL,
+              "lin_TVL"   : lin_TVL})
+
+    #%% Flow temperature
+
+    # New buildings are heated with a flow temperature of 35°C
+    if options["New_Building"]:
+        model.addConstr(b_TVL["35"] == 1)
+    else:
+        model.addConstr(b_TVL["55"] == 1)
+
+    # Flow temperature is either 35 or 55°c
+    # Choice depends on the age of the building
+    model.addConstr(b_TVL["35"] + b_TVL["55"] == 1)
+
+    #%% Capacitybounds:
+    peak_steps = _representative_steps(data)
+    for d in days:
+        for t in time_steps:
+            for dev in heater:
+                _add_lazy_bound(model, v, options, capacity[dev],
+                                heat_nom[dev,d,t], (d,t) in peak_steps,
+                                name=nm("Capacity_", dev, "_", d, "_", t))
+
+    #Heater
+    for dev in heater:
+        model.addConstr(capacity[dev] >= x[dev] * devs[dev]["Q_nom_min"],
+                        name=nm("Capacity_min_", dev))
+
+        model.addConstr(capacity[dev] <= x[dev] * devs[dev]["Q_nom_max"],
+                        name=nm("Capacity_max_", dev))
+
+    #Solar Components
+    for dev in solar:
+        # Minimum area for each device
+        model.addConstr(capacity[dev] >= x[dev] * devs[dev]["area_min"],
+                        name=nm("Minimum_area_", dev))
+
+        # Maximum area for each device
+        model.addConstr(capacity[dev] <= x[dev] * A_max,
+                        name=nm("Maximum_area_", dev))
+
+    # Area of stc + pv <= A_max
+    model.addConstr(sum(capacity[dev] for dev in solar) <= A_max,
+                    name=nm("Maximum_total_area"))
+
+    #%% Combinations of heaters
+    model.addConstr(x["boiler"] + x["eh"]  <= 1)
+    model.addConstr(x["chp"]    + x["eh"]  <= 1)
+    model.addConstr(x["chp"]    + x["stc"] <= 1)
+    model.addConstr(x["hp_air"] + x["hp_geo"] >= x["eh"])
+    model.addConstr(x["pellet"] + x["hp_geo"] + x["hp_air"] + x["chp"] <= 1)
+
+    #%% Heating systems
+
+    # Devices can be switched on only if they have been purchased
+    for dev in heater:
+        model.addConstr(data["params"]["time_steps"] *
+                        data["params"]["days"] *
+                        x[dev] >= sum(sum(y[dev,d,t]
+                                  for t in time_steps)
+                                  for d in days),
+                                  name=nm("Activation_", dev))
+
+    # Devices nominal values (heat_nom = y * capacity)
+    # big_m:    linearization with four constraints
+    # indicator: heat_nom = capacity if the device is switched on
+    # semicont:  heat_nom is semi-continuous, the lower bound is implicit
+    for dev in heater:
+        for d in days:
+            for t in time_steps:
+                # Abbreviations
+                timetag = nm("_", d, "_", t)
+
+                q_nom_min = devs[dev]["Q_nom_min"]
+                q_nom_max = devs[dev]["Q_nom_max"]
+
+                model.addConstr(heat_nom[dev,d,t] <= q_nom_max * y[dev,d,t],
+                                        name=nm("Max_heat_1_", dev, "_", timetag))
+
+                if formulation != "semicont":
+                    model.addConstr(heat_nom[dev,d,t] >= q_nom_min * y[dev,d,t],
+                                            name=nm("Min_heat_1_", dev, "_", timetag))
+
+                if formulation == "indicator":
+                    model.addGenConstrIndicator(y[dev,d,t], True,
+                                                heat_nom[dev,d,t] - capacity[dev],
+                                                gp.GRB.EQUAL, 0,
+                                                name=nm("On_heat_", dev, "_", timetag))
+                else:
+                    model.addConstr(capacity[dev] <= heat_nom[dev,d,t] +
+                                                     q_nom_max *
+                                                     (x[dev] - y[dev,d,t]),
+                                                     name=nm("Max_heat_2_", dev, "_", timetag))
+
+                    model.addConstr(capacity[dev] >= heat_nom[dev,d,t] +
+                                                     q_nom_min *
+                                                     (x[dev] - y[dev,d,t]),
+                                                     name=nm("Min_heat_2_", dev, "_", timetag))
+
+    for dev in ("boiler","pellet"):
+        for d in days:
+            for t in time_steps:
+                # Abbreviations
+                timetag = nm("_", d, "_", t)
+
+                model.addConstr(heat[dev,d,t] <= heat_nom[dev,d,t],
+                                                 name=nm("Max_heat_operation_", dev, "_", timetag))
+
+                model.addConstr(heat[dev,d,t] >= heat_nom[dev,d,t] *
+                                                 devs[dev]["mod_lvl"],
+                                                 name=nm("Min_heat_operation_", dev, "_", timetag))
+
+                if not reduce_model:
+                    model.addConstr(heat[dev,d,t] == energy[dev,d,t] *
+                                                     devs[dev]["eta"],
+                                                     name=nm("Energy_equation_", dev, "_", timetag))
+
+    dev = "chp"
+    for d in days:
+        for t in time_steps:
+            # Abbreviations
+            timetag = nm("_", d, "_", t)
+
+            mod_lvl = devs[dev]["mod_lvl"]
+            omega   = devs[dev]["omega"]
+            sigma   = devs[dev]["sigma"]
+
+            model.addConstr(heat[dev,d,t] <= heat_nom[dev,d,t],
+                            name=nm("Max_heat_operation_", dev, "_", timetag))
+
+            model.addConstr(heat[dev,d,t] >= heat_nom[dev,d,t] * mod_lvl,
+                            name=nm("Min_heat_operation_", dev, "_", timetag))
+
+            if not reduce_model:
+                model.addConstr(power[dev,d,t] == sigma * heat[dev,d,t],
+                                name=nm("Power_equation_", dev, "_", timetag))
+
+            model.addConstr(energy[dev,d,t] * omega == (heat[dev,d,t] +
+                                                        power[dev,d,t]),
+                                                        name=nm("Energy_equation_", dev, "_", timetag))
+
+    dev = "eh"
+    for d in days:
+        for t in time_steps:
+            # Abbreviations
+            timetag = nm("_", d, "_", t)
+
+            model.addConstr(heat[dev,d,t] <= heat_nom[dev,d,t],
+                                             name=nm("Max_heat_operation_", dev, "_", timetag))
+
+            model.addConstr(heat[dev,d,t] >= heat_nom[dev,d,t] *
+                                             devs[dev]["mod_lvl"],
+                                             name=nm("Min_heat_operation_", dev, "_", timetag))
+
+            model.addConstr(heat[dev,d,t] == power[dev,d,t] *
+                                             devs[dev]["eta"],
+                                             name=nm("Power_equation_", dev, "_", timetag))
+
+    for dev in ("hp_air","hp_geo"):
+        for d in days:
+            for t in time_steps:
+
+                timetag = nm("_", d, "_", t)
+
+                mod_lvl = devs[dev]["mod_lvl"]
+
+                model.addConstr(heat_nom[dev,d,t] == power_nom[dev,d,t] *
+                                                     devs[dev]["cop_a2w35"],
+                                                     name=nm("Power_nom_", dev, "_", timetag))
+
+                model.addConstr(power[dev,d,t] <= power_nom[dev,d,t],
+                                                  name=nm("Max_pow_operation_", dev, "_", timetag))
+
+                model.addConstr(power[dev,d,t] >= power_nom[dev,d,t] *
+                                                  mod_lvl,
+                                                  name=nm("Min_pow_operation_", dev, "_", timetag))
+
+                model.addConstr(power[dev,d,t] == sum(lin_TVL[temp,dev,d,t] /
+                                                  devs[dev]["cop_w"+temp][d,t]
+                                                  for temp in b_TVL.keys()),
+                                                  name=nm("Min_pow_operation_", dev, "_", timetag))
+
+                M = devs[dev]["Q_nom_max"]
+                for temp in b_TVL.keys():
+                    model.addConstr(lin_TVL[temp,dev,d,t] <= M * b_TVL[temp])
+
+                    model.addConstr(heat[dev,d,t] - lin_TVL[temp,dev,d,t] >= 0)
+
+                    model.addConstr(heat[dev,d,t] - lin_TVL[temp,dev,d,t] <=
+                                                      M * (1 - b_TVL[temp]))
+
+    #%% Solar components
+
+    dev = "pv"
+    eta_inverter = 0.97
+    model.addConstr(pv_power == capacity[dev] * devs[dev]["p_nom"] / devs[dev]["area_mean"])
+    for d in days:
+        for t in time_steps:
+            timetag = nm("_", d, "_", t)
+
+            model.addConstr(power[dev,d,t] <= capacity[dev] *
+                                              devs[dev]["eta_el"][d][t] *
+                                              eta_inverter *
+                                              clustered["solar_roof"][d][t],
+                                              name=nm("Solar_electrical_", dev, "_", timetag))
+
+    dev = "stc"
+    for d in days:
+        for t in time_steps:
+            timetag = nm("_", d, "_", t)
+
+            model.addConstr(heat[dev,d,t] <= capacity[dev] *
+                                             devs[dev]["eta_th"][d][t] *
+                                             clustered["solar_roof"][d][t],
+                                             name=nm("Solar_thermal_", dev, "_", timetag))
+
+def _build_storage(model, v, data, options):
+    """
+    Thermal energy storage and battery.
+    """
+    nm         = data["nm"]
+    devs       = data["devs"]
+    clustered  = data["clustered"]
+    params     = data["params"]
+    dt         = data["dt"]
+    days       = data["days"]
+    time_steps = data["time_steps"]
+    storage    = data["storage"]
+    peak_steps = _representative_steps(data)
+    x          = v["x"]
+    y          = v["y"]
+    capacity   = v["capacity"]
+
+    #%% Variables
+
+    # State of charge (SOC) for storage systems
+    ch = {}
+    dch = {}
+    soc = {}
+    soc_nom = {}
+    soc_init = {}
+
+    for dev in storage:
+        soc_nom[dev] = model.addVar(vtype="C", name=nm("SOC_nom_", dev))
+        for d in days:
+            soc_init[dev,d] = model.addVar(vtype="C", name=nm("SOC_init_", dev, "_", d))
+            for t in time_steps:
+                timetag = nm("_", d, "_", t)
+
+                soc[dev,d,t] = model.addVar(vtype="C",
+                                            name=nm("SOC_", dev, "_", timetag), lb = 0)
+
+                ch[dev,d,t] = model.addVar(vtype="C", name=nm("ch", dev, timetag))
+
+                dch[dev,d,t] = model.addVar(vtype="C", name=nm("dch", dev, timetag))
+
+    v.update({"ch"       : ch,
+              "dch"      : dch,
+              "soc"      : soc,
+              "soc_nom"  : soc_nom,
+              "soc_init" : soc_init})
+
+    #%% Capacitybounds:
+
+    #Thermal Energy Storage
+    dev = "tes"
+    model.addConstr(x["tes"] == 1)
+
+    model.addConstr(capacity[dev] >= x[dev] * devs[dev]["volume_min"],
+                                              name=nm("Storage_Volume_min"))
+
+    model.addConstr(capacity[dev] <= x[dev] * devs[dev]["volume_max"],
+                                              name=nm("Storage_Volume_max"))
+
+    model.addConstr(soc_nom[dev] == capacity[dev] * params["rho_w"] *
+                                    params["c_w"] * devs[dev]["dT_max"] /
+                                    3600000, name=nm("Storage_Volume"))
+
+    #Battery storage
+    dev = "bat"
+    model.addConstr(capacity[dev] == soc_nom[dev], name=nm("Capacity_", dev))
+
+    model.addConstr(soc_nom[dev] >= x[dev] * devs[dev]["cap_min"],
+                                             name=nm("Battery_capacity_min"))
+
+    model.addConstr(soc_nom[dev] <= x[dev] * devs[dev]["cap_max"],
+                                             name=nm("Battery_capacity_max"))
+
+    #%% Storage operation
+
+    # Nominal storage content (SOC)
+    for dev in storage:
+        for d in days:
+            #Inits
+            model.addConstr(soc_nom[dev] >= soc_init[dev,d],
+                                            name=nm("SOC_nom_inits_", dev, "_", d))
+            for t in time_steps:
+                # Regular storage loads
+                _add_lazy_bound(model, v, options, soc_nom[dev], soc[dev,d,t],
+                                (d,t) in peak_steps,
+                                name=nm("SOC_nom_", dev, "_", d, "_", t))
+
+    # SOC repetitions
+    for dev in storage:
+        for d in range(params["days"]):
+            if np.max(clustered["weights"]) > 1:
+                model.addConstr(soc_init[dev,d] == soc[dev,d,params["time_steps"]-1],
+                                                   name=nm("repetitions_", dev, "_", d))
+
+    #TES
+    dev = "tes"
+
+    k_loss = devs[dev]["k_loss"]
+    eta_ch = devs[dev]["eta_ch"]
+    eta_dch = devs[dev]["eta_dch"]
+
+    for d in days:
+        for t in time_steps:
+            if t == 0:
+                if np.max(clustered["weights"]) == 1:
+                    if d == 0:
+                       soc_prev = soc_init[dev,d]
+                    else:
+                       soc_prev = soc[dev,d-1,params["time_steps"]-1]
+                else:
+                    soc_prev = soc_init[dev,d]
+            else:
+                soc_prev = soc[dev,d,t-1]
+
+            timetag = nm("_", d, "_", t)
+
+            charge = eta_ch * ch[dev,d,t]
+            discharge = 1 / eta_dch * dch[dev,d,t]
+
+            model.addConstr(soc[dev,d,t] == (1 - k_loss) * soc_prev +
+                            dt * (charge - discharge),
+                            name=nm("Storage_bal_", dev, timetag))
+
+    #BAT
+    dev = "bat"
+
+    k_loss = devs[dev]["k_loss"]
+    eta_ch = devs[dev]["eta"]
+    eta_dch = devs[dev]["eta"]
+
+    for d in days:
+        for t in time_steps:
+            if t == 0:
+                if np.max(clustered["weights"]) == 1:
+                    if d == 0:
+                       soc_prev = soc_init[dev,d]
+                    else:
+                       soc_prev = soc[dev,d-1,params["time_steps"]-1]
+                else:
+                    soc_prev = soc_init[dev,d]
+            else:
+                soc_prev = soc[dev,d,t-1]
+
+            timetag = nm("_", d, "_", t)
+
+            charge = eta_ch * ch[dev,d,t]
+            discharge = 1 / eta_dch * dch[dev,d,t]
+
+            model.addConstr(soc[dev,d,t] == (1 - k_loss) * soc_prev + dt *
+                                            (charge - discharge),
+                                            name=nm("Storage_bal_", dev, timetag))
+
+            model.addConstr(ch[dev,d,t] <= x[dev] * devs[dev]["P_ch_fix"] +
+                                           capacity[dev] * devs[dev]["P_ch_var"],
+                                           name=nm("P_ch_max", timetag))
+
+            model.addConstr(dch[dev,d,t] <= x[dev] * devs[dev]["P_dch_fix"] +
+                                            capacity[dev] * devs[dev]["P_dch_var"],
+                                            name=nm("P_dch_max", timetag))
+
+    #%% HP and STC operation depends on storage temperature
+
+    for dev in ("hp_geo", "hp_air", "stc"):
+        for d in days:
+            for t in time_steps:
+                timetag = nm("_", d, "_", t)
+
+                # Abbreviations
+                dT_relative = (devs[dev]["dT_max"] /
+                               devs["tes"]["dT_max"])
+
+                # Residual storage content
+                resSC = (devs["tes"]["volume_max"] *
+                         devs["tes"]["dT_max"] *
+                         params["rho_w"] *
+                         params["c_w"] *
+                         (1 - dT_relative) /
+                         3600000)
+
+                model.addConstr(soc["tes",d,t] <= soc_nom["tes"] *
+                                                  dT_relative +
+                                                  (1 - y[dev,d,t]) * resSC,
+                                                  name=nm("Renew_heater_act_", dev, timetag))
+
+def _build_balances(model, v, data, options):
+    """
+    Thermal balance and electricity balance.
+    """
+    nm         = data["nm"]
+    devs       = data["devs"]
+    clustered  = data["clustered"]
+    days       = data["days"]
+    time_steps = data["time_steps"]
+    heater     = data["heater"]
+    x          = v["x"]
+    capacity   = v["capacity"]
+    power      = v["power"]
+    heat       = v["heat"]
+    ch         = v["ch"]
+    dch        = v["dch"]
+
+    #%% Variables
+
+    # Electricity imports, sold, self-used and transferred (to heat pump) electricity
+    p_grid  = {}
+    p_use   = {}
+    p_sell  = {}
+    p_hp    = {}
+
+    for d in days:
+        for t in time_steps:
+            timetag = nm("_", d, "_", t)
+
+            p_grid["grid_house",d,t] = model.addVar(vtype="C",
+                                                    name=nm("p_grid_house", timetag))
+
+            p_grid["grid_hp",d,t]  = model.addVar(vtype="C", name=nm("p_grid_hp", timetag))
+
+            # Note: bat is referring to the discharge power
+            for dev in ("pv", "bat","chp"):
+                p_use[dev,d,t]  = model.addVar(vtype="C", name=nm("P_use_", dev, timetag))
+
+                p_sell[dev,d,t] = model.addVar(vtype="C", name=nm("P_sell_", dev, timetag))
+
+                p_hp[dev,d,t]   = model.addVar(vtype="C", name=nm("P_hp_", dev, timetag))
+
+    # Split EH for HP tariff
+    eh_split = {}
+
+    for d in days:
+        for t in time_steps:
+            timetag = nm("_", d, "_", t)
+            eh_split["eh_w/o_hp",d,t] = model.addVar(vtype="C",
+                                                name=nm("p_eh_w/o_hp", timetag))
+
+            eh_split["eh_w/_hp",d,t]  = model.addVar(vtype="C",
+                                                 name=nm("p_eh_w/_hp", timetag))
+
+    # Heating demand depending on to the chosen building shell components
+    heat_mod = {}
+    for d in days:
+        for t in time_steps:
+            heat_mod[d,t] = model.addVar(vtype = "C", name = nm("heat_mod_", d, "_", t), lb = 0)
+
+    v.update({"p_grid"   : p_grid,
+              "p_use"    : p_use,
+              "p_sell"   : p_sell,
+              "p_hp"     : p_hp,
+              "eh_split" : eh_split,
+              "heat_mod" : heat_mod})
+
+    #%% Balances
+
+    # Differentiation for dhw-heating: either electric or via heating system
+    if options["dhw_electric"]:
+
+        #Thermal balance
+        dev = "tes"
+        for d in days:
+            for t in time_steps:
+                timetag = nm("_", d, "_", t)
+
+                model.addConstr(dch[dev,d,t] == heat_mod[d,t],
+                                                name=nm("Thermal_max_discharge", timetag))
+
+                model.addConstr(ch[dev,d,t]  == heat["stc",d,t] +
+                                                sum(heat[dv,d,t]
+                                                for dv in heater),
+                                                name=nm("Thermal_max_charge", timetag))
+
+        #Electricity balance
+        for d in days:
+            for t in time_steps:
+                timetag = nm("_", d, "_", t)
+
+                # For components without hp-tariff (p_use["bat"] referring to discharge)
+                model.addConstr(clustered["electricity"][d,t] +
+                                clustered["dhw"][d,t] +
+                                eh_split["eh_w/o_hp",d,t] +
+                                ch["bat",d,t] == p_grid["grid_house",d,t] +
+                                                 sum(p_use[dev,d,t]
+                                                 for dev in ("pv","bat","chp")),
+                                                 name=nm("El_bal_w/o_HPtariff", timetag))
+
+                # For components with hp-tariff (p_hp["bat"] referring to discharge)
+                model.addConstr(power["hp_air",d,t] +
+                                power["hp_geo",d,t] +
+                                eh_split["eh_w/_hp",d,t] == p_grid["grid_hp",d,t] +
+                                                            sum(p_hp[dev,d,t]
+                                                            for dev in ("pv","bat","chp")),
+                                                            name=nm("El_bal_w/_HPtariff", timetag))
+
+    else:
+
+        #Thermal balance
+        dev = "tes"
+        for d in days:
+            for t in time_steps:
+                timetag = nm("_", d, "_", t)
+
+                model.addConstr(dch[dev,d,t] == heat_mod[d,t] +
+                                                clustered["dhw"][d,t],
+                                                name=nm("Thermal_max_discharge", timetag))
+
+                model.addConstr(ch[dev,d,t] == heat["stc",d,t] +
+                                               sum(heat[dv,d,t]
+                                               for dv in heater),
+                                               name=nm("Thermal_max_charge", timetag))
+        #Electricity balance
+        for d in days:
+            for t in time_steps:
+                timetag = nm("_", d, "_", t)
+
+                # For components without hp-tariff (p_use["bat"] referring to discharge)
+                model.addConstr(clustered["electricity"][d,t] +
+                                eh_split["eh_w/o_hp",d,t] +
+                                ch["bat",d,t] == p_grid["grid_house",d,t] +
+                                                 sum(p_use[dev,d,t]
+                                                 for dev in ("pv","bat","chp")),
+                                                 name=nm("El_bal_w/o_HPtariff", timetag))
+
+                # For components with hp-tariff (p_hp["bat"] referring to discharge)
+                model.addConstr(power["hp_air",d,t] +
+                                power["hp_geo",d,t] +
+                                eh_split["eh_w/_hp",d,t] == p_grid["grid_hp",d,t] +
+                                                            sum(p_hp[dev,d,t]
+                                                            for dev in ("pv","bat","chp")),
+                                                            name=nm("El_bal_w/_HPtariff", timetag))
+
+
+    #Split CHP and PV generation and bat discharge Power into
+    #self-consumed, sold and transferred powers
+    for d in days:
+        for t in time_steps:
+            timetag = nm("_", d, "_", t)
+
+            dev = "bat"
+            model.addConstr(dch[dev,d,t] == p_sell[dev,d,t] +
+                                            p_use[dev,d,t] +
+                                            p_hp[dev,d,t],
+                                            name=nm("power=sell+use+hp_", dev, timetag))
+
+            for dev in ("pv", "chp"):
+                model.addConstr(power[dev,d,t] == p_sell[dev,d,t] +
+                                                  p_use[dev,d,t] +
+                                                  p_hp[dev,d,t],
+                                                  name=nm("power=sell+use+hp_", dev, timetag))
+
+    # Split EH power consumption into cases with and without heat pump installed
+    dev = "eh"
+    for d in days:
+        for t in time_steps:
+            model.addConstr(power["eh",d,t] == eh_split["eh_w/o_hp",d,t] +
+                                               eh_split["eh_w/_hp",d,t])
+
+            model.addConstr(eh_split["eh_w/_hp",d,t]  <= (x["hp_air"] +
+                                                          x["hp_geo"]) *
+                                                          devs[dev]["Q_nom_max"])
+
+            model.addConstr(eh_split["eh_w/o_hp",d,t] <= (1 - x["hp_air"]
+                                                            - x["hp_geo"]) *
+                                                              devs[dev]["Q_nom_max"])
+
+    # Sold electricity from PV and battery is restricted to the rated power
+    # of the PV system. The EEG and the KfW-battery program restrict it
+    # further (see _build_eeg and _build_kfw_battery).
+    if not (options["EEG"] or options["kfw_battery"]):
+        dev = "pv"
+        for d in days:
+            for t in time_steps:
+                model.addConstr(p_sell["pv",d,t] +
+                                p_sell["bat",d,t] <= devs[dev]["p_nom"]/
+                                                     devs[dev]["area_mean"] *
+                                                     capacity[dev])
+
+def _build_shell(model, v, data, options):
+    """
+    Restructuring measures of the building shell, resulting space heating
+    demand (DIN V 4108), design heat load (DIN EN 12831) and primary energy
+    demand (EnEV).
+    """
+    nm                  = data["nm"]
+    devs                = data["devs"]
+    clustered           = data["clustered"]
+    building            = data["building"]
+    ref_building        = data["ref_building"]
+    ep_table            = data["ep_table"]
+    days                = data["days"]
+    time_steps          = data["time_steps"]
+    building_components = data["building_components"]
+    restruc_scenarios   = data["restruc_scenarios"]
+    total_shell         = data["total_shell"]
+    x                   = v["x"]
+    capacity            = v["capacity"]
+    b_TVL               = v["b_TVL"]
+    heat_mod            = v["heat_mod"]
+
+    reduce_model = options.get("reduce_model", True)
+
+    #%% Variables
+
+    # Variable for building-shell components
+    x_restruc  ={}
+    for dev in building_components:
+        for n in restruc_scenarios:
+            x_restruc[dev,n] = model.addVar(vtype="B", name=nm("x_", dev, "_", n))
+
+    # Transmission losses and real solar gains
+    # (expressions instead of variables in the reduced model)
+    Q_Ht = {}
+    Q_s = {}
+    if not reduce_model:
+        for d in days:
+            for t in time_steps:
+                Q_Ht[d,t] = model.addVar(vtype = "C", name = nm("HT_", d, "_", t))
+
+        for d in days:
+            for t in time_steps:
+                Q_s[d,t] = model.addVar(vtype = "C", name = nm("Qs_", d, "_", t))
+
+    # Primary energy demand in accordance with DIIN V 4108
+    Q_p_DIN = model.addVar(vtype = "C", name = nm("Q_p_DIN"))
+
+    # Transmission coefficient in accordance with DIN V 4108
+    H_t = model.addVar(vtype = "C", name = nm("H_t"), lb = 0)
+
+    # Deciscion if individual measure is allowed although the individual
+    # U-value is too high
+    b_ind_mea= model.addVar(vtype = "B", name = nm("b_ind_mea"))
+
+    # Variable for chosen heating concept (relevant for primary energy demand)
+    heating_concept = {}
+    lin_H_t = {}
+    for n in ep_table["ep"].keys():
+        heating_concept[n] = model.addVar(vtype = "B",
+                                          name = nm("heating_concept_", n))
+
+        lin_H_t[n] = model.addVar(vtype = "C", name = nm("lin_H_t_", n), lb = 0)
+
+    v.update({"x_restruc"       : x_restruc,
+              "Q_Ht"            : Q_Ht,
+              "Q_s"             : Q_s,
+              "Q_p_DIN"         : Q_p_DIN,
+              "H_t"             : H_t,
+              "b_ind_mea"       : b_ind_mea,
+              "heating_concept" : heating_concept,
+              "lin_H_t"         : lin_H_t})
+
+#%%Calculation of space heating in accordance with DIN V 4108
+
+    #Transmission losses for windows, wall, rooftop and ground incl. surcharge for thermal bridges
+    #as a function of the selected u-values and the temperature difference:
+
+    #It is only possible to choose one scenrio per shellpart
+    for dev in building_components:
+        model.addConstr(sum(x_restruc[dev,n] for n in restruc_scenarios) == 1)
+
+        _add_choice_set(model, options, [x_restruc[dev,n] for n in restruc_scenarios])
+
+    #In Accordance to EnEV 2009 the restructuring measures for the individual
+    #building parts have to fulfill the required U-Values. If the complete
+    #building has at least KfW-100 status, the individual building parts
+    #do not have to fulfill this criteria
+
+    for dev in building_components:
+        for n in ("retrofit", "adv_retr"):
+
+            u_ref = ref_building["U-values"][dev]
+            u_var = building["U-values"][n][dev]["U-Value"]
+
+            model.addConstr(x_restruc[dev,n] <=  u_ref / u_var + b_ind_mea)
+
+    Q_p_ref = ref_building["Q_p"]
+    H_t_ref = ref_building["H_t_spec"]
+
+    M = data["M"]["H_t_ind"]
+    model.addConstr(H_t / total_shell <= H_t_ref + (1 - b_ind_mea) * M)
+
+    M = data["M"]["Q_p_ind"]
+    model.addConstr(Q_p_DIN <= Q_p_ref + (1.0 - b_ind_mea) * M)
+
+    Fx = data["Fx"]
+
+    model.addConstr(H_t == building["dimensions"]["Area"] *
+                           (sum(building["dimensions"][dev] * Fx[dev] *
+                            sum(x_restruc[dev,n] *
+                            building["U-values"][n][dev]["U-Value"]
+                            for n in restruc_scenarios)
+                            for dev in building_components)
+                            + 0.05 * sum(building["dimensions"][dev]
+                                     for dev in building_components)))
+
+    for d in days:
+        for t in time_steps:
+            if reduce_model:
+                Q_Ht[d,t] = clustered["temp_delta"][d,t] / 1000 * H_t
+            else:
+                model.addConstr(Q_Ht[d,t] == clustered["temp_delta"][d,t] / 1000 * H_t)
+
+
+    #Ventilation Losses
+    Q_l = data["Q_l"]
+
+    #Solar Gains for all windowareas as a function of the solar radiation
+    #of the respective direction:
+
+    #Correction factors in accordance with DIN V 4108 and EnEV
+    F_solar = 0.9 * 1 * 0.7 * 0.85
+
+    for d in days:
+        for t in time_steps:
+            solar_gains = (F_solar * sum(x_restruc["Window",n] *
+                           building["U-values"][n]["Window"]["G-Value"]
+                           for n in restruc_scenarios)  *
+                           (building["dimensions"]["Window_east"] *
+                            clustered["solar_e"][d,t] +
+                            building["dimensions"]["Window_west"] *
+                            clustered["solar_w"][d,t] +
+                            building["dimensions"]["Window_north"] *
+                            clustered["solar_n"][d,t] +
+                            building["dimensions"]["Window_south"] *
+                            clustered["solar_s"][d,t]))
+
+            if reduce_model:
+                Q_s[d,t] = solar_gains
+            else:
+                model.addConstr(Q_s[d,t] == solar_gains)
+
+    # For every timestep die heating demand is calculated in considering of
+    # the transmissionen and ventilation losses as well as internal and solar gains
+    for d in days:
+        for t in time_steps:
+             model.addConstr(heat_mod[d,t] >= Q_Ht[d,t] + Q_l - Q_s[d,t] - clustered["int_gains"][d,t])
+
+             model.addConstr(heat_mod[d,t] <= Q_Ht[d,t] + Q_l)
+
+#%% Design heat load following DIN EN 12831 has to be covered
+
+    if options["Design_heat_load"]:
+
+        # Design heat load following DIN EN 12831
+        dsh = model.addVar(vtype = "C", name = nm("dsh") )
+
+        delta_temp = clustered["temp_indoor"] - clustered["temp_design"]
+
+        model.addConstr(dsh == (H_t + 0.5 * 0.34 *
+                                building["dimensions"]["Volume"] *
+                                building["dimensions"]["Area"]) *
+                                delta_temp / 1000,
+                                name = nm("dsh1"))
+
+        model.addConstr(dsh <= sum(capacity[dev]
+                                   for dev in ("boiler","chp","eh")) +
+                                   sum(capacity[hp] * devs[hp]["cop_a2w55"]
+                                   for hp in ("hp_air", "hp_geo")),
+                                   name=nm("dsh2"))
+
+#%% Primary energy demand in accordance with DIN V 4108
+
+    #Calculation of the Primary Energy demand in accordance with DIN 4108
+    #Just the Transmission losses are variable with regard to the restruction
+    #measures. Ventilation losses, internal and solar gains are determined
+    #with a static method (such as for the reference building)
+
+    #There are different heating concepts that are regaderd:
+    model.addConstr(1 == sum(heating_concept[n]
+                         for n in heating_concept.keys()))
+
+    _add_choice_set(model, options, heating_concept.values())
+
+    for n in heating_concept.keys():
+        model.addConstr(heating_concept[n] >= sum(ep_table[dev][n] * x[dev] +
+                                             (1 - ep_table[dev][n]) * (1 - x[dev])
+                                              for dev in ("boiler", "chp", "eh", "hp_air",
+                                                          "hp_geo","pellet","stc")) +
+                                              ep_table["TVL35"][n] * b_TVL["35"] +
+                                              (1 - ep_table["TVL35"][n]) *
+                                              (1 - b_TVL["35"]) - 7)
+
+    #Linearization: Product of H_t (continuous) and heating_concept (binary)
+
+    M = data["M"]["lin_H_t"]
+
+    for n in heating_concept.keys():
+        model.addConstr(lin_H_t[n] / total_shell <= M * heating_concept[n])
+        model.addConstr((H_t - lin_H_t[n]) / total_shell >= 0)
+        model.addConstr((H_t - lin_H_t[n]) / total_shell <= M * (1 - heating_concept[n]))
+
+    #Determination of the primary energy demand
+    model.addConstr(Q_p_DIN == 1/1000 * (ref_building["f_ql"] *
+                                         sum(ep_table["ep"][n] * lin_H_t[n]
+                                         for n in lin_H_t.keys()) +
+                                         ref_building["H_v"] * ref_building["f_ql"] +
+                                         ref_building["Q_tw"] - ref_building["eta"] *
+                                         (ref_building["Q_i"] + ref_building["Q_s"]) *
+                                         sum(heating_concept[n] * ep_table["ep"][n]
+                                         for n in heating_concept.keys())))
+
+def _build_bounds(model, v, data, options):
+    """
+    Demand-based bounds (see _demand_bounds) and valid inequalities for the
+    heating system.
+    """
+    nm         = data["nm"]
+    devs       = data["devs"]
+    days       = data["days"]
+    time_steps = data["time_steps"]
+    bounds     = data["bounds"]
+    x          = v["x"]
+    capacity   = v["capacity"]
+
+    for dev in bounds["capacity"].keys():
+        capacity[dev].UB = bounds["capacity"][dev]
+        for d in days:
+            for t in time_steps:
+                v["heat_nom"][dev,d,t].UB = bounds["capacity"][dev]
+
+    for dev in bounds["soc_nom"].keys():
+        v["soc_nom"][dev].UB = bounds["soc_nom"][dev]
+
+    # Heaters that are larger than the purchased TES can take at minimum
+    # part load never run and are only more expensive
+    for (dev, (cap_fix, per_soc)) in bounds["capacity_tes"].items():
+        model.addConstr(capacity[dev] <= cap_fix + per_soc *
+                                         v["soc_nom"]["tes"],
+                                         name=nm("Capacity_tes_", dev))
+
+    for dev in ("grid_house", "grid_hp"):
+        p_max = bounds["p_grid"][dev]
+        for d in days:
+            for t in time_steps:
+                if np.ndim(p_max) > 0:
+                    v["p_grid"][dev,d,t].UB = p_max[d,t]
+                else:
+                    v["p_grid"][dev,d,t].UB = p_max
+
+    # The heaters have to cover at least the design heat load of the best
+    # insulated shell
+    dsh_min = bounds["dsh_min"]
+    if dsh_min > 0:
+        model.addConstr(sum(capacity[dev] for dev in ("boiler","chp","eh")) +
+                        sum(capacity[hp] * devs[hp]["cop_a2w55"]
+                        for hp in ("hp_air", "hp_geo")) >= dsh_min)
+
+        model.addConstr(sum(x[dev] * devs[dev]["Q_nom_max"]
+                            for dev in ("boiler","chp","eh")) +
+                        sum(x[hp] * devs[hp]["Q_nom_max"] * devs[hp]["cop_a2w55"]
+                            for hp in ("hp_air", "hp_geo")) >= dsh_min)
+
+        model.addConstr(sum(x[dev] for dev in ("boiler","chp","eh",
+                                               "hp_air","hp_geo")) >= 1)
+
+#%% Economic blocks
+
+def _build_economics(model, v, data, options):
+    """
+    Investments, operation and maintenance, demand related and fixed costs,
+    revenues and CO2-emissions.
+    """
+    nm                  = data["nm"]
+    eco                 = data["eco"]
+    devs                = data["devs"]
+    clustered           = data["clustered"]
+    building            = data["building"]
+    shell_eco           = data["shell_eco"]
+    dt                  = data["dt"]
+    days                = data["days"]
+    time_steps          = data["time_steps"]
+    building_components = data["building_components"]
+    MFH                 = data["MFH"]
+    x                   = v["x"]
+    capacity            = v["capacity"]
+    energy              = v["energy"]
+    p_grid              = v["p_grid"]
+    p_sell              = v["p_sell"]
+    x_restruc           = v["x_restruc"]
+
+    #%% Variables
+
+    # Costs: There are cost-variables for investment, operation & maintenance,
+    # demand costs (fuel costs) and fix costs for electricity and gas tariffs
+
+    c_inv  = {dev: model.addVar(vtype="C", name=nm("c_inv_", dev))
+             for dev in (list(devs.keys()) + list(building_components))}
+
+    # (O&M costs are expressions of the investments in the reduced model)
+    if options.get("reduce_model", True):
+        c_om = {dev: eco["b"]["infl"] * devs[dev]["c_om_rel"] * c_inv[dev]
+                for dev in list(devs.keys())}
+    else:
+        c_om = {dev: model.addVar(vtype="C", name=nm("c_om_", dev))
+                for dev in list(devs.keys())}
+
+    c_dem  = {dev: model.addVar(vtype="C", name=nm("c_dem_", dev))
+             for dev in ("boiler", "chp", "pellet", "grid_house", "grid_hp")}
+
+    c_fix  = {dev: model.addVar(vtype="C", name=nm("c_fix_", dev))
+             for dev in ("el", "gas")}
+
+    # Revenues - with EEG, sold PV electricity is remunerated as subsidy
+    revenue = {"chp": model.addVar(vtype="C", name=nm("revenue_", "chp"))}
+    if not options["EEG"]:
+        revenue["pv"] = model.addVar(vtype="C", name=nm("revenue_", "pv"))
+
+    emission = model.addVar(vtype="C", name= nm("CO2_emission"), lb= -gp.GRB.INFINITY)
+
+    # Subsidies are added by the blocks of the respective programs
+    # (sub: different subsidy possiblities for chps)
+    v.update({"c_inv"    : c_inv,
+              "c_om"     : c_om,
+              "c_dem"    : c_dem,
+              "c_fix"    : c_fix,
+              "revenue"  : revenue,
+              "subsidy"  : {},
+              "sub"      : {},
+              "emission" : emission})
+
+    #%% Investments
+
+    #Devices
+    for dev in devs.keys():
+        model.addConstr(c_inv[dev] == eco["crf"] * devs[dev]["rval"] *
+                                     (x[dev] * (devs[dev]["c_inv_fix"] +
+                                      eco["inst_costs"]["EFH"][dev] * (1 - MFH) +
+                                      eco["inst_costs"]["MFH"][dev] * MFH) +
+                                      capacity[dev] * devs[dev]["c_inv_var"]),
+                                      name=nm("Investment_costs_", dev))
+
+    # Investment costs for restruturing measures
+    # For Rooftop, GroundFloor and Outerwall the costs are calculated in
+    # relation to the thickness of the additional insulation in comparision
+    # to the standard-scenario. The standard scenario is free of cost.
+    for dev in ("Rooftop", "GroundFloor", "OuterWall"):
+        model.addConstr(c_inv[dev] == building["dimensions"]["Area"] *
+                                      eco["crf"] * shell_eco[dev]["rval"] *
+                                      building["dimensions"][dev] *
+                                      (x_restruc[dev,"standard"] * 0 +
+                                       sum(x_restruc[dev,n] *
+                                      (shell_eco[dev]["c_const"] +
+                                       shell_eco[dev]["c_var"] * 100 *
+                                       building["U-values"][n][dev]["thick_insu_add"])
+                                       for n in ("retrofit", "adv_retr"))),
+                                       name = nm("C_inv_restruc_", dev))
+
+    # For Windows the costs are calculated in relation to the U-value of the
+    # chosen Window. The standard scenario is free of cost.
+    dev = "Window"
+    model.addConstr(c_inv[dev] == building["dimensions"]["Area"] *
+                                  eco["crf"] * shell_eco[dev]["rval"] *
+                                  building["dimensions"][dev] *
+                                  (x_restruc[dev,"standard"] * 0 +
+                                   sum(x_restruc[dev,n] *
+                                  (shell_eco[dev]["c_const"] +
+                                   shell_eco[dev]["c_var"] *
+                                   building["U-values"][n][dev]["U-Value"])
+                                   for n in ("retrofit", "adv_retr"))),
+                                   name = nm("C_inv_restruc_", dev))
+
+    #%% Operation and maintenance
+
+    if not options.get("reduce_model", True):
+        for dev in devs.keys():
+            model.addConstr(c_om[dev] == eco["b"]["infl"] * devs[dev]["c_om_rel"] * c_inv[dev])
+
+    #%% Demand related costs:
+
+    #Household Electricity
+    dev = "grid_house"
+
+    el_total_house = (dt * sum(clustered["weights"][d] * sum(p_grid[dev,d,t]
+                      for t in time_steps) for d in days) * dt)
+
+    model.addConstr(c_dem[dev] == eco["crf"] * eco["b"]["el"] *
+                                  el_total_house * eco["el"]["el_sta"]["var"][0])
+
+    #Electricity for HP
+    dev = "grid_hp"
+    el_total_hp = (dt * sum(clustered["weights"][d] * sum(p_grid[dev,d,t]
+                   for t in time_steps) for d in days) * dt)
+
+    model.addConstr(c_dem[dev] == eco["crf"] * eco["b"]["el"] *
+                                   el_total_hp * eco["el"]["el_hp"]["var"][0])
+
+    #CHP:
+    dev = "chp"
+    gas_total_chp = (dt * sum(clustered["weights"][d] * sum(energy[dev,d,t]
+                     for t in time_steps) for d in days))
+
+    model.addConstr(c_dem[dev] == eco["crf"] * eco["b"]["gas"] * gas_total_chp *
+                                 (eco["gas"]["gas_sta"]["var"][0] - eco["energy_tax"]))
+
+    #BOI
+    dev = "boiler"
+    gas_total_boi = (dt * sum(clustered["weights"][d] * sum(energy[dev,d,t]
+                     for t in time_steps) for d in days))
+
+    model.addConstr(c_dem[dev] == (eco["crf"] * eco["b"]["gas"] *
+                                   gas_total_boi * eco["gas"]["gas_sta"]["var"][0]))
+
+    #PELLET
+    dev = "pellet"
+
+    pel_total = (dt * sum(clustered["weights"][d] * sum(energy[dev,d,t]
+                 for t in time_steps) for d in days))
+
+    model.addConstr(c_dem[dev] == eco["crf"] * eco["b"]["pel"] * pel_total *
+                                  eco["pel"]["pel_sta"]["var"][0])
+
+    #%% Fixed administration costs:
+
+    # Electricity
+    model.addConstr(c_fix["el"] == eco["el"]["el_sta"]["fix"][0])
+
+    # Gas
+    model.addConstr(c_fix["gas"] == eco["gas"]["gas_sta"]["fix"][0])
+
+    #%% Revenues for selling chp-electricity to the grid
+
+    dev = "chp"
+    model.addConstr(revenue[dev] == eco["b"]["eex"] * eco["crf"] * dt *
+                                    eco["price_sell_el"] *
+                                    sum(clustered["weights"][d] *
+                                    sum(p_sell[dev,d,t]
+                                    for t in time_steps)
+                                    for d in days),
+                                    name=nm("Feed_in_rev_", dev))
+
+    #%% Revenues for selling pv-electricity without EEG
+
+    if not options["EEG"]:
+        dev = "pv"
+        model.addConstr(revenue[dev] == eco["b"]["eex"] * eco["crf"] *
+                                        eco["price_sell_el"] *
+                                        sum(clustered["weights"][d] *
+                                        sum(p_sell[dev,d,t]
+                                        for t in time_steps)
+                                        for d in days) * dt,
+                                        name=nm("Feed_in_rev_", dev))
+
+    #%% CO2-Emissions
+
+    emission_pellet = eco["pel"]["pel_sta"]["emi"] * pel_total
+
+    emissions_gas = eco["gas"]["gas_sta"]["emi"] * (gas_total_chp + gas_total_boi)
+
+    emissions_grid = eco["el"]["el_sta"]["emi"] * (el_total_hp + el_total_house)
+
+    emissions_feedin = 0.566 * sum(clustered["weights"][d] * dt *
+                               sum(sum(p_sell[dev,d,t]
+                               for dev in ("pv","bat","chp"))
+                               for t in time_steps) for d in days)
+
+    model.addConstr(emission == emission_pellet +
+                                emissions_gas +
+                                emissions_grid -
+                                emissions_feedin)
+
+#%% Subsidy blocks
+
+def _add_pv_feed_in_limit(model, v, data, program, share):
+    """
+    Restrict sold electricity from PV and battery to (1 - share) of the rated
+    PV power if the subsidy program is used (b_pv_power[program] = 1).
+    """
+    nm         = data["nm"]
+    devs       = data["devs"]
+    days       = data["days"]
+    time_steps = data["time_steps"]
+    A_max      = data["A_max"]
+    capacity   = v["capacity"]
+    p_sell     = v["p_sell"]
+
+    v.setdefault("lin_pv_power", {})
+    v.setdefault("b_pv_power", {})
+
+    lin_pv_power = v["lin_pv_power"]
+    b_pv_power   = v["b_pv_power"]
+
+    lin_pv_power[program] = model.addVar(vtype="C", name = nm("lin_pv_power_", program))
+    b_pv_power[program]   = model.addVar(vtype="B", name = nm("b_pv_power_", program))
+
+    dev = "pv"
+
+    for d in days:
+        for t in time_steps:
+            model.addConstr(p_sell["pv",d,t] +
+                            p_sell["bat",d,t] <= devs[dev]["p_nom"]/
+                                                 devs[dev]["area_mean"] *
+                                                 (capacity[dev] - share *
+                                                  lin_pv_power[program]))
+
+    # Linearization of b_pv_power[program] * capacity["pv"]
+    i = program
+    model.addConstr(lin_pv_power[i] <= A_max * b_pv_power[i])
+    model.addConstr(lin_pv_power[i] >= devs[dev]["area_min"] * b_pv_power[i])
+    model.addConstr(capacity[dev] - lin_pv_power[i] >= 0)
+    model.addConstr(capacity[dev] - lin_pv_power[i] <= (1 - b_pv_power[i]) * A_max)
+
+def _build_eeg(model, v, data, options):
+    """
+    Feed-in tariff for PV in accordance with the EEG.
+    """
+    nm         = data["nm"]
+    eco        = data["eco"]
+    devs       = data["devs"]
+    clustered  = data["clustered"]
+    sub_par    = data["sub_par"]
+    dt         = data["dt"]
+    days       = data["days"]
+    time_steps = data["time_steps"]
+    A_max      = data["A_max"]
+    x          = v["x"]
+    p_sell     = v["p_sell"]
+    pv_power   = v["pv_power"]
+    subsidy    = v["subsidy"]
+
+    pv_powerstages = ("10","40","750","10000")
+    tiers = options.get("tier_formulation", "big_m")
+
+    #%% Variables
+
+    b_eeg = {}
+    for powerstep in pv_powerstages:
+        b_eeg[powerstep] = model.addVar(vtype="B",
+                                        name=nm("b_eeg_", powerstep))
+
+    p_sell_pv = {}
+    for powerstep in ("total",) + pv_powerstages:
+        p_sell_pv[powerstep] = model.addVar(vtype="C",
+                                        name=nm("p_sell_pv_", powerstep))
+
+    subsidy["pv"] = model.addVar(vtype="C", name=nm("subsidy_", "pv"))
+
+    v.update({"b_eeg"     : b_eeg,
+              "p_sell_pv" : p_sell_pv})
+
+    #%% Constraints
+
+    # Restrict sold electricity from PV to 70% of the rated power
+    _add_pv_feed_in_limit(model, v, data, "eeg", 0.3)
+    b_pv_power = v["b_pv_power"]
+
+    # Annual energy in scaled units
+    s_E = data["scale"]["energy"]
+
+    dev = "pv"
+    # Sold electricity from PV
+    model.addConstr(p_sell_pv["total"] == s_E * sum(clustered["weights"][d] *
+                                          sum(p_sell[dev,d,t]
+                                          for t in time_steps)
+                                          for d in days) * dt)
+
+    model.addConstr(b_pv_power["eeg"] <= x["pv"])
+
+    # Differentiation of funding rate depending on installed PV-power
+    model.addConstr(pv_power <= sum(float(n) * b_eeg[n]
+                                for n in pv_powerstages))
+
+    model.addConstr(x[dev] >= sum(b_eeg[n] for n in pv_powerstages))
+
+    _add_choice_set(model, options, [b_eeg[n] for n in pv_powerstages])
+
+    model.addConstr(p_sell_pv["total"] == sum(p_sell_pv[n]
+                                              for n in pv_powerstages))
+
+    #Calculate max. annual PV-Electricity for available Rooftoparea
+    irr_ann = np.sum(clustered["weights"] *
+                     np.sum(clustered["solar_roof"], axis = 1)) #kwh/m²
+
+    eta_max_pv = np.max(devs["pv"]["eta_el"]) #%
+
+    p_pv_max = irr_ann * A_max * eta_max_pv #kWh/a
+
+    # Electricity is only sold in the chosen power stage
+    # big_m:     linear bound on p_sell_pv[n]
+    # indicator: p_sell_pv[n] = 0 if the stage is not chosen
+    for n in pv_powerstages:
+        if tiers == "indicator":
+            model.addGenConstrIndicator(b_eeg[n], False,
+                                        p_sell_pv[n], gp.GRB.LESS_EQUAL, 0,
+                                        name=nm("EEG_stage_", n))
+        else:
+            model.addConstr(p_sell_pv[n]  <=  s_E * p_pv_max * b_eeg[n])
+
+    # If EEG is available: subsidy instead of revenue
+    # Calculation of total earnings from sold electricity
+    model.addConstr(subsidy[dev] == eco["crf"] * sub_par["eeg_temp"] / s_E *
+                                    sum(p_sell_pv[n] * sub_par["eeg"][n]
+                                    for n in pv_powerstages),
+                                    name=nm("Feed_in_rev_", dev))
+
+    if tiers == "indicator":
+        model.addGenConstrIndicator(b_pv_power["eeg"], False,
+                                    subsidy[dev], gp.GRB.LESS_EQUAL, 0,
+                                    name=nm("EEG_limit_", dev))
+    else:
+        M = (eco["crf"] * sub_par["eeg_temp"] * p_pv_max *
+             sub_par["eeg"]["10"])
+
+        model.addConstr(subsidy[dev] <= M * b_pv_power["eeg"])
+
+def _build_kfw_battery(model, v, data, options):
+    """
+    KfW-Subsidy for Battery (KfW 275).
+    """
+    nm         = data["nm"]
+    eco        = data["eco"]
+    devs       = data["devs"]
+    sub_par    = data["sub_par"]
+    A_max      = data["A_max"]
+    x          = v["x"]
+    c_inv      = v["c_inv"]
+    pv_power   = v["pv_power"]
+    subsidy    = v["subsidy"]
+
+    dev = "bat"
+
+    subsidy[dev] = model.addVar(vtype="C", name=nm("subsidy_", dev))
+
+    # Restrict sold electricity from PV to 50% of the rated power
+    _add_pv_feed_in_limit(model, v, data, "kfw", 0.5)
+    b_pv_power = v["b_pv_power"]
+
+    model.addConstr(b_pv_power["kfw"] <= x["bat"])
+
+    M = (eco["crf"] * A_max *
+         devs["pv"]["p_nom"] /
+         devs["pv"]["area_mean"] *
+         sub_par["bat"]["share_max"] *
+         sub_par["bat"]["sub_bat_max"])
+
+    model.addConstr(subsidy[dev] <= M * b_pv_power["kfw"])
+
+    model.addConstr(subsidy[dev] <= eco["crf"] *
+                                    sub_par["bat"]["share_max"] *
+                                    sub_par["bat"]["sub_bat_max"] *
+                                    pv_power,
+                                    name=nm("Bat_Subsidies_1"))
+
+    model.addConstr(subsidy[dev] <= c_inv["pv"] + c_inv["bat"] -
+                                    eco["crf"] *
+                                    sub_par["bat"]["share_max"] *
+                                    sub_par["bat"]["sub_bat"] *
+                                    pv_power,
+                                    name=nm("Bat_Subsidies_2"))
+
+def _build_kwkg(model, v, data, options):
+    """
+    Remuneration of CHP electricity in accordance with the KWKG.
+    """
+    nm         = data["nm"]
+    eco        = data["eco"]
+    devs       = data["devs"]
+    clustered  = data["clustered"]
+    sub_par    = data["sub_par"]
+    dt         = data["dt"]
+    days       = data["days"]
+    time_steps = data["time_steps"]
+    capacity   = v["capacity"]
+    p_use      = v["p_use"]
+    p_sell     = v["p_sell"]
+    p_hp       = v["p_hp"]
+    sub        = v["sub"]
+
+    #%% Variables
+
+    p_chp_total = {}
+    for usage in ("use","sell","total"):
+        p_chp_total[usage] = model.addVar(vtype = "C",
+                                        name =nm("p_chp_total_", usage))
+
+    sub_kwkg_temp = model.addVar(vtype="C", name = nm("sub_kwkg_temp"), lb = 0)
+
+    b_kwkg = {}
+    lin_kwkg_1 = {}
+    lin_kwkg_2 = {}
+    for n in sub_par["kwkg"]["vls"].keys():
+        b_kwkg[n] = model.addVar(vtype="B", name=nm("b_sub_kwkg_", n))
+        lin_kwkg_1[n] = model.addVar(vtype = "C", name = nm("lin_kwkg_1_", n), lb = 0)
+        lin_kwkg_2[n] = model.addVar(vtype = "C", name = nm("lin_kwkg_2_", n), lb = 0)
+
+    sub["kwkg"] = model.addVar(vtype="C", name=nm("sub_", "kwkg"))
+
+    v.update({"p_chp_total"   : p_chp_total,
+              "sub_kwkg_temp" : sub_kwkg_temp,
+              "b_kwkg"        : b_kwkg,
+              "lin_kwkg_1"    : lin_kwkg_1,
+              "lin_kwkg_2"    : lin_kwkg_2})
+
+    #%% Constraints
+
+    # Annual energy and payments in scaled units
+    s_E = data["scale"]["energy"]
+    s_C = data["scale"]["payment"]
+
+    dev = "chp"
+
+    # Total electricity produced by CHP per year
+    model.addConstr(p_chp_total["total"] == s_E * dt * sum(clustered["weights"][d] *
+                                                 sum(p_sell[dev,d,t] +
+                                                     p_use[dev,d,t] +
+                                                     p_hp[dev,d,t]
+                                                     for t in time_steps)
+                                                     for d in days))
+
+    # Self consumed electricity from CHP
+    model.addConstr(p_chp_total["use"] == s_E * dt * sum(clustered["weights"][d] *
+                                               sum(p_use[dev,d,t] +
+                                                   p_hp[dev,d,t]
+                                                   for t in time_steps)
+                                                   for d in days))
+
+    # Sold electricity from CHP
+    model.addConstr(p_chp_total["sell"] == s_E * dt * sum(clustered["weights"][d] *
+                                                sum(p_sell[dev,d,t]
+                                                for t in time_steps)
+                                                for d in days))
+
+    # Differentiation between discrete categories of full load hours
+    model.addConstr(sum(b_kwkg[n] for n in b_kwkg.keys()) <= 1)
+
+    _add_choice_set(model, options, b_kwkg.values())
+
+    # Constant annual payment - In the following the interest effect
+    # has to be considered!
+    model.addConstr(sub_kwkg_temp == s_C / s_E *
+                                    (p_chp_total["use"] *
+                                     sub_par["kwkg"]["self_50"] +
+                                     p_chp_total["sell"] *
+                                     sub_par["kwkg"]["sell_50"]))
+
+    # Here the full load hours per year are determined
+    # The amount of full load hours per year decides in how many years
+    # the kwkg-subsidy is paid
+    model.addConstr(p_chp_total["total"] <= s_E * sum(lin_kwkg_1[n] *
+                                                sub_par["kwkg"]["vls"][n]
+                                                for n in sub_par["kwkg"]["vls"].keys()))
+
+    # Products of the category and the electrical capacity (part 1) or the
+    # constant annual payment (part 2)
+    # big_m:     linearization with three constraints
+    # indicator: the product equals the factor in the chosen category and
+    #            is zero in all others
+    if options.get("tier_formulation", "big_m") == "indicator":
+        for n in b_kwkg.keys():
+            model.addGenConstrIndicator(b_kwkg[n], True,
+                                        devs["chp"]["sigma"] * capacity["chp"] -
+                                        lin_kwkg_1[n], gp.GRB.EQUAL, 0,
+                                        name=nm("KWKG_cap_on_", n))
+            model.addGenConstrIndicator(b_kwkg[n], False,
+                                        lin_kwkg_1[n], gp.GRB.LESS_EQUAL, 0,
+                                        name=nm("KWKG_cap_off_", n))
+
+            model.addGenConstrIndicator(b_kwkg[n], True,
+                                        sub_kwkg_temp - lin_kwkg_2[n],
+                                        gp.GRB.EQUAL, 0,
+                                        name=nm("KWKG_sub_on_", n))
+            model.addGenConstrIndicator(b_kwkg[n], False,
+                                        lin_kwkg_2[n], gp.GRB.LESS_EQUAL, 0,
+                                        name=nm("KWKG_sub_off_", n))
+    else:
+        #Linearization part 1: b_kwkg[n] * capacity["chp"]
+        U = data["M"]["kwkg_cap"]
+        for n in b_kwkg.keys():
+            model.addConstr(lin_kwkg_1[n] <= U * b_kwkg[n])
+            model.addConstr(devs["chp"]["sigma"] * capacity["chp"] - lin_kwkg_1[n] >= 0)
+            model.addConstr(devs["chp"]["sigma"] * capacity["chp"] - lin_kwkg_1[n] <= U * (1-b_kwkg[n]))
+
+        #Linearization part 2: b_kwkg[n] * sub_kwkg_temp
+        U = s_C * data["M"]["kwkg_sub"]
+        for n in b_kwkg.keys():
+            model.addConstr(lin_kwkg_2[n] <= U * b_kwkg[n])
+            model.addConstr(sub_kwkg_temp - lin_kwkg_2[n] >= 0)
+            model.addConstr(sub_kwkg_temp - lin_kwkg_2[n] <= U * (1-b_kwkg[n]))
+
+    # Here the correct annuity is determined (incl. interest effect)
+    model.addConstr(sub["kwkg"] == eco["crf"] / s_C * sum(lin_kwkg_2[n] *
+                                                    sub_par["kwkg"]["i"][n]
+                                                    for n in sub_par["kwkg"]["i"].keys()))
+
+def _build_bafa_chp(model, v, data, options):
+    """
+    BAFA-Subsidy for Mirco-CHP.
+
+    Program has three parts: basic-subsidy, thermal-efficiency-bonus and
+    power-efficiency-bonus - Further informations:
+    http://www.bafa.de/DE/Energie/Energieeffizienz/Kraft_Waerme_Kopplung/Mini_KWK/mini_kwk_node.html
+    """
+    nm         = data["nm"]
+    eco        = data["eco"]
+    devs       = data["devs"]
+    sub_par    = data["sub_par"]
+    x          = v["x"]
+    capacity   = v["capacity"]
+    sub        = v["sub"]
+
+    #%% Variables
+
+    x_chp = {}
+    for dev in ("micro","mini","large"):
+        x_chp[dev] = model.addVar(vtype="B", name=nm("x_chp_", dev))
+
+    chp_powerstep = {}
+    for i in range (1,5):
+        chp_powerstep[i] = model.addVar(vtype = "C",
+                                     name = nm("kwk_powerstep", i), lb = 0)
+
+    sub_chp_basic = model.addVar(vtype="C", name=nm("sub_chp_basic"), lb = 0 )
+
+    sub["bafa"] = model.addVar(vtype="C", name=nm("sub_", "bafa"))
+
+    v.update({"x_chp"         : x_chp,
+              "chp_powerstep" : chp_powerstep,
+              "sub_chp_basic" : sub_chp_basic})
+
+    #%% Constraints
+
+    dev = "chp"
+
+    # Only devices with p_el <= 20 kW can achieve a subsidy
+    # For the modeling we distinguish betweeen three power-categories:
+    # micro: < 1kW, mini: 1 - 20 kW, large: >20kW
+
+    model.addConstr(x["chp"] == x_chp["micro"] +
+                                x_chp["mini"] +
+                                x_chp["large"],
+                                name = nm("chp_size"))
+
+    power_chp = capacity[dev] * devs[dev]["sigma"]
+
+    model.addConstr(power_chp <= 1 * x_chp["micro"] +
+                                20 * x_chp["mini"] +
+                               100 * x_chp["large"],
+                                 name = nm("chp_sum_powerstep_ub"))
+
+    model.addConstr(power_chp >= sum(chp_powerstep[i]
+                                 for i in chp_powerstep.keys()),
+                                 name = nm("chp_sum_powerstep"))
+
+    model.addConstr(chp_powerstep[1] == 1 * x_chp["mini"],
+                                        name = nm("chp_powerstep1"))
+
+    model.addConstr(chp_powerstep[2] <= 3 * x_chp["mini"],
+                                        name = nm("chp_powerstep1"))
+
+    model.addConstr(chp_powerstep[3] <= 6 * x_chp["mini"],
+                                        name = nm("chp_powerstep2"))
+
+    model.addConstr(chp_powerstep[4] <= 10 * x_chp["mini"],
+                                        name = nm("chp_powerstep3"))
+
+    # Bounds for Basic CHP Subsidy
+    model.addConstr(sub_chp_basic <= sub_par["bafa_chp"]["sub_basic_max"] *
+                                     x_chp["mini"] +
+                                     sub_par["bafa_chp"]["sub_step_1"] *
+                                     x_chp["micro"],
+                                     name = nm("chp_sub_basic_ub"))
+
+    model.addConstr(sub_chp_basic <= sub_par["bafa_chp"]["sub_step_1"] *
+                                     (x_chp["micro"] + chp_powerstep[1]) +
+                                     sub_par["bafa_chp"]["sub_step_2"] *
+                                     chp_powerstep[2] +
+                                     sub_par["bafa_chp"]["sub_step_3"] *
+                                     chp_powerstep[3] +
+                                     sub_par["bafa_chp"]["sub_step_4"] *
+                                     chp_powerstep[4],
+                                     name = nm("chp_sub_basic_calcutation"))
+
+    # Calculate annual subsidy value
+    model.addConstr(sub["bafa"] == eco["crf"] * devs[dev]["rval"] *
+                                   sub_chp_basic * (1 +
+                                   sub_par["bafa_chp"]["share_therm_eff"] *
+                                   devs[dev]["therm_eff_bonus"] +
+                                   sub_par["bafa_chp"]["share_elec_eff"] *
+                                   devs[dev]["power_eff_bonus"]),
+                                   name = nm("chp_bafa_total_calculation"))
+
+def _build_kfw_standards(model, v, data, options):
+    """
+    Classification of the building as KfW-efficiency-building.
+
+    There are two restrictions for subsidies for kfw-efficiency-buildings:
+    Specific transmission losses and primary energy demand have to be lower
+    than the respective values for an reference building. The
+    "efficiency-factor" differentiates between the different levels of
+    kfw-efficiency buildings.
+    """
+    nm            = data["nm"]
+    ref_building  = data["ref_building"]
+    sub_par       = data["sub_par"]
+    kfw_standards = data["kfw_standards"]
+    total_shell   = data["total_shell"]
+    H_t           = v["H_t"]
+    Q_p_DIN       = v["Q_p_DIN"]
+
+    # Variable if restrictions for renovation programmes are satisfied
+    v.setdefault("b_sub_restruc", {})
+    b_sub_restruc = v["b_sub_restruc"]
+    for dev in kfw_standards:
+        b_sub_restruc[dev] = model.addVar(vtype = "B", name = nm("b_sub_restruc", dev))
+
+    for dev in kfw_standards:
+        M = data["M"]["H_t_kfw"][dev]
+        model.addConstr(H_t / total_shell <=
+                        sub_par["building"]["eff_fact_H"][dev] *
+                        ref_building["H_t_spec"] +
+                        (1.0 - b_sub_restruc[dev]) * M)
+
+    for dev in kfw_standards:
+        M = data["M"]["Q_p_kfw"][dev]
+        model.addConstr(Q_p_DIN <= sub_par["building"]["eff_fact_Q"][dev] *
+                                   ref_building["Q_p"] +
+                                   (1 - b_sub_restruc[dev]) * M)
+
+    #Just one Subsidy-Package is available
+    model.addConstr(1 >= sum(b_sub_restruc[n]
+                         for n in kfw_standards))
+
+def _build_kfw_single_mea(model, v, data, options):
+    """
+    KfW-Subsidies for individual measures.
+    """
+    nm                  = data["nm"]
+    eco                 = data["eco"]
+    building            = data["building"]
+    shell_eco           = data["shell_eco"]
+    sub_par             = data["sub_par"]
+    building_components = data["building_components"]
+    restruc_scenarios   = data["restruc_scenarios"]
+    kfw_standards       = data["kfw_standards"]
+    MFH                 = data["MFH"]
+    x_restruc           = v["x_restruc"]
+    c_inv               = v["c_inv"]
+    subsidy             = v["subsidy"]
+
+    # Variable if restrictions for renovation programmes are satisfied
+    v.setdefault("b_sub_restruc", {})
+    b_sub_restruc = v["b_sub_restruc"]
+    for dev in building_components:
+        b_sub_restruc[dev] = model.addVar(vtype = "B", name = nm("b_sub_restruc", dev))
+
+        subsidy[dev] = model.addVar(vtype="C", name=nm("subsidy_", dev))
+
+    #Subsidy is only available if chosen restruction scenario satisfies the necessary Standard
+    for dev in building_components:
+        M = data["M"]["U_ind"][dev]
+        model.addConstr(sum(x_restruc[dev,n] *
+                            building["U-values"][n][dev]["U-Value"]
+                            for n in restruc_scenarios) <= sub_par["building"]["u_value"][dev] +
+                                                           (1 - b_sub_restruc[dev]) * M)
+
+    #5000€ grant for every individual measure but max. 10% of the respective investment
+    for dev in building_components:
+
+        grant = sub_par["building"]["grant"]["ind_mea"]
+
+        model.addConstr(subsidy[dev] <= eco["crf"] * shell_eco[dev]["rval"] *
+                                        b_sub_restruc[dev] * grant * (1-MFH))
+
+        share_max = sub_par["building"]["share_max"]["ind_mea"]
+
+        model.addConstr(subsidy[dev] <= c_inv[dev] * share_max)
+
+    #Either subsidies for individual measurers OR for efficiency buildings
+    if all(n in b_sub_restruc for n in kfw_standards):
+        for dev in building_components:
+            model.addConstr(1 >= b_sub_restruc[dev] +
+                                 sum(b_sub_restruc[n]
+                                 for n in kfw_standards))
+
+def _build_kfw_eff_buildings(model, v, data, options):
+    """
+    KfW-Subsides for Efficient Buildings (KfW-Effizienzhaeuser).
+    """
+    nm                  = data["nm"]
+    eco                 = data["eco"]
+    shell_eco           = data["shell_eco"]
+    sub_par             = data["sub_par"]
+    building_components = data["building_components"]
+    kfw_standards       = data["kfw_standards"]
+    MFH                 = data["MFH"]
+    c_inv               = v["c_inv"]
+    b_sub_restruc       = v["b_sub_restruc"]
+    subsidy             = v["subsidy"]
+
+    for dev in kfw_standards:
+
+        subsidy[dev] = model.addVar(vtype="C", name=nm("subsidy_", dev))
+
+        grant = sub_par["building"]["grant"][dev]
+
+        model.addConstr(subsidy[dev] <= eco["crf"] * shell_eco["Window"]["rval"] *
+                                        b_sub_restruc[dev] * grant * (1 - MFH))
+
+        model.addConstr(subsidy[dev] <= sub_par["building"]["share_max"][dev] *
+                                        sum(c_inv[n] for n in building_components))
+
+def _build_bafa_stc(model, v, data, options):
+    """
+    MAP-Subsidy for STC.
+
+    The "Marktanreizprogramm" MAP is a subsidy-program for STC by BAFA
+    The prorgam has three parts: basic, innovation and additional subsidy
+    Further Information:
+    http://www.bafa.de/DE/Energie/Heizen_mit_Erneuerbaren_Energien/Solarthermie/solarthermie_node.html
+    """
+    nm            = data["nm"]
+    eco           = data["eco"]
+    devs          = data["devs"]
+    params        = data["params"]
+    sub_par       = data["sub_par"]
+    A_max         = data["A_max"]
+    alpha         = data["alpha"]
+    MFH           = data["MFH"]
+    x             = v["x"]
+    capacity      = v["capacity"]
+    b_sub_restruc = v["b_sub_restruc"]
+    subsidy       = v["subsidy"]
+
+    #%% Variables
+
+    b_bafa_stc = {}
+    for i in ("basic_fix","basic_var","inno","add1"):
+        b_bafa_stc[i] = model.addVar(vtype = "B", name = nm("b_bafa_stc_", i))
+
+    sub_bafa_stc = {}
+    for i in ("basic_var", "basic_fix", "inno", "build_eff"):
+        sub_bafa_stc[i] = model.addVar(vtype = "C",
+                                      name = nm("sub_bafa_stc_", i), lb = 0)
+
+    lin_sub_stc = model.addVar(vtype = "C",
+                        name = nm("lin_sub_stc"), lb = 0, ub = A_max)
+
+    dev = "stc"
+    subsidy[dev] = model.addVar(vtype="C", name=nm("subsidy_", dev))
+
+    v.update({"b_bafa_stc"   : b_bafa_stc,
+              "sub_bafa_stc" : sub_bafa_stc,
+              "lin_sub_stc"  : lin_sub_stc})
+
+    #%% Constraints
+
+    #It is only possible to get either basic_fix, basic_var or inno
+    model.addConstr(x["stc"] >= b_bafa_stc["basic_fix"] +
+                                b_bafa_stc["basic_var"] +
+                                b_bafa_stc["inno"],
+                                name = nm("stc_bafa_x_stc"))
+
+    model.addConstr(x["tes"] >= b_bafa_stc["basic_fix"] +
+                                b_bafa_stc["basic_var"] +
+                                b_bafa_stc["inno"],
+                                name = nm("stc_bafa_x_tes"))
+
+    #Thermal storage restriction
+    #At least 50 l/m² are necessary
+    model.addConstr(capacity["tes"] *
+                    params["rho_w"] >= sub_par[dev]["min_storage"] *
+                                       lin_sub_stc,
+                                       name = nm("stc_bafa_tes_restr"))
+
+    # Linearization for storage constraint
+    model.addConstr(lin_sub_stc <= A_max * (b_bafa_stc["basic_fix"] +
+                                            b_bafa_stc["basic_var"] +
+                                            b_bafa_stc["inno"]),
+                                            name = nm("stc_bafa_lin_1"))
+
+    model.addConstr(capacity[dev] - lin_sub_stc >= 0,
+                                            name = nm("stc_bafa_lin_2"))
+
+    model.addConstr(capacity[dev] - lin_sub_stc <=  A_max * (1 -
+                                            (b_bafa_stc["basic_fix"] +
+                                             b_bafa_stc["basic_var"] +
+                                             b_bafa_stc["inno"])),
+                                             name = nm("stc_bafa_lin_3"))
+
+    #Basic program
+    #Area restriction
+    #At least 9 m² are necessary
+    model.addConstr(capacity[dev] / sub_par[dev]["basic_area_min"] >=
+                                            (b_bafa_stc["basic_var"] +
+                                             b_bafa_stc["basic_fix"]),
+                                             name = nm("stc_bafa_basic_area_restr"))
+
+    #Just for old buildings
+    model.addConstr(sub_bafa_stc["basic_fix"] <= sub_par[dev]["basic_fix"] *
+                                                 b_bafa_stc["basic_fix"] *
+                                                 alpha,
+                                                 name = nm("stc_bafa_basic_fix"))
+
+    model.addConstr(sub_bafa_stc["basic_var"] <= sub_par[dev]["basic_var"] *
+                                                 capacity[dev],
+                                                 name = nm("stc_bafa_basic_var"))
+
+    model.addConstr(sub_bafa_stc["basic_var"] <= sub_par[dev]["basic_var"] *
+                                                 sub_par[dev]["basic_area_max"] *
+                                                 b_bafa_stc["basic_var"] *
+                                                 alpha,
+                                                 name = nm("stc_bafa_basic_ub"))
+
+    #Innovation prorgram
+    #Annual gain restriction
+    #At least 300kWh/m2 are necessary
+    model.addConstr(float(devs[dev]["annual_gain"]) >= sub_par[dev]["annual_gain"] *
+                                                       b_bafa_stc["inno"],
+                                                       name = nm("stc_bafa_gain_restr"))
+
+    #Area restriction
+    #At least 20 m² are necessary
+    model.addConstr(b_bafa_stc["inno"] <= capacity[dev] /
+                                          sub_par[dev]["inno_area_min"],
+                                          name = nm("stc_bafa_inno_area_restr"))
+
+    #Program only available for MFH
+    model.addConstr(sub_bafa_stc["inno"] <= (sub_par["stc"]["inno_new_b"] +
+                                             sub_par["stc"]["inno_existing_b"] *
+                                             alpha) * capacity[dev] * MFH,
+                                             name = nm("stc_bafa_inno_var"))
+
+    model.addConstr(sub_bafa_stc["inno"] <= (sub_par["stc"]["inno_new_b"] +
+                                             sub_par["stc"]["inno_existing_b"] *
+                                             alpha) * b_bafa_stc["inno"] * MFH *
+                                             sub_par["stc"]["inno_area_max"],
+                                             name = nm("stc_bafa_inno_ub"))
+
+    #Additional program
+    #STC in combination with HP is necessary
+    model.addConstr(x["stc"] >= b_bafa_stc["add1"], name = nm("stc_bafa_add_1"))
+
+    model.addConstr(x["hp_air"] + x["hp_geo"] >= b_bafa_stc["add1"],
+                                                 name = nm("stc_bafa_add_2"))
+
+    #Additional program only available if basic or inno program available
+    model.addConstr(b_bafa_stc["add1"] <= (b_bafa_stc["basic_fix"] +
+                                           b_bafa_stc["basic_var"] +
+                                           b_bafa_stc["inno"]),
+                                           name = nm("stc_bafa_add_3"))
+
+    #Additional Building-Efficiency-Subsidy
+    M = A_max * (sub_par["stc"]["inno_new_b"] + sub_par["stc"]["inno_existing_b"] * alpha)
+
+    model.addConstr(sub_bafa_stc["build_eff"] <= M * b_sub_restruc["kfw_eff_55"],
+                                                 name = nm("stc_bafa_b_e_1"))
+
+    model.addConstr(sub_bafa_stc["build_eff"] <= sub_par[dev]["build_eff"] *
+                                                (sub_bafa_stc["inno"] +
+                                                 sub_bafa_stc["basic_fix"] +
+                                                 sub_bafa_stc["basic_var"]),
+                                                 name = nm("stc_bafa_b_e_2"))
+
+    #Calculation of annaul subsid value
+    model.addConstr(subsidy[dev] == eco["crf"] * devs[dev]["rval"] *
+                                     (sub_bafa_stc["basic_fix"] +
+                                      sub_bafa_stc["basic_var"] +
+                                      sub_bafa_stc["inno"] +
+                                      b_bafa_stc["add1"] *
+                                      sub_par[dev]["stc_hp_combi"] +
+                                      sub_bafa_stc["build_eff"]),
+                                      name = nm("stc_bafa_total_value"))
+
+def _build_bafa_hp(model, v, data, options):
+    """
+    MAP-Subsidy for HP.
+
+    The "Marktanreizprogramm" MAP is a subsidy-program for HP by BAFA
+    The prorgam has three parts: basic, innovation and additional subsidy
+    Further Information:
+    http://www.bafa.de/DE/Energie/Heizen_mit_Erneuerbaren_Energien/Waermepumpen/waermepumpen_node.html
+    """
+    nm            = data["nm"]
+    eco           = data["eco"]
+    devs          = data["devs"]
+    clustered     = data["clustered"]
+    params        = data["params"]
+    sub_par       = data["sub_par"]
+    dt            = data["dt"]
+    days          = data["days"]
+    time_steps    = data["time_steps"]
+    alpha         = data["alpha"]
+    x             = v["x"]
+    capacity      = v["capacity"]
+    heat          = v["heat"]
+    power         = v["power"]
+    b_sub_restruc = v["b_sub_restruc"]
+    subsidy       = v["subsidy"]
+
+    #%% Variables
+
+    lin_hp_sub_basic = {}
+    for dev in ("hp_air", "hp_geo"):
+        lin_hp_sub_basic[dev] = model.addVar(vtype="C",
+                                      name=nm("lin_hp_sub_basic_", dev), lb = 0)
+
+    lin_hp_sub_inno = {}
+    for dev in ("hp_air", "hp_geo"):
+        lin_hp_sub_inno[dev] = model.addVar(vtype="C",
+                                       name=nm("lin_hp_sub_inno_", dev), lb = 0)
+
+    lin_hp_sub_add = {}
+    for dev in ("hp_air", "hp_geo"):
+        lin_hp_sub_add[dev] = model.addVar(vtype="C",
+                                        name=nm("lin_hp_sub_add_", dev), lb = 0)
+
+    b_bafa_hp= {}
+    for dev in ("hp_air", "hp_geo"):
+        b_bafa_hp[dev] = {}
+        for i in ("basic_fix", "basic_var", "inno_var", "inno_fix", "add1"):
+            b_bafa_hp[dev][i] = model.addVar(vtype = "B",
+                                                name = nm("b_bafa_", dev, "_", i))
+
+    sub_bafa_hp = {}
+    for dev in ("hp_air", "hp_geo"):
+        sub_bafa_hp[dev] = {}
+        for i in ("basic", "inno", "build_eff"):
+            sub_bafa_hp[dev][i] = model.addVar(vtype = "C",
+                                      name = nm("sub_bafa_", dev, "_", i), lb = 0)
+
+    energy_hp = {}
+    for dev in ("hp_air", "hp_geo"):
+        energy_hp[dev] = {}
+        for i in ("total_heat", "total_power"):
+            energy_hp[dev][i] = model.addVar(vtype = "C",
+                                     name = nm("energy_hp_", dev, "_", i), lb = 0)
+
+    for dev in ("hp_air", "hp_geo"):
+        subsidy[dev] = model.addVar(vtype="C", name=nm("subsidy_", dev))
+
+    v.update({"lin_hp_sub_basic" : lin_hp_sub_basic,
+              "lin_hp_sub_inno"  : lin_hp_sub_inno,
+              "lin_hp_sub_add"   : lin_hp_sub_add,
+              "b_bafa_hp"        : b_bafa_hp,
+              "sub_bafa_hp"      : sub_bafa_hp,
+              "energy_hp"        : energy_hp})
+
+    #%% Constraints
+
+    # Annual energy in scaled units
+    s_E = data["scale"]["energy"]
+
+    for dev in ("hp_air", "hp_geo"):
+
+        model.addConstr(energy_hp[dev]["total_heat"] == s_E * dt *
+                                          sum(clustered["weights"][d] *
+                                          sum(heat[dev,d,t]
+                                          for t in time_steps)
+                                          for d in days))
+
+        model.addConstr(energy_hp[dev]["total_power"] == s_E * dt *
+                                          sum(clustered["weights"][d] *
+                                          sum(power[dev,d,t]
+                                          for t in time_steps)
+                                          for d in days))
+
+        #It is only possible to get either basic_fix, basic_var,
+        #inno_fix or inno_var
+        model.addConstr(x[dev] >= b_bafa_hp[dev]["basic_fix"] +
+                                  b_bafa_hp[dev]["basic_var"] +
+                                  b_bafa_hp[dev]["inno_fix"] +
+                                  b_bafa_hp[dev]["inno_var"],
+                                  name = nm("hp_bafa_x_hp"))
+
+        #Basic program
+        #For the basic_program  the seasonal coefficient of performance
+        #has to at least 3.5
+        M = s_E * data["M"]["scop"][dev,"basic"]
+
+        model.addConstr(M * (1 - (b_bafa_hp[dev]["basic_fix"] +
+                                  b_bafa_hp[dev]["basic_var"]))  >= sub_par[dev]["basic_scop"] *
+                                                                   energy_hp[dev]["total_power"] -
+                                                                   energy_hp[dev]["total_heat"] )
+
+        model.addConstr(sub_bafa_hp[dev]["basic"] <= ((sub_par[dev]["basic_fix"] +
+                                                       sub_par[dev]["basic_fix_pc"] *
+                                                       devs[dev]["pc"]) *
+                                                       b_bafa_hp[dev]["basic_fix"] +
+                                                       sub_par[dev]["basic_var"] *
+                                                       lin_hp_sub_basic[dev]),
+                                                       name = nm("hp_bafa_basic_sub"))
+
+        model.addConstr(sub_bafa_hp[dev]["basic"] <= sub_par[dev]["basic_var"] *
+                                                     sub_par[dev]["max_cap"] * alpha *
+                                                     (b_bafa_hp[dev]["basic_var"] +
+                                                      b_bafa_hp[dev]["basic_fix"]),
+                                                     name = nm("hp_bafa_basic_sub_ub"))
+
+        # Linearization because of capacity[dev] * b_bafa_hp["basic_var"]
+        model.addConstr(lin_hp_sub_basic[dev] <= devs[dev]["Q_nom_max"] *
+                                                 b_bafa_hp[dev]["basic_var"],
+                                                 name = nm("hp_bafa_lin_basic_1"))
+
+        model.addConstr(capacity[dev] - lin_hp_sub_basic[dev] >= 0,
+                                  name = nm("hp_bafa_lin_basic_2"))
+
+        model.addConstr(capacity[dev] - lin_hp_sub_basic[dev] <= (1 - b_bafa_hp[dev]["basic_var"]) *
+                                                                  devs[dev]["Q_nom_max"],
+                                                                  name = nm("hp_bafa_lin_basic_3"))
+
+        #Innovation program
+        #For the basic_program the seasonal coefficient of performance
+        #has to be at least 4.5 or higher
+        M = s_E * data["M"]["scop"][dev,"inno"]
+
+        model.addConstr(M * (1 - (b_bafa_hp[dev]["inno_fix"] +
+                                  b_bafa_hp[dev]["inno_var"])) >= sub_par[dev]["inno_scop"] *
+                                                                  energy_hp[dev]["total_power"] -
+                                                                  energy_hp[dev]["total_heat"])
+
+        model.addConstr(sub_bafa_hp[dev]["inno"] <= ((sub_par[dev]["inno_fix"] +
+                                                      sub_par[dev]["inno_fix_pc"] *
+                                                      devs[dev]["pc"]) * alpha +
+                                                     (sub_par[dev]["basic_fix"] +
+                                                      sub_par[dev]["basic_fix_pc"] *
+                                                      devs[dev]["pc"]) * (1-alpha)) +
+                                                      b_bafa_hp[dev]["inno_fix"] +
+                                                     (sub_par[dev]["basic_var"] +
+                                                      sub_par[dev]["inno_var"] * alpha) *
+                                                      lin_hp_sub_inno[dev],
+                                                      name = nm("hp_bafa_inno_sub"))
+
+        model.addConstr(sub_bafa_hp[dev]["inno"] <= (sub_par[dev]["basic_var"] *
+                                                     sub_par[dev]["max_cap"] +
+                                                     sub_par[dev]["inno_var"] *
+                                                     sub_par[dev]["max_cap"] * alpha) *
+                                                    (b_bafa_hp[dev]["inno_var"] +
+                                                     b_bafa_hp[dev]["inno_fix"]),
+                                                     name = nm("hp_bafa_inno_sub_ub"))
+
+        # Linearization because of capacity[dev] * b_bafa_hp["inno_var"]
+        model.addConstr(lin_hp_sub_inno[dev] <= devs[dev]["Q_nom_max"] *
+                                                b_bafa_hp[dev]["inno_var"],
+                                                name = nm("hp_bafa_lin_inno_1"))
+
+        model.addConstr(capacity[dev] - lin_hp_sub_inno[dev] >= 0,
+                                        name = nm("hp_bafa_lin_inno_2"))
+
+        model.addConstr(capacity[dev] - lin_hp_sub_inno[dev] <= (1 - b_bafa_hp[dev]["inno_var"]) *
+                                                                devs[dev]["Q_nom_max"],
+                                                                name = nm("hp_bafa_lin_inno_3"))
+
+        #Additional program
+        #Only available if HP is "Smart-Grid-Ready"
+        #Only available if basic- or inno-program is available
+        #Only available if storage has at least 30l/kW
+
+        model.addConstr(b_bafa_hp[dev]["add1"] <= devs[dev]["Smart_Grid"] *
+                                                  (b_bafa_hp[dev]["basic_fix"] +
+                                                   b_bafa_hp[dev]["basic_var"] +
+                                                   b_bafa_hp[dev]["inno_fix"] +
+                                                   b_bafa_hp[dev]["inno_var"]),
+                                                   name = nm("hp_bafa_add"))
+
+        #Thermal storage restriction
+        model.addConstr(capacity["tes"] *
+                        params["rho_w"] >= sub_par[dev]["stor_restr"] *
+                                           lin_hp_sub_add[dev],
+                                           name = nm("hp_bafa_tes_restr_", dev))
+
+        # Linearization for storage constraint
+        M = devs[dev]["Q_nom_max"]
+
+        model.addConstr(lin_hp_sub_add[dev] <= M * b_bafa_hp[dev]["add1"],
+                                               name = nm("hp_bafa_lin_add_1_", dev))
+
+        model.addConstr(capacity[dev] - lin_hp_sub_add[dev] >= 0,
+                                       name = nm("hp_bafa_lin_add_2_", dev))
+
+        model.addConstr(capacity[dev] - lin_hp_sub_add[dev] <=  M *
+                                          (1 - b_bafa_hp[dev]["add1"]),
+                                      name =  nm("hp_bafa_lin_add_3_", dev))
+
+        #Additional Building-Efficiency-Subsidy
+        M = (sub_par[dev]["basic_var"] * sub_par[dev]["max_cap"] +
+             sub_par[dev]["inno_var"]  * sub_par[dev]["max_cap"] * alpha)
+
+        model.addConstr(sub_bafa_hp[dev]["build_eff"] <= M * b_sub_restruc["kfw_eff_55"],
+                                                         name = nm(dev, "_bafa_b_e_1"))
+
+        model.addConstr(sub_bafa_hp[dev]["build_eff"] <= sub_par[dev]["build_eff"] *
+                                                        (sub_bafa_hp[dev]["inno"] +
+                                                         sub_bafa_hp[dev]["basic"]),
+                                                         name = nm(dev, "_bafa_b_e_2"))
+
+        #Calculation of annaul subsidy value
+        model.addConstr(subsidy[dev] == eco["crf"] * devs[dev]["rval"] *
+                                       (sub_bafa_hp[dev]["basic"] +
+                                        sub_bafa_hp[dev]["inno"] +
+                                        b_bafa_hp[dev]["add1"] *
+                                        sub_par[dev]["smart_grid"]+
+                                        sub_bafa_hp[dev]["build_eff"]),
+                                        name = nm("hp_bafa_total_value"))
+
+def _build_bafa_pellet(model, v, data, options):
+    """
+    MAP-Subsidy for Pellet.
+
+    The "Marktanreizprogramm" MAP is a subsidy-program for Pellet heatings by BAFA
+    The prorgam has three parts: basic, innovation and additional subsidy
+    Further Information:
+    http://www.bafa.de/DE/Energie/Heizen_mit_Erneuerbaren_Energien/Biomasse/biomasse_node.html
+    """
+    nm            = data["nm"]
+    eco           = data["eco"]
+    devs          = data["devs"]
+    params        = data["params"]
+    sub_par       = data["sub_par"]
+    alpha         = data["alpha"]
+    x             = v["x"]
+    capacity      = v["capacity"]
+    b_sub_restruc = v["b_sub_restruc"]
+    subsidy       = v["subsidy"]
+
+    #%% Variables
+
+    b_bafa_pellet = {}
+    for i in ("basic_fix", "basic_storage", "basic_var",
+              "inno_fix", "inno_storage", "add1"):
+        b_bafa_pellet[i] = model.addVar(vtype = "B",
+                                                 name = nm("b_bafa_pellet_", i))
+
+    sub_bafa_pellet = {}
+    for i in ("basic", "inno", "build_eff"):
+        sub_bafa_pellet[i] = model.addVar(vtype = "C",
+                                       name = nm("sub_bafa_pellet_", i), lb = 0)
+
+    lin_sub_pellet = {}
+    for i in ("basic", "inno", "storage"):
+        lin_sub_pellet[i]= model.addVar(vtype = "C",
+                                        name = nm("lin_sub_pellet_", i), lb = 0)
+
+    dev = "pellet"
+    subsidy[dev] = model.addVar(vtype="C", name=nm("subsidy_", dev))
+
+    v.update({"b_bafa_pellet"   : b_bafa_pellet,
+              "sub_bafa_pellet" : sub_bafa_pellet,
+              "lin_sub_pellet"  : lin_sub_pellet})
+
+    #%% Constraints
+
+    #It is only possible to get either basic_storage, basic_fix,
+    #basic_var, inno_storage or inno_fix
+    model.addConstr(x["pellet"] >= b_bafa_pellet["basic_fix"] +
+                                   b_bafa_pellet["basic_storage"] +
+                                   b_bafa_pellet["basic_var"] +
+                                   b_bafa_pellet["inno_fix"] +
+                                   b_bafa_pellet["inno_storage"],
+                                   name = nm("pellet_bafa_x_pellet"))
+
+    #Capacity restriction: At least 5kW are necessary
+    model.addConstr(b_bafa_pellet["basic_fix"] +
+                    b_bafa_pellet["basic_storage"] +
+                    b_bafa_pellet["basic_var"] +
+                    b_bafa_pellet["inno_fix"] +
+                    b_bafa_pellet["inno_storage"] <= capacity[dev] /
+                                                     sub_par[dev]["min_cap"],
+                                                     name = nm("pellet_bafa_cap_restr"))
+
+    #Thermal storage restriction: At least 30 l/kW are necessary
+    model.addConstr(capacity["tes"] *
+                    params["rho_w"] >= sub_par[dev]["stor_restr"] *
+                                       lin_sub_pellet["storage"],
+                                       name = nm("stc_bafa_tes_restr"))
+
+    # Linearization for storage constraint
+    model.addConstr(lin_sub_pellet["storage"] <= devs[dev]["Q_nom_max"] *
+                                                (b_bafa_pellet["basic_storage"] +
+                                                 b_bafa_pellet["inno_storage"]),
+                                                 name = nm("pellet_bafa_lin_storage_1"))
+
+    model.addConstr(capacity[dev] >= lin_sub_pellet["storage"],
+                                     name = nm("pellet_bafa_lin_storage_2"))
+
+    model.addConstr(capacity[dev] <=lin_sub_pellet["storage"] +
+                                    devs[dev]["Q_nom_max"] * (1 -
+                                   (b_bafa_pellet["basic_storage"] +
+                                    b_bafa_pellet["inno_storage"])),
+                                    name = nm("pellet_bafa_lin_storage_3"))
+
+    # Linearization because of capacity[dev] * b_bafa_pellet["basic_var"]
+    model.addConstr(lin_sub_pellet["basic"] <= devs[dev]["Q_nom_max"] *
+                                               b_bafa_pellet["basic_var"],
+                                               name = nm("pellet_bafa_lin_basic_1"))
+
+    model.addConstr(capacity[dev] >= lin_sub_pellet["basic"],
+                                     name = nm("pellet_bafa_lin_basic_2"))
+
+    model.addConstr(capacity[dev] <= lin_sub_pellet["basic"] +
+                                    (1 - b_bafa_pellet["basic_var"]) *
+                                     devs[dev]["Q_nom_max"],
+                                     name = nm("pellet_bafa_lin_basic_3"))
+
+    #Basic-Subsidy: Just for existing buildings
+    model.addConstr(sub_bafa_pellet["basic"] <= (sub_par[dev]["basic_fix"] *
+                                                 b_bafa_pellet["basic_fix"] +
+                                                 sub_par[dev]["basic_storage"] *
+                                                 b_bafa_pellet["basic_storage"] +
+                                                 sub_par[dev]["basic_var"] *
+                                                 lin_sub_pellet["basic"]) *
+                                                 alpha,
+                                                 name = nm("pellet_bafa_basic"))
+
+    #Innovation-Subsidy
+    model.addConstr(sub_bafa_pellet["inno"] <=  devs[dev]["inno_ability"] *
+                                                 (b_bafa_pellet["inno_fix"] *
+                                                  (sub_par["pellet"]["inno_fix_new"] +
+                                                   sub_par["pellet"]["inno_fix_old"] *
+                                                   alpha) +
+                                                  b_bafa_pellet["inno_storage"] *
+                                                  (sub_par["pellet"]["inno_fix_new_stor"] +
+                                                   sub_par["pellet"]["inno_fix_old_stor"] *
+                                                   alpha)), name = nm("pellet_bafa_inno"))
+
+    #Additional program
+    #STC in combination with Pellet is necessary
+    model.addConstr(x["stc"] >= b_bafa_pellet["add1"],
+                                name = nm("pellet_bafa_add_1"))
+
+    model.addConstr(x["pellet"] >= b_bafa_pellet["add1"],
+                                   name = nm("pellet_bafa_add_2"))
+
+    #Additional program only available if basic or inno program available
+    model.addConstr(b_bafa_pellet["add1"] <= (b_bafa_pellet["basic_fix"] +
+                                              b_bafa_pellet["basic_storage"] +
+                                              b_bafa_pellet["basic_var"] +
+                                              b_bafa_pellet["inno_fix"] +
+                                              b_bafa_pellet["inno_storage"]),
+                                              name = nm("pellet_bafa_add_3"))
+
+    #Additional Building-Efficiency-Subsidy
+
+    M = sub_par[dev]["basic_var"] * sub_par[dev]["max_cap"]
+
+    model.addConstr(sub_bafa_pellet["build_eff"] <= M * b_sub_restruc["kfw_eff_55"],
+                                                    name = nm("pellet_bafa_b_e_1"))
+
+    model.addConstr(sub_bafa_pellet["build_eff"] <= sub_par[dev]["build_eff"] *
+                                                   (sub_bafa_pellet["inno"] +
+                                                    sub_bafa_pellet["basic"]),
+                                                    name = nm("pellet_bafa_b_e_2"))
+
+    #Calculation of annaul subsid value
+    model.addConstr(subsidy[dev] == eco["crf"] * devs[dev]["rval"] *
+                                    (sub_bafa_pellet["basic"] +
+                                     sub_bafa_pellet["inno"] +
+                                     b_bafa_pellet["add1"] *
+                                     sub_par[dev]["stc_pellet_combi"]) +
+                                     sub_bafa_pellet["build_eff"],
+                                     name = nm("pellet_bafa_total_value"))
+
+#%% Objective and scenarios
+
+def _build_objective(model, v, data, options):
+    """
+    Total annual costs, upper bounds for costs and emissions and objective.
+    """
+    nm       = data["nm"]
+    c_inv    = v["c_inv"]
+    c_om     = v["c_om"]
+    c_dem    = v["c_dem"]
+    c_fix    = v["c_fix"]
+    revenue  = v["revenue"]
+    subsidy  = v["subsidy"]
+    sub      = v["sub"]
+    emission = v["emission"]
+
+    # There are two subsidy-possibilities for chps
+    # 1. Remuneration system in accordance with the KWKG
+    # 2. Investment subsidy for small chps
+    if len(sub) > 0:
+        dev = "chp"
+        subsidy[dev] = model.addVar(vtype="C", name=nm("subsidy_", dev))
+
+        model.addConstr(subsidy[dev] == sum(sub[key] for key in sub.keys()),
+                                        name = nm("chp_sub"))
+
+    c_total = model.addVar(vtype="C", name=nm("c_total"), lb= -gp.GRB.INFINITY)
+
+    v["c_total"] = c_total
+
+    model.addConstr(c_total ==  (sum(c_inv[key]   for key in c_inv.keys())
+                               + sum(c_om[key]    for key in c_om.keys())
+                               + sum(c_dem[key]   for key in c_dem.keys())
+                               + sum(c_fix[key]   for key in c_fix.keys())
+                               - sum(revenue[key] for key in revenue.keys())
+                               - sum(subsidy[key] for key in subsidy.keys())))
+
+    model.addConstr(0.001 * emission <= data["max_emi"])
+    model.addConstr(c_total <= data["max_cost"])
+
+    if options["opt_costs"]:
+        model.setObjective(c_total, gp.GRB.MINIMIZE)
+
+    else:
+        model.setObjective(emission, gp.GRB.MINIMIZE)
+
+def _build_scenario(model, v, data, options):
+    """
+    Additional restrictions for the chosen scenario.
+    """
+    building_components = data["building_components"]
+    x                   = v["x"]
+    x_restruc           = v["x_restruc"]
+
+    if options["scenario"] == "free":
+        pass
+
+    elif options ["scenario"] == "benchmark":
+        model.addConstr(x["boiler"] == 1)
+        model.addConstr(x["pv"] == 0)
+        for i in building_components:
+            model.addConstr(x_restruc[i,"standard"] == 1)
+
+    elif options ["scenario"] == "s1":
+#        for i in building_components:
+#        model.addConstr(x_restruc["Window","retrofit"] == 1)
+#        model.addConstr(x_restruc["GroundFloor","retrofit"] == 1)
+#        model.addConstr(x_restruc["Rooftop","retrofit"] == 1)
+#        model.addConstr(x_restruc["OuterWall","adv_retr"] == 1)
+        model.addConstr(x["bat"] == 1)
+#        model.addConstr(x["pv"] == 1)
+#        model.addConstr(capacity["pv"] == 31.7)
+#        model.addConstr(capacity["boiler"] == 18)
+#        model.addConstr(capacity["tes"] == 0.6)
+
+#%% Results
+
+def _value(item, X):
+    """
+    Solution value of a variable or of an expression that replaces a
+    variable in the reduced model. X holds the values of all variables
+    in the order of the model, as returned by the solver backend.
+    """
+    if isinstance(item, gp.Var):
+        return X[item.index]
+    else:
+        return item.getConstant() + sum(item.getCoeff(i) *
+                                        X[item.getVar(i).index]
+                                        for i in range(item.size()))
+
+def _values(variables, keys, X):
+    """
+    Solution values for the given keys. Variables of disabled subsidy
+    programs do not exist and are reported as 0.
+    """
+    return {key: _value(variables[key], X) if key in variables else 0.0
+            for key in keys}
+
+def _retrieve_results(v, data, solution):
+    """
+    Extract the solution of the solver backend into the result dictionaries.
+    """
+    days          = data["days"]
+    time_steps    = data["time_steps"]
+    devs          = data["devs"]
+    heater        = data["heater"]
+    storage       = data["storage"]
+    sub_par       = data["sub_par"]
+    X             = solution["X"]
+
+    # Shortcut for time series
+    def series(var, *key):
+        return np.array([[_value(var[key + (d,t)], X) for t in time_steps] for d in days])
+
+    results = {}
+
+    #Purchase
+    results["res_x"] = {dev : _value(v["x"][dev], X)  for dev in devs}
+
+    # Operation
+    results["res_y"] = {dev: series(v["y"], dev)
+                        for dev in ("pellet","stc","boiler","hp_geo","hp_air","eh","chp")}
+
+    # heat and electricity output
+    results["res_power"] = {dev: series(v["power"], dev)
+                            for dev in ("hp_air", "hp_geo", "eh")}
+
+    results["res_heat"] = {dev: series(v["heat"], dev)
+                           for dev in ("boiler", "chp", "hp_air", "hp_geo",
+                                       "eh", "stc", "pellet")}
+
+    results["res_energy"] = {dev: series(v["energy"], dev)
+                             for dev in ("boiler", "chp", "pellet")}
+
+    # Purchased power from the grid for either feeding a hp tariff component or a different (standard/eco tariff)
+    results["res_p_grid"] = {"house" : series(v["p_grid"], "grid_house"),
+                             "hp"    : series(v["p_grid"], "grid_hp")}
+
+    # State of charge for storage systems
+    results["res_soc"] = {dev: series(v["soc"], dev) for dev in storage}
+
+    results["res_soc_init"] = {dev: np.array([_value(v["soc_init"][dev,d], X) for d in days])
+                               for dev in storage}
+
+    # Charge and discharge power for storage
+    results["res_ch"]  = {dev: series(v["ch"], dev)  for dev in ("bat","tes")}
+    results["res_dch"] = {dev: series(v["dch"], dev) for dev in ("bat","tes")}
+
+    # Power going from an electricity offering component to the demand/the grid/a hp tariff component
+    results["res_p_use"]  = {dev: series(v["p_use"], dev)  for dev in ("pv", "bat","chp")}
+    results["res_p_sell"] = {dev: series(v["p_sell"], dev) for dev in ("pv", "bat","chp")}
+    results["res_p_hp"]   = {dev: series(v["p_hp"], dev)   for dev in ("pv", "bat","chp")}
+
+    # Costs
+    results["res_c_inv"] = _values(v["c_inv"], v["c_inv"].keys(), X)
+    results["res_c_om"]  = _values(v["c_om"],  v["c_om"].keys(), X)
+    results["res_c_dem"] = _values(v["c_dem"], v["c_dem"].keys(), X)
+    results["res_c_fix"] = _values(v["c_fix"], v["c_fix"].keys(), X)
+    results["res_c_total"] = _value(v["c_total"], X)
+    results["res_rev"]   = _values(v["revenue"], ("chp", "pv"), X)
+    results["res_sub"]   = _values(v["subsidy"], data["subsidy_devs"] +
+                                                 data["building_components"] +
+                                                 data["kfw_standards"], X)
+
+    # Emissions
+    results["res_emission"] = _value(v["emission"], X) / 1000
+
+    # Solver information
+    results["ObjVal"]  = solution["ObjVal"]
+    results["Runtime"] = solution["Runtime"]
+    results["MIPGap"]  = solution["MIPGap"]
+
+    results["res_soc_nom"]   = {dev: _value(v["soc_nom"][dev], X) for dev in storage}
+    results["res_power_nom"] = {dev: series(v["power_nom"], dev)
+                                for dev in ("hp_air","hp_geo")}
+    results["res_heat_nom"]  = {dev: series(v["heat_nom"], dev) for dev in heater}
+    results["res_cap"] = {dev : _value(v["capacity"][dev], X) for dev in v["capacity"].keys()}
+
+    # Time series of the building are stored with the last time step as key
+    last = (days[-1], time_steps[-1])
+    results["res_heat_mod"] = {last: series(v["heat_mod"])}
+
+    results["res_b_sub_restruc"] = _values(v.get("b_sub_restruc", {}),
+                                           data["building_components"] +
+                                           data["kfw_standards"], X)
+
+    results["res_x_restruc"] = {}
+    for n in data["restruc_scenarios"]:
+        for dev in data["building_components"]:
+            results["res_x_restruc"][dev,n] = _value(v["x_restruc"][dev,n], X)
+
+    results["res_Ht"]     = _value(v["H_t"], X) / data["total_shell"]
+    results["res_Qs"]     = {last: series(v["Q_s"])}
+    results["res_Qp_DIN"] = _value(v["Q_p_DIN"], X)
+
+    results["res_heating_concept"] = _values(v["heating_concept"],
+                                             v["heating_concept"].keys(), X)
+    results["res_lin_Ht"] = _values(v["lin_H_t"], v["heating_concept"].keys(), X)
+
+    results["res_sub_chp"]      = _values(v["sub"], ("kwkg", "bafa"), X)
+    results["res_b_pv_power"]   = _values(v.get("b_pv_power", {}), ("kfw", "eeg"), X)
+    results["res_lin_pv_power"] = _values(v.get("lin_pv_power", {}), ("kfw", "eeg"), X)
+
+    kwkg_steps = sub_par["kwkg"]["vls"].keys()
+    # Annual energy and payments are reported in kWh and €
+    s_E = data["scale"]["energy"]
+    s_C = data["scale"]["payment"]
+
+    results["res_p_chp_total"] = {n: val / s_E for (n, val) in
+                                  _values(v.get("p_chp_total", {}),
+                                          ("use","sell","total"), X).items()}
+    results["res_lin_kwkg_2"] = {n: val / s_C for (n, val) in
+                                 _values(v.get("lin_kwkg_2", {}), kwkg_steps, X).items()}
+    results["res_lin_kwkg_1"] = _values(v.get("lin_kwkg_1", {}), kwkg_steps, X)
+    results["res_b_kwkg"]     = _values(v.get("b_kwkg", {}), kwkg_steps, X)
+
+    if "sub_kwkg_temp" in v:
+        results["res_sub_kwkg_temp"] = _value(v["sub_kwkg_temp"], X) / s_C
+    else:
+        results["res_sub_kwkg_temp"] = 0.0
+
+    return results
+
+def _design_summary(v, data, X):
+    """
+    Purchase decisions, capacities, costs, emissions and subsidies of one
+    solution.
+    """
+    capacity = {dev: _value(v["capacity"][dev], X)
+                for dev in v["capacity"].keys()}
+    subsidies = _values(v["subsidy"], data["subsidy_devs"] +
+                                      data["building_components"] +
+                                      data["kfw_standards"], X)
+
+    return {"x" : {dev: int(round(_value(v["x"][dev], X)))
+                   for dev in v["x"].keys()},
+            "x_restruc" : {key: int(round(_value(var, X)))
+                           for (key, var) in v["x_restruc"].items()},
+            "capacity" : capacity,
+            "costs" : _value(v["c_total"], X),
+            "emission" : _value(v["emission"], X) / 1000,
+            "subsidies" : {key: val for (key, val) in subsidies.items()
+                           if val > 1e-6}}
+
+def _distinct_designs(v, data, pool, number):
+    """
+    The best designs of the solution pool that differ in the purchase
+    decisions, the restructuring measures or the capacities (rounded to
+    0.1). Pool solutions that only differ in the operation are skipped.
+    """
+    designs = []
+    found = set()
+    for X in pool:
+        design = _design_summary(v, data, X)
+        key = (tuple(sorted(design["x"].items())),
+               tuple(sorted(design["x_restruc"].items())),
+               tuple(sorted((dev, round(cap, 1))
+                            for (dev, cap) in design["capacity"].items())))
+        if key not in found:
+            found.add(key)
+            designs.append(design)
+        if len(designs) == number:
+            break
+
+    return designs
+
+def print_designs(designs):
+    """
+    Print the designs of the solution pool (option solution_pool).
+    """
+    print("")
+    print("Alternative designs:")
+    for (n, design) in enumerate(designs):
+        devices = ", ".join(dev + " " + str(round(design["capacity"][dev], 1))
+                            for dev in sorted(design["x"].keys())
+                            if design["x"][dev] == 1)
+        shell = ", ".join(comp + " " + scen for ((comp, scen), val)
+                          in sorted(design["x_restruc"].items())
+                          if val == 1 and scen != "standard")
+        print(str(n + 1) + ": " + str(round(design["costs"], 1)) + " €/a, " +
+              str(round(design["emission"], 2)) + " t/a, " + devices +
+              (", " + shell if shell else ""))
+
+def _store_pool(filename, designs):
+    """
+    Save the designs of the solution pool next to the results file, e.g.
+    results/SFH_1958 1968.pkl -> results/SFH_1958 1968_pool.pkl
+    """
+    if filename.endswith(".pkl"):
+        filename = filename[:-len(".pkl")]
+
+    with open(filename + "_pool.pkl", "wb") as fout:
+        pickle.dump(designs, fout, pickle.HIGHEST_PROTOCOL)
+
+def _store_trace(filename, trace):
+    """
+    Save the telemetry trace next to the results file as tab separated
+    table, e.g. results/SFH_1958 1968.pkl -> results/SFH_1958 1968_trace.csv
+    (read with python.read_telemetry).
+    """
+    if filename.endswith(".pkl"):
+        filename = filename[:-len(".pkl")]
+
+    with open(filename + "_trace.csv", "w") as fout:
+        fout.write("time\tevent\tincumbent\tbound\tgap\tnodes\n")
+        for entry in trace:
+            fout.write("\t".join("" if val is None else str(val)
+                                 for val in entry) + "\n")
+
+def _store_profile(filename, profile):
+    """
+    Save the build profile next to the results file, e.g.
+    results/SFH_1958 1968.pkl -> results/SFH_1958 1968_profile.pkl
+    """
+    if filename.endswith(".pkl"):
+        filename = filename[:-len(".pkl")]
+
+    with open(filename + "_profile.pkl", "wb") as fout:
+        pickle.dump(profile, fout, pickle.HIGHEST_PROTOCOL)
+
+def _store_results(filename, results):
+    """
+    Save results in the order in which they are read by
+    python.read_basic.read_results.
+    """
+    order = ("res_x", "res_y", "res_power", "res_heat", "res_energy",
+             "res_p_grid", "res_soc", "res_soc_init", "res_ch", "res_dch",
+             "res_p_use", "res_p_sell", "res_p_hp", "res_c_inv", "res_c_om",
+             "res_c_dem", "res_c_fix", "res_c_total", "res_rev", "res_sub",
+             "res_emission", "ObjVal", "Runtime", "MIPGap", "res_soc_nom",
+             "res_power_nom", "res_heat_nom", "res_cap", "res_heat_mod",
+             "res_b_sub_restruc", "res_x_restruc", "res_Ht", "res_Qs",
+             "res_Qp_DIN", "res_heating_concept", "res_lin_Ht", "res_sub_chp",
+             "res_b_pv_power", "res_lin_pv_power", "res_p_chp_total",
+             "res_lin_kwkg_2", "res_lin_kwkg_1", "res_b_kwkg",
+             "res_sub_kwkg_temp", "Termination", "Approximate")
+
+    with open(filename, "wb") as fout:
+        for key in order:
+            pickle.dump(results[key], fout, pickle.HIGHEST_PROTOCOL)
@@ -47,7 +47,7 @@ def _distances(values, norm=2):
 
 
 def cluster(inputs, number_clusters=12, norm=2, time_limit=300, mip_gap=0.0,
-            weights=None):
+            weights=None, backend="gurobi", env=None):
     """
     Cluster a set of inputs into clusters by solving a k-medoid problem.
     
@@ -67,6 +67,10 @@ def cluster(inputs, number_clusters=12, norm=2, time_limit=300, mip_gap=0.0,
         Optimality tolerance (0: proven global optimum)
     weights : 1-dimensional array, optional
         Weight for each input. If not provided, all inputs are treated equally.
+    backend : string, optional
+        Solver backend for the k-medoids problem ("gurobi" or "highs")
+    env : gurobipy.Env, optional
+        Gurobi environment of the k-medoids problem
     
     Returns
     -------
@@ -110,7 +114,8 @@ def cluster(inputs, number_clusters=12, norm=2, time_limit=300, mip_gap=0.0,
     d = _distances(L, norm)
 
     # Execute optimization model
-    (y, z, obj) = k_medoids.k_medoids(d, number_clusters, time_limit, mip_gap)
+    (y, z, obj) = k_medoids.k_medoids(d, number_clusters, time_limit, mip_gap,
+                                      backend, env)
     
     # Section 2.3 and retain typical days
     nc = np.zeros_like(y)
@@ -9,6 +9,7 @@ Created on Thu Oct 01 11:55:33 2015
 from __future__ import division
 import gurobipy as gp
 import numpy as np
+import python.solver_backends as solver_backends
 
 # Implementation of the k-medoids problem, as it is applied in 
 # Selection of typical demand days for CHP optimization
@@ -24,7 +25,8 @@ import numpy as np
 # pp. 506-519
 # Stable URL: http://www.jstor.org/stable/2283635
 
-def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001):
+def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001,
+              backend="gurobi", env=None):
     """
     Parameters
     ----------
@@ -35,13 +37,23 @@ def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001):
         Given number of clusters.
     timelimit : integer
         Maximum time limit for the optimization.
+    mipgap : float
+        Optimality tolerance.
+    backend : string
+        Solver backend, see python.solver_backends.
+    env : gurobipy.Env
+        Environment of the model, e.g. from an EnvironmentPool. The default
+        environment is used if no environment is given.
     """
     
     # Distances is a symmetrical matrix, extract its length
     length = distances.shape[0]
     
     # Create model
-    model = gp.Model("k-Medoids-Problem")
+    if env is None:
+        model = gp.Model("k-Medoids-Problem")
+    else:
+        model = gp.Model("k-Medoids-Problem", env=env)
     
     # Create variables
     x = {} # Binary variables that are 1 if node i is assigned to cluster j
@@ -86,14 +98,18 @@ def k_medoids(distances, number_clusters, timelimit=100, mipgap=0.0001):
     model.Params.MIPGap = mipgap    
     
     # Solve the model
-    model.optimize()
+    solution = solver_backends.solve(model, backend)
+    X = solution["X"]
     
     # Get results
-    r_x = np.array([[x[i,j].X for j in range(length)] 
+    r_x = np.array([[X[x[i,j].index] for j in range(length)] 
                               for i in range(length)])
 
-    r_y = np.array([y[j].X for j in range(length)])
+    r_y = np.array([X[y[j].index] for j in range(length)])
 
-    r_obj = model.ObjVal
+    r_obj = solution["ObjVal"]
+
+    # Free the model right away, the environment is kept
+    model.dispose()
     
     return (r_y, r_x.T, r_obj)
\ No newline at end of file
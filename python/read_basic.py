@@ -64,9 +64,58 @@ def read_results(name):
         results["res_lin_kwkg_1"] = pickle.load(fin)    
         results["res_b_kwkg"] = pickle.load(fin)   
         results["res_sub_kwkg_temp"] = pickle.load(fin)
+        # Reason for stopping the solver, not stored in older results
+        try:
+            results["Termination"] = pickle.load(fin)
+        except EOFError:
+            results["Termination"] = None
+        # Costs of the screening mode (relaxed on/off decisions)
+        try:
+            results["Approximate"] = pickle.load(fin)
+        except EOFError:
+            results["Approximate"] = False
 #        results["res_lin_kwkg_4"] = pickle.load(fin)
 #        results["res_lin_kwkg_3"] = pickle.load(fin)    
 #        results["res_sub_temp"] = pickle.load(fin)   
 
     return results
 
+
+def read_design(filename):
+    """
+    Design of a results file of compute: devices (x), capacities,
+    restructuring measures (x_restruc), objective value and runtime.
+    """
+    values = []
+    with open(filename, "rb") as fin:
+        while True:
+            try:
+                values.append(pickle.load(fin))
+            except EOFError:
+                break
+
+    # Positions in the order of read_results
+    return {"x" : values[0],
+            "capacity" : values[27],
+            "x_restruc" : values[30],
+            "ObjVal" : values[21],
+            "Runtime" : values[22]}
+
+def compare_designs(design_1, design_2, tolerance=0.05):
+    """
+    Devices and restructuring measures that are chosen in only one of the
+    designs and devices whose capacity differs by more than the tolerance.
+    """
+    changes = {"x" : [dev for dev in design_1["x"]
+                      if round(design_1["x"][dev]) != round(design_2["x"][dev])],
+               "x_restruc" : [key for key in design_1["x_restruc"]
+                              if round(design_1["x_restruc"][key]) !=
+                                 round(design_2["x_restruc"][key])],
+               "capacity" : {}}
+
+    for dev in design_1["capacity"]:
+        (cap_1, cap_2) = (design_1["capacity"][dev], design_2["capacity"][dev])
+        if abs(cap_1 - cap_2) > tolerance * max(abs(cap_1), abs(cap_2), 1e-3):
+            changes["capacity"][dev] = (cap_1, cap_2)
+
+    return changes
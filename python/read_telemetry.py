@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Read and summarize the telemetry traces of compute (option telemetry).
+
+Every run splits into the time until the final incumbent has been found
+(primal side: better heuristics help) and the time spent afterwards to
+close the gap (dual side: better bounds help).
+"""
+from __future__ import division
+import glob
+import numpy as np
+
+def read_trace(filename):
+    """
+    Read a trace file as list of dicts with the keys time, event, incumbent,
+    bound, gap and nodes (None for missing values).
+    """
+    trace = []
+    with open(filename, "r") as fin:
+        header = fin.readline().split()
+        for line in fin:
+            values = line.rstrip("\n").split("\t")
+            entry = {}
+            for (key, val) in zip(header, values):
+                if key == "event":
+                    entry[key] = val
+                elif val == "":
+                    entry[key] = None
+                else:
+                    entry[key] = float(val)
+            trace.append(entry)
+    return trace
+
+def summarize_trace(trace):
+    """
+    Key figures of one run.
+    """
+    solutions = [entry for entry in trace if entry["event"] == "solution"]
+    end = trace[-1]
+
+    summary = {"runtime" : end["time"],
+               "gap" : end["gap"],
+               "solutions" : len(solutions),
+               "first_solution" : None,
+               "final_incumbent" : None}
+
+    if solutions:
+        summary["first_solution"] = solutions[0]["time"]
+
+        # The final incumbent is the first solution with the final objective
+        best = min(entry["incumbent"] for entry in solutions)
+        summary["final_incumbent"] = min(entry["time"] for entry in solutions
+                                         if entry["incumbent"] <= best)
+
+        # Time to close the gap after the final incumbent was found
+        summary["primal_time"] = summary["final_incumbent"]
+        summary["dual_time"] = end["time"] - summary["final_incumbent"]
+
+    nodes = [entry["nodes"] for entry in trace if entry["nodes"] is not None]
+    summary["nodes"] = max(nodes) if nodes else 0
+
+    return summary
+
+def summarize(pattern="results/*_trace.csv"):
+    """
+    Aggregate the traces of a batch.
+
+    Returns
+    -------
+    summaries : dict
+        - filename : key figures of the run (see summarize_trace)
+    """
+    summaries = {}
+    for filename in sorted(glob.glob(pattern)):
+        summaries[filename] = summarize_trace(read_trace(filename))
+
+    runs = [s for s in summaries.values() if "primal_time" in s]
+    if not runs:
+        print("No traces with solutions found")
+        return summaries
+
+    primal = np.array([s["primal_time"] for s in runs])
+    dual = np.array([s["dual_time"] for s in runs])
+    first = np.array([s["first_solution"] for s in runs])
+
+    print("")
+    print("Runs: " + str(len(runs)))
+    print("Time to first solution:   mean " + str(round(np.mean(first), 1)) +
+          " s, median " + str(round(np.median(first), 1)) + " s")
+    print("Time to final incumbent:  mean " + str(round(np.mean(primal), 1)) +
+          " s, median " + str(round(np.median(primal), 1)) + " s")
+    print("Time to close the gap:    mean " + str(round(np.mean(dual), 1)) +
+          " s, median " + str(round(np.median(dual), 1)) + " s")
+
+    share = np.sum(primal) / max(np.sum(primal + dual), 1e-10)
+    print("Share of time until the final incumbent: " +
+          str(round(100 * share, 1)) + " %")
+    if share > 0.5:
+        print("Most time is spent finding solutions: heuristics help more")
+    else:
+        print("Most time is spent proving bounds: bounds help more")
+
+    return summaries
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Solver backends for models that are built with gurobipy.
+
+The model is always built with gurobipy, which needs no license seat for
+building and writing models. The backend solves it:
+    - gurobi : Gurobi itself
+    - highs  : the open-source solver HiGHS (highspy). The model is passed as
+      MPS file, so no Gurobi license is used for solving.
+
+Every backend returns the solution as dictionary with the keys
+    - X : values of all variables in the order of the model (None if no
+      feasible solution has been found)
+    - ObjVal, Runtime, MIPGap : as the Gurobi attributes of the same name
+    - Status : reason why the solver stopped, e.g. "optimal" or "time_limit"
+    - Pool : values of all solutions of the solution pool, best first
+      (only Gurobi with PoolSearchMode > 0)
+
+Long-running workers take their Gurobi environment from an EnvironmentPool,
+so that environment setup and license checkout happen once per worker.
+
+solve_portfolio races several Gurobi configurations in separate processes
+and keeps the first solution that reaches the MIP gap of the model.
+"""
+
+from __future__ import division
+import os
+import shutil
+import time
+import threading
+import tempfile
+import multiprocessing
+from queue import Empty
+import numpy as np
+import gurobipy as gp
+
+backends = ("gurobi", "highs")
+
+# Configurations of the portfolio, applied on top of the model parameters
+portfolio = {"bound"       : {"MIPFocus" : 3},
+             "feasibility" : {"MIPFocus" : 1},
+             "heuristics"  : {"MIPFocus" : 1, "Heuristics" : 0.5, "Seed" : 1},
+             "cuts"        : {"MIPFocus" : 2, "Cuts" : 2, "Seed" : 2}}
+
+class EnvironmentPool(object):
+    """
+    Gurobi environments, one per worker (process and thread), that are
+    reused by all models of the worker.
+
+    Parameters
+    ----------
+    threads : integer, optional
+        Threads per worker (0: Gurobi chooses)
+    params : dict, optional
+        Further Gurobi parameters of all environments, e.g. OutputFlag
+    """
+    def __init__(self, threads=0, params=None):
+        self.threads = threads
+        self.params = params or {}
+        self._envs = {}
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Environment of the calling worker, started on first use.
+        """
+        worker = (os.getpid(), threading.current_thread().ident)
+        with self._lock:
+            if worker not in self._envs:
+                env = gp.Env(empty=True)
+                env.setParam("Threads", self.threads)
+                for (name, value) in self.params.items():
+                    env.setParam(name, value)
+                env.start()
+                self._envs[worker] = env
+            return self._envs[worker]
+
+    def close(self):
+        """
+        Dispose all environments and release their licenses.
+        """
+        with self._lock:
+            for env in self._envs.values():
+                env.dispose()
+            self._envs = {}
+
+def solve(model, backend="gurobi", callback=None):
+    """
+    Solve the model with the given backend. The Gurobi parameters TimeLimit,
+    MIPGap and Threads of the model are passed on to the other backends.
+    """
+    if backend == "gurobi":
+        return _solve_gurobi(model, callback)
+    elif backend == "highs":
+        return _solve_highs(model)
+    else:
+        raise ValueError("Unknown solver backend: " + str(backend))
+
+# Gurobi status codes after optimize
+_gurobi_status = {gp.GRB.OPTIMAL : "optimal",
+                  gp.GRB.INFEASIBLE : "infeasible",
+                  gp.GRB.INF_OR_UNBD : "infeasible_or_unbounded",
+                  gp.GRB.UNBOUNDED : "unbounded",
+                  gp.GRB.TIME_LIMIT : "time_limit",
+                  gp.GRB.NODE_LIMIT : "node_limit",
+                  gp.GRB.SOLUTION_LIMIT : "solution_limit",
+                  gp.GRB.INTERRUPTED : "interrupted",
+                  gp.GRB.SUBOPTIMAL : "suboptimal"}
+
+def _solve_gurobi(model, callback):
+    if callback is None:
+        model.optimize()
+    else:
+        model.optimize(callback)
+
+    solution = {"X" : None,
+                "ObjVal" : None,
+                "Runtime" : model.Runtime,
+                "MIPGap" : None,
+                "Status" : _gurobi_status.get(model.Status, str(model.Status))}
+
+    if model.SolCount > 0:
+        solution["X"] = np.array(model.getAttr("X", model.getVars()))
+        solution["ObjVal"] = model.ObjVal
+        solution["MIPGap"] = model.MIPGap if model.IsMIP else 0.0
+
+    if model.Params.PoolSearchMode > 0:
+        solution["Pool"] = []
+        for n in range(model.SolCount):
+            model.Params.SolutionNumber = n
+            solution["Pool"].append(np.array(model.getAttr("Xn",
+                                                           model.getVars())))
+
+    return solution
+
+def _solve_highs(model):
+    import highspy
+
+    # Indicator constraints and SOS cannot be passed on to HiGHS
+    model.update()
+    if model.NumGenConstrs > 0 or model.NumSOS > 0:
+        raise ValueError("The HiGHS backend does not support general "
+                         "constraints and SOS, use the big-M formulations")
+
+    (handle, filename) = tempfile.mkstemp(suffix=".mps")
+    os.close(handle)
+    try:
+        model.write(filename)
+
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", bool(model.Params.OutputFlag))
+        highs.setOptionValue("time_limit", float(model.Params.TimeLimit))
+        highs.setOptionValue("mip_rel_gap", float(model.Params.MIPGap))
+        if model.Params.Threads > 0:
+            highs.setOptionValue("threads", int(model.Params.Threads))
+
+        highs.readModel(filename)
+        highs.run()
+    finally:
+        os.remove(filename)
+
+    info = highs.getInfo()
+
+    status = highs.modelStatusToString(highs.getModelStatus())
+    solution = {"X" : None,
+                "ObjVal" : None,
+                "Runtime" : highs.getRunTime(),
+                "MIPGap" : None,
+                "Status" : status.lower().replace(" ", "_")}
+
+    if info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible:
+        solution["X"] = np.array(highs.getSolution().col_value)
+        solution["ObjVal"] = info.objective_function_value
+        solution["MIPGap"] = info.mip_gap
+
+    return solution
+
+def _portfolio_worker(name, configuration, directory, queue):
+    """
+    Solve the model of the portfolio directory with one configuration.
+    """
+    model = gp.read(os.path.join(directory, "model.mps"))
+    model.read(os.path.join(directory, "model.prm"))
+    for (param, value) in configuration.items():
+        model.setParam(param, value)
+
+    variables = model.getVars()
+    with open(os.path.join(directory, "attributes.npz"), "rb") as fin:
+        attributes = np.load(fin)
+        model.setAttr("Start", variables, attributes["start"].tolist())
+        model.setAttr("BranchPriority", variables,
+                      attributes["priority"].tolist())
+
+    queue.put((name, _solve_gurobi(model, None)))
+    model.dispose()
+
+def solve_portfolio(model, configurations):
+    """
+    Solve the model with all configurations in parallel processes with Gurobi.
+    The first solution that reaches the MIP gap of the model wins and the
+    other processes are cancelled. If no configuration reaches the gap, the
+    best solution of all configurations is returned.
+
+    The processes are spawned, so the calling script needs an
+    if __name__ == "__main__" guard.
+
+    Parameters
+    ----------
+    configurations : dict
+        - name : Gurobi parameters of the configuration (see portfolio)
+
+    Returns
+    -------
+    winner : string
+        Name of the configuration of the returned solution
+    solution : dict
+        Solution as returned by solve, Runtime is the wall-clock time of the
+        whole race including writing and reading the model
+    """
+    start = time.time()
+    model.update()
+    variables = model.getVars()
+
+    # The threads are shared between the configurations
+    if model.Params.Threads == 0:
+        threads = max(1, multiprocessing.cpu_count() // len(configurations))
+    else:
+        threads = model.Params.Threads
+
+    directory = tempfile.mkdtemp()
+    try:
+        # MPS files contain neither parameters nor start values and
+        # branching priorities
+        model.write(os.path.join(directory, "model.mps"))
+        model.write(os.path.join(directory, "model.prm"))
+        with open(os.path.join(directory, "attributes.npz"), "wb") as fout:
+            np.savez(fout,
+                     start=np.array(model.getAttr("Start", variables)),
+                     priority=np.array(model.getAttr("BranchPriority",
+                                                     variables)))
+
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        processes = []
+        for (name, configuration) in configurations.items():
+            configuration = dict(configuration)
+            configuration.setdefault("Threads", threads)
+            process = context.Process(target=_portfolio_worker,
+                                      args=(name, configuration, directory,
+                                            queue))
+            process.start()
+            processes.append(process)
+
+        gap = model.Params.MIPGap
+        sense = model.ModelSense
+        finished = {}
+        winner = None
+        while len(finished) < len(processes):
+            try:
+                (name, solution) = queue.get(timeout=1)
+            except Empty:
+                # Processes that failed (e.g. without license) do not report
+                if not any(process.is_alive() for process in processes):
+                    if queue.empty():
+                        break
+                continue
+            finished[name] = solution
+            if (solution["X"] is not None and
+                solution["MIPGap"] <= gap + 1e-9):
+                winner = name
+                break
+
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    finally:
+        shutil.rmtree(directory)
+
+    runtime = time.time() - start
+
+    if winner is None:
+        solved = [name for name in finished
+                  if finished[name]["X"] is not None]
+        if len(solved) == 0:
+            return (None, {"X" : None, "ObjVal" : None, "MIPGap" : None,
+                           "Status" : "no_solution",
+                           "Runtime" : runtime})
+        winner = min(solved, key=lambda name: sense * finished[name]["ObjVal"])
+
+    solution = dict(finished[winner])
+    solution["Runtime"] = runtime
+
+    return (winner, solution)
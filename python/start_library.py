@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Library of start values from previously solved buildings.
+
+Every solved building is stored with a feature vector (building, climate,
+demands) and the values of its binary variables. Before a solve, the
+designs of the most similar buildings with the same model structure are
+used as MIP starts.
+"""
+from __future__ import division
+import os
+import glob
+import pickle
+import numpy as np
+
+def features(clustered, building, options):
+    """
+    Feature vector of a building: dimensions, U-values of the unrestructured
+    shell, climate statistics, annual demands and the usable roof share.
+    """
+    weights = clustered["weights"]
+    dimensions = building["dimensions"]
+    u_values = building["U-values"]["standard"]
+
+    def annual(profile):
+        return np.sum(weights * np.sum(profile, axis=1))
+
+    return np.array([dimensions["Area"],
+                     dimensions["Volume"],
+                     dimensions["Rooftop"],
+                     dimensions["OuterWall"],
+                     dimensions["GroundFloor"],
+                     dimensions["Window"]] +
+                    [u_values[comp]["U-Value"]
+                     for comp in sorted(u_values.keys())] +
+                    [annual(clustered["temp_delta"]),
+                     np.min(clustered["temp_ambient"]),
+                     annual(clustered["solar_roof"]),
+                     annual(clustered["electricity"]),
+                     annual(clustered["dhw"]),
+                     building["usable_roof"],
+                     float(options.get("MFH", False))], dtype=float)
+
+def structure(model, options):
+    """
+    Signature of the model structure. Start values are stored by the index
+    of the variable, so they can only be used for models with identical
+    structure.
+    """
+    keys = ("EEG", "kfw_battery", "KWKG", "Bafa_chp", "Bafa_hp", "Bafa_stc",
+            "Bafa_pellet", "kfw_eff_buildings", "kfw_single_mea",
+            "New_Building", "dhw_electric", "scenario", "opt_costs",
+            "Design_heat_load", "MFH", "reduce_model", "heater_formulation",
+            "tier_formulation")
+    return ((model.NumVars, model.NumBinVars, model.NumConstrs) +
+            tuple(str(options.get(key)) for key in keys))
+
+def _distance(f_1, f_2):
+    """
+    Sum of the relative differences of all features.
+    """
+    scale = np.maximum(np.maximum(np.abs(f_1), np.abs(f_2)), 1e-10)
+    return np.sum(np.abs(f_1 - f_2) / scale)
+
+def neighbours(directory, feature, signature, number):
+    """
+    Entries of the library with the same structure, nearest first.
+    """
+    entries = []
+    for filename in glob.glob(os.path.join(directory, "entry_*.pkl")):
+        with open(filename, "rb") as fin:
+            entry = pickle.load(fin)
+        if entry["structure"] == signature:
+            entries.append((_distance(feature, entry["features"]), entry))
+
+    entries.sort(key=lambda item: item[0])
+
+    return entries[:number]
+
+def store(directory, key, feature, signature, binaries):
+    """
+    Add a solved building to the library. One file per entry, so that
+    parallel workers can share the library.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    entry = {"features" : feature,
+             "structure" : signature,
+             "binaries" : binaries}
+
+    with open(os.path.join(directory, "entry_" + key + ".pkl"), "wb") as fout:
+        pickle.dump(entry, fout, pickle.HIGHEST_PROTOCOL)
+
+def log(directory, filename_results, starts, distance, first_solution,
+        runtime):
+    """
+    Append the statistics of one solve to stats.csv of the library.
+    """
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    with open(os.path.join(directory, "stats.csv"), "a") as fout:
+        fout.write("\t".join((filename_results, str(starts), str(distance),
+                              str(first_solution), str(runtime))) + "\n")
+
+def statistics(directory):
+    """
+    Hit rate (share of solves with at least one start from the library) and
+    mean time to the first incumbent with and without starts.
+    """
+    runs = []
+    with open(os.path.join(directory, "stats.csv"), "r") as fin:
+        for line in fin:
+            values = line.rstrip("\n").split("\t")
+            runs.append((int(values[1]),
+                         None if values[3] == "None" else float(values[3])))
+
+    hits = [time for (starts, time) in runs
+            if starts > 0 and time is not None]
+    misses = [time for (starts, time) in runs
+              if starts == 0 and time is not None]
+
+    stats = {"runs" : len(runs),
+             "hit_rate" : (sum(1 for run in runs if run[0] > 0) /
+                           max(len(runs), 1)),
+             "first_solution_hit" : np.mean(hits) if hits else None,
+             "first_solution_miss" : np.mean(misses) if misses else None}
+
+    print("")
+    print("Start library: " + str(stats["runs"]) + " solves, hit rate " +
+          str(round(100 * stats["hit_rate"], 1)) + " %")
+    print("Time to first incumbent with starts:    " +
+          str(stats["first_solution_hit"]))
+    print("Time to first incumbent without starts: " +
+          str(stats["first_solution_miss"]))
+
+    return stats
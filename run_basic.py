@@ -14,11 +14,96 @@ import python.reference_building as ref_bui
 import python.read_basic as reader
 
 
+def prepare_inputs(raw_inputs, number_clusters, building_type, building_age,
+                   useable_roofarea, apartment_quantity, apartment_size,
+                   options):
+    """
+    Cluster the raw inputs into number_clusters typical days and load
+    devices, economics, subsidies and building data for them.
+    """
+    
+    #%% Clustering Inputdata
+    
+    inputs_clustering = np.array([raw_inputs["electricity"], 
+                                  raw_inputs["dhw"],                              
+                                  raw_inputs["solar_roof"],
+                                  raw_inputs["temperature"],
+                                  raw_inputs["solar_south"],
+                                  raw_inputs["solar_west"],
+                                  raw_inputs["solar_east"],
+                                  raw_inputs["solar_north"],
+                                  raw_inputs["int_gains"]
+                                  ])
+                  
+    (inputs, nc, z) = clustering.cluster(inputs_clustering, 
+                                         number_clusters,
+                                         norm = 2,
+                                         mip_gap = 0.0,
+                                         weights = [8,8,8,3,1,1,1,1,1],
+                                         backend = options.get("backend",
+                                                               "gurobi"))
+    
+    # Determine time steps per day
+    len_day = int(inputs_clustering.shape[1] / 365)
+    
+    clustered = {}
+    
+    clustered["electricity"]   = inputs[0]
+    clustered["dhw"]           = inputs[1]
+    clustered["solar_roof"]    = inputs[2]
+    clustered["temp_ambient"]  = inputs[3]
+    clustered["solar_s"]       = inputs[4]
+    clustered["solar_w"]       = inputs[5]
+    clustered["solar_e"]       = inputs[6]
+    clustered["solar_n"]       = inputs[7]
+    clustered["int_gains"]     = inputs[8]
+    clustered["weights"]       = nc
+    
+    clustered["temp_indoor"]   =  20
+    clustered["temp_design"]   = -12
+    
+    clustered["temp_delta"]       = np.maximum(0,(clustered["temp_indoor"] - 
+                                               clustered["temp_ambient"]))
+    
+    #%% Load devices, econmoics, etc.
+    
+    devs = pik.read_devices(timesteps           = len_day, 
+                            days                = number_clusters,
+                            temperature_ambient = clustered["temp_ambient"],
+                            temperature_design  = clustered["temp_design"], 
+                            solar_irradiation   = clustered["solar_roof"],
+                            days_per_cluster    = clustered["weights"])
+    
+    (economics, params, devs, ep_table, shell_eco) = pik.read_economics(devs)
+    params    = pik.compute_parameters(params, number_clusters, len_day)
+    subsidies = pik.read_subsidies(economics) 
+    buildings = pik.parse_building_parameters()
+    scenarios = pik.retrofit_scenarios()
+    
+    
+    #%% Chose data for the chosen building and calculate reference building
+    
+    building = {}
+    building["U-values"]   = scenarios[building_type][building_age]
+    building["dimensions"] = buildings[building_type][building_age]
+    building["usable_roof"] = useable_roofarea
+    building["dimensions"]["Area"] = apartment_quantity * apartment_size
+    ref_building = ref_bui.reference_building(building["dimensions"])
+    
+    return (economics, devs, clustered, params, building, ref_building,
+            shell_eco, subsidies, ep_table)
+
 def building_optimization(building_type, building_age, location, 
                           household_size, electricity_demand, 
                           dhw_demand, useable_roofarea, 
                           apartment_quantity, apartment_size, options):
     
+    # The coarse design of multi_fidelity is passed on as MIP start, which
+    # only Gurobi uses
+    if (options.get("multi_fidelity") and 
+        options.get("backend", "gurobi") != "gurobi"):
+        raise ValueError("The option multi_fidelity needs the Gurobi backend")
+    
 #%% Read inputs  
     
     raw_inputs = {} 
@@ -97,72 +182,13 @@ def building_optimization(building_type, building_age, location,
             
     
     
-    #%% Clustering Inputdata
-    
-    number_clusters = 8
-    inputs_clustering = np.array([raw_inputs["electricity"], 
-                                  raw_inputs["dhw"],                              
-                                  raw_inputs["solar_roof"],
-                                  raw_inputs["temperature"],
-                                  raw_inputs["solar_south"],
-                                  raw_inputs["solar_west"],
-                                  raw_inputs["solar_east"],
-                                  raw_inputs["solar_north"],
-                                  raw_inputs["int_gains"]
-                                  ])
-                  
-    (inputs, nc, z) = clustering.cluster(inputs_clustering, 
-                                         number_clusters,
-                                         norm = 2,
-                                         mip_gap = 0.0,
-                                         weights = [8,8,8,3,1,1,1,1,1])
-    
-    # Determine time steps per day
-    len_day = int(inputs_clustering.shape[1] / 365)
-    
-    clustered = {}
-    
-    clustered["electricity"]   = inputs[0]
-    clustered["dhw"]           = inputs[1]
-    clustered["solar_roof"]    = inputs[2]
-    clustered["temp_ambient"]  = inputs[3]
-    clustered["solar_s"]       = inputs[4]
-    clustered["solar_w"]       = inputs[5]
-    clustered["solar_e"]       = inputs[6]
-    clustered["solar_n"]       = inputs[7]
-    clustered["int_gains"]     = inputs[8]
-    clustered["weights"]       = nc
-    
-    clustered["temp_indoor"]   =  20
-    clustered["temp_design"]   = -12
-    
-    clustered["temp_delta"]       = np.maximum(0,(clustered["temp_indoor"] - 
-                                               clustered["temp_ambient"]))
-    
-    #%% Load devices, econmoics, etc.
-    
-    devs = pik.read_devices(timesteps           = len_day, 
-                            days                = number_clusters,
-                            temperature_ambient = clustered["temp_ambient"],
-                            temperature_design  = clustered["temp_design"], 
-                            solar_irradiation   = clustered["solar_roof"],
-                            days_per_cluster    = clustered["weights"])
-    
-    (economics, params, devs, ep_table, shell_eco) = pik.read_economics(devs)
-    params    = pik.compute_parameters(params, number_clusters, len_day)
-    subsidies = pik.read_subsidies(economics) 
-    buildings = pik.parse_building_parameters()
-    scenarios = pik.retrofit_scenarios()
+    #%% Clustering Inputdata and load devices, economics, etc.
     
-    
-    #%% Chose data for the chosen building and calculate reference building
-    
-    building = {}
-    building["U-values"]   = scenarios[building_type][building_age]
-    building["dimensions"] = buildings[building_type][building_age]
-    building["usable_roof"] = useable_roofarea
-    building["dimensions"]["Area"] = apartment_quantity * apartment_size
-    ref_building = ref_bui.reference_building(building["dimensions"])
+    (economics, devs, clustered, params, building, ref_building,
+     shell_eco, subsidies, ep_table) = prepare_inputs(raw_inputs, 8,
+                                           building_type, building_age,
+                                           useable_roofarea, apartment_quantity,
+                                           apartment_size, options)
     
     #%% Store clustered input parameters
     
@@ -182,12 +208,52 @@ def building_optimization(building_type, building_age, location,
     
     max_emi = 99999
     max_cost = 99999      
+    
+    # Multi-fidelity: solve with few typical days first and start the
+    # production model from the coarse design
+    coarse = None
+    if options.get("multi_fidelity"):
+        coarse_inputs = prepare_inputs(raw_inputs, options["multi_fidelity"],
+                                       building_type, building_age,
+                                       useable_roofarea, apartment_quantity,
+                                       apartment_size, options)
+        
+        coarse_options = dict(options)
+        coarse_options.update({"multi_fidelity" : False,
+                               "store_start_vals" : False,
+                               "load_start_vals" : False,
+                               "filename_results" : options["filename_results"].replace(".pkl", "_coarse.pkl")})
+        
+        if opti.compute(*(coarse_inputs[:4] + (coarse_options,) + 
+                          coarse_inputs[4:] + (max_emi, max_cost))):
+            coarse = reader.read_design(coarse_options["filename_results"])
+            options = dict(options, design_start = coarse)
              
     (costs, emission) = opti.compute(economics, devs, clustered, params, options, 
                                      building, ref_building, shell_eco, subsidies,
                                      ep_table, max_emi, max_cost)
     
     Outputs = reader.read_results(building_type + "_" + building_age)
+    
+    if coarse is not None:
+        design = {"x" : Outputs["5_x"],
+                  "capacity" : Outputs["6_cap"],
+                  "x_restruc" : Outputs["7_x_restruc"]}
+        Outputs["multi_fidelity"] = {"coarse_runtime" : coarse["Runtime"],
+                                     "coarse_ObjVal" : coarse["ObjVal"],
+                                     "changes" : reader.compare_designs(coarse, design)}
+        
+        print(" ")
+        print("Multi-fidelity: " + str(options["multi_fidelity"]) + 
+              " typical days " + str(round(coarse["Runtime"], 1)) + " s, " + 
+              "production model " + str(round(Outputs["2_Runtime"], 1)) + " s")
+        changes = Outputs["multi_fidelity"]["changes"]
+        print("Changed devices: " + str(changes["x"]))
+        print("Changed restructuring measures: " + str(changes["x_restruc"]))
+        for dev in changes["capacity"]:
+            print("Capacity " + dev + ": " + 
+                  str(round(changes["capacity"][dev][0], 2)) + " -> " +
+                  str(round(changes["capacity"][dev][1], 2)))
 
     #%% Ausgabe: 
  
@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of model variants on a fixed set of buildings.
+
+Every variant is a set of options that is added to the default options of
+run_basic. All variants are solved for all instances and objective value,
+runtime and remaining MIP gap are collected.
+"""
+from __future__ import division
+import sys
+import pickle
+import numpy as np
+from run_basic import building_optimization
+
+#%% Fixed instance set
+
+# (building_type, building_age, location, household_size, electricity_demand,
+#  dhw_demand, useable_roofarea, apartment_quantity, apartment_size)
+instances = [("SFH", "1958 1968", "Essen",   3, "medium", "medium", 0.30, 1,  120),
+             ("SFH", "1969 1978", "Essen",   3, "medium", "medium", 0.30, 1,  120),
+             ("SFH", "1995 2001", "Potsdam", 2, "low",    "low",    0.25, 1,  110),
+             ("TH",  "1958 1968", "Kassel",  4, "high",   "medium", 0.25, 1,  130),
+             ("TH",  "1984 1994", "Hamburg", 3, "medium", "high",   0.25, 1,  120)]
+
+def default_options(building_type, building_age):
+    return {"opt_costs" : True,
+            "EEG": True,
+            "kfw_battery": True,
+            "KWKG": True,
+            "Bafa_chp": True,
+            "Bafa_hp": True,
+            "Bafa_stc": True,
+            "Bafa_pellet": True,
+            "kfw_eff_buildings" : True,
+            "kfw_single_mea" : True,
+            "New_Building" : False,
+            "dhw_electric" : False,
+            "scenario": "free",
+            "Design_heat_load" : True,
+            "store_start_vals" : False,
+            "load_start_vals" : False,
+            "filename_results" : "results/" + building_type + "_" + \
+                                              building_age + ".pkl",
+            "filename_start_vals" :"start_values/" + building_type + "_" + \
+                                                   building_age + "_start.csv"}
+
+#%% Benchmark
+
+def benchmark(variants, instances=instances):
+    """
+    Solve all instances with all variants.
+
+    Parameters
+    ----------
+    variants : dict
+        - name of the variant : options that differ from the defaults
+
+    Returns
+    -------
+    results : dict
+        - (variant, instance) : {"ObjVal", "Runtime", "MIPGap"}
+    """
+    results = {}
+    for instance in instances:
+        for (name, variant) in variants.items():
+            options = default_options(instance[0], instance[1])
+            options.update(variant)
+
+            outputs = building_optimization(*(instance + (options,)))
+
+            # Multi-fidelity runs include the solve with few typical days
+            runtime = outputs["2_Runtime"]
+            if "multi_fidelity" in outputs:
+                runtime += outputs["multi_fidelity"]["coarse_runtime"]
+
+            results[name, instance] = {"ObjVal"  : outputs["ObjVal"],
+                                       "Runtime" : runtime,
+                                       "MIPGap"  : outputs["1_MIPGap"]}
+    return results
+
+def print_summary(results, variants):
+    print(" ")
+    print("Variant".ljust(24) + "Instance".ljust(36) +
+          "ObjVal".rjust(12) + "Runtime".rjust(10) + "MIPGap".rjust(10))
+    for (name, instance) in sorted(results.keys(), key=lambda k: (k[1], k[0])):
+        res = results[name, instance]
+        print(name.ljust(24) + " ".join(str(i) for i in instance[:3]).ljust(36) +
+              ("%.1f" % res["ObjVal"]).rjust(12) +
+              ("%.1f" % res["Runtime"]).rjust(10) +
+              ("-" if res["MIPGap"] is None else
+               "%.4f" % res["MIPGap"]).rjust(10))
+
+    print(" ")
+    total = {}
+    for name in variants.keys():
+        runtimes = [results[name, i]["Runtime"] for i in instances
+                    if (name, i) in results]
+        total[name] = sum(runtimes)
+        print(name + ": total runtime " + str(round(total[name], 1)) + " s")
+
+    print(" ")
+    print("Fastest variant: " + min(total, key=total.get))
+
+def print_deviation(results, variants, reference, instances=instances):
+    """
+    Relative deviation of the objective values of all variants from the
+    reference variant, e.g. for the calibration of approximate modes.
+    """
+    print(" ")
+    print("Deviation from " + reference + ":")
+    for name in variants.keys():
+        if name == reference:
+            continue
+        deviations = [(results[name, i]["ObjVal"] -
+                       results[reference, i]["ObjVal"]) /
+                      abs(results[reference, i]["ObjVal"])
+                      for i in instances
+                      if (name, i) in results and (reference, i) in results]
+        if not deviations:
+            continue
+        print(name + ": mean " + str(round(100 * np.mean(deviations), 2)) +
+              " %, min " + str(round(100 * np.min(deviations), 2)) +
+              " %, max " + str(round(100 * np.max(deviations), 2)) + " %")
+
+#%% Studies
+
+studies = {}
+
+# Constant big-M values against big-M values derived from the inputs
+# and additional demand-based bounds
+studies["big_m"] = {"constant big-M" : {"tight_big_m" : False,
+                                        "tight_bounds" : False},
+                    "tight big-M"    : {"tight_big_m" : True,
+                                        "tight_bounds" : False},
+                    "tight bounds"   : {"tight_big_m" : True,
+                                        "tight_bounds" : True}}
+
+# Formulations of the heater on/off product and of the choice sets
+studies["formulation"] = {
+    "big-M"              : {"heater_formulation" : "big_m"},
+    "indicator"          : {"heater_formulation" : "indicator"},
+    "semi-continuous"    : {"heater_formulation" : "semicont"},
+    "big-M + SOS1"       : {"heater_formulation" : "big_m",
+                            "sos_choices" : True},
+    "indicator + SOS1"   : {"heater_formulation" : "indicator",
+                            "sos_choices" : True}}
+
+# Per time step bounds of capacities and storage contents added directly
+# or lazily from a callback
+studies["lazy"] = {"direct bounds" : {"lazy_bounds" : False},
+                   "lazy bounds"   : {"lazy_bounds" : True}}
+
+# Tiers of the EEG power stages and the KWKG full load hour categories
+# with binaries and big-M values or with indicator constraints
+studies["tiers"] = {"big-M"            : {"tier_formulation" : "big_m"},
+                    "indicator"        : {"tier_formulation" : "indicator"},
+                    "indicator + SOS1" : {"tier_formulation" : "indicator",
+                                          "sos_choices" : True}}
+
+# Solver backends on the same instances (the HiGHS backend requires the
+# big-M formulations)
+studies["backend"] = {"gurobi" : {"backend" : "gurobi"},
+                      "highs"  : {"backend" : "highs"}}
+
+# Single configuration against the racing portfolio
+studies["portfolio"] = {"production" : {},
+                        "portfolio"  : {"portfolio" : True}}
+
+# Full time limit against early termination on stagnation and gap trend
+studies["termination"] = {"time limit"  : {},
+                          "termination" : {"termination" : True}}
+
+# MIP starts from the rounded LP relaxation. Time to the first incumbent
+# and gap over time are compared with python.read_telemetry.summarize
+studies["lp_heuristic"] = {"solver"       : {"telemetry" : True},
+                           "lp heuristic" : {"telemetry" : True,
+                                             "lp_heuristic" : True}}
+
+# Full MIP against the relax-and-fix mode over the typical days
+studies["relax_and_fix"] = {"full MIP"      : {},
+                            "relax-and-fix" : {"relax_and_fix" : True}}
+
+# Direct solve against a first solve with 4 typical days whose design
+# starts the production model
+studies["multi_fidelity"] = {"direct"         : {},
+                             "multi-fidelity" : {"multi_fidelity" : 4}}
+
+# Calibration of the screening mode against the exact solve
+studies["screening"] = {"exact"                     : {},
+                        "screening"                 : {"screening" : True},
+                        "screening + subsidy steps" : {"screening" :
+                                                       "subsidy_steps"}}
+
+# Reference variant of the studies whose deviation is reported
+references = {"relax_and_fix" : "full MIP",
+              "multi_fidelity" : "direct",
+              "screening" : "exact"}
+
+if __name__ == "__main__":
+
+    # Name of the study, e.g. python run_benchmark.py formulation
+    if len(sys.argv) > 1:
+        study = sys.argv[1]
+    else:
+        study = "formulation"
+
+    variants = studies[study]
+
+    results = benchmark(variants)
+
+    print_summary(results, variants)
+
+    if study in references:
+        print_deviation(results, variants, references[study])
+
+    with open("results/benchmark_" + study + ".pkl", "wb") as fout:
+        pickle.dump(results, fout, pickle.HIGHEST_PROTOCOL)
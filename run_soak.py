@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Soak test for long-running workers.
+
+One building and small k-medoids problems are solved many times with
+environments from an EnvironmentPool. The resident memory (RSS) of the
+process is sampled after every solve. The test fails if the RSS at the end
+exceeds the RSS after the warm-up solves by more than the tolerance.
+"""
+from __future__ import division
+import os
+import sys
+import resource
+import numpy as np
+import python.building_optimization as opti
+import python.k_medoids as k_medoids
+import python.solver_backends as solver_backends
+from run_benchmark import instances, default_options
+from run_tuning import load_inputs
+
+def rss():
+    """
+    Current resident memory of the process in MB.
+    """
+    try:
+        with open("/proc/self/statm", "r") as fin:
+            pages = int(fin.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except IOError:
+        # Peak instead of current memory on systems without /proc
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def soak(runs=300, warm_up=20, tolerance=0.1, threads=1):
+    """
+    Run the solves and return the sampled RSS values (MB) and whether the
+    test passed.
+    """
+    instance = instances[0]
+    (eco, devs, clustered, params, building, ref_building,
+     shell_eco, sub_par, ep_table) = load_inputs(instance)
+
+    options = default_options(instance[0], instance[1])
+    options["MFH"] = False
+    options["solver_profile"] = "screening"
+
+    pool = solver_backends.EnvironmentPool(threads=threads,
+                                           params={"OutputFlag" : 0})
+    options["env"] = pool.get()
+
+    random = np.random.RandomState(0)
+
+    samples = []
+    for run in range(runs):
+        opti.compute(eco, devs, clustered, params, options, building,
+                     ref_building, shell_eco, sub_par, ep_table, 99999, 99999)
+
+        points = random.rand(20, 3)
+        distances = np.sqrt(((points[:,None,:] - points[None,:,:]) ** 2).sum(axis=2))
+        k_medoids.k_medoids(distances, 4, env=pool.get())
+
+        samples.append(rss())
+
+    pool.close()
+
+    growth = (samples[-1] - samples[warm_up]) / samples[warm_up]
+    print("")
+    print("RSS after warm-up: " + str(round(samples[warm_up], 1)) + " MB")
+    print("RSS at the end:    " + str(round(samples[-1], 1)) + " MB")
+    print("Growth: " + str(round(100 * growth, 1)) + " %")
+
+    passed = growth <= tolerance
+    if passed:
+        print("Soak test passed")
+    else:
+        print("Soak test failed")
+
+    return (samples, passed)
+
+if __name__ == "__main__":
+
+    # Number of runs, e.g. python run_soak.py 500
+    if len(sys.argv) > 1:
+        runs = int(sys.argv[1])
+    else:
+        runs = 300
+
+    (samples, passed) = soak(runs)
+
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tuning of the solver parameters per building class.
+
+The model of every representative instance is tuned with Gurobi's tuning
+tool. All tuned parameter sets of a building class are then solved on all
+instances of this class and the set with the smallest total runtime is
+stored as tuning/<building_type>.prm. It can be used with the option
+filename_params of compute.
+"""
+from __future__ import division
+import os
+import sys
+import pickle
+import python.building_optimization as opti
+from run_basic import building_optimization
+from run_benchmark import default_options
+
+#%% Representative instances
+
+# (building_type, building_age, location, household_size, electricity_demand,
+#  dhw_demand, useable_roofarea, apartment_quantity, apartment_size)
+instances = {
+    "SFH": [("SFH", "1958 1968", "Essen",   3, "medium", "medium", 0.30, 1,  120),
+            ("SFH", "1984 1994", "Essen",   3, "medium", "medium", 0.30, 1,  120),
+            ("SFH", "2010 2015", "Potsdam", 2, "low",    "low",    0.25, 1,  110)],
+    "TH":  [("TH",  "1958 1968", "Kassel",  4, "high",   "medium", 0.25, 1,  130),
+            ("TH",  "1984 1994", "Hamburg", 3, "medium", "high",   0.25, 1,  120),
+            ("TH",  "2010 2015", "Hamburg", 3, "medium", "medium", 0.25, 1,  120)],
+    "MFH": [("MFH", "1958 1968", "Essen",   3, "medium", "medium", 0.25, 6,  70),
+            ("MFH", "1984 1994", "Kassel",  3, "medium", "medium", 0.25, 8,  70),
+            ("MFH", "2010 2015", "Mannheim",3, "medium", "medium", 0.25, 10, 70)],
+    "AB":  [("AB",  "1958 1968", "Essen",   3, "medium", "medium", 0.20, 20, 65),
+            ("AB",  "1984 1994", "Hamburg", 3, "medium", "medium", 0.20, 25, 65),
+            ("AB",  "2010 2015", "Rostock", 3, "medium", "medium", 0.20, 30, 65)]}
+
+#%% Inputs and models
+
+def load_inputs(instance):
+    """
+    Clustered inputs of an instance as stored by run_basic. Missing inputs
+    are created with a screening run.
+    """
+    filename = "results/inputs_" + instance[0] + "_" + instance[1] + ".pkl"
+
+    if not os.path.isfile(filename):
+        options = default_options(instance[0], instance[1])
+        options["solver_profile"] = "screening"
+        building_optimization(*(instance + (options,)))
+
+    with open(filename, "rb") as fin:
+        (eco, devs, clustered, params, building, sub_par,
+         ref_building, ep_table, shell_eco) = [pickle.load(fin)
+                                               for i in range(9)]
+
+    return (eco, devs, clustered, params, building, ref_building,
+            shell_eco, sub_par, ep_table)
+
+def model_of(instance, options):
+    (eco, devs, clustered, params, building, ref_building,
+     shell_eco, sub_par, ep_table) = load_inputs(instance)
+
+    # The MFH flag is set by run_basic, not by the default options
+    options["MFH"] = instance[0] in ("MFH", "AB")
+
+    return opti.build_model(eco, devs, clustered, params, options, building,
+                            ref_building, shell_eco, sub_par, ep_table,
+                            99999, 99999)
+
+#%% Tuning
+
+def tune_class(building_type, tune_time=600):
+    """
+    Tune all instances of a building class and return the file of the
+    parameter set with the smallest total runtime of the class.
+    """
+    if not os.path.isdir("tuning"):
+        os.makedirs("tuning")
+
+    candidates = []
+    for instance in instances[building_type]:
+        model = model_of(instance, default_options(instance[0], instance[1]))
+        model.Params.TuneTimeLimit = tune_time
+        model.tune()
+
+        if model.TuneResultCount > 0:
+            model.getTuneResult(0)
+            filename = ("tuning/" + building_type + "_" +
+                        str(len(candidates)) + ".prm")
+            model.write(filename)
+            candidates.append(filename)
+        model.dispose()
+
+    runtimes = {}
+    for filename in candidates:
+        runtimes[filename] = 0
+        for instance in instances[building_type]:
+            options = default_options(instance[0], instance[1])
+            options["filename_params"] = filename
+            model = model_of(instance, options)
+            model.optimize()
+            runtimes[filename] += model.Runtime
+            model.dispose()
+
+    if len(runtimes) == 0:
+        return None
+
+    best = min(runtimes, key=runtimes.get)
+    best_file = "tuning/" + building_type + ".prm"
+    with open(best, "r") as fin, open(best_file, "w") as fout:
+        fout.write(fin.read())
+
+    print(building_type + ": " + best + " (" +
+          str(round(runtimes[best], 1)) + " s)")
+
+    return best_file
+
+if __name__ == "__main__":
+
+    # Building classes, e.g. python run_tuning.py SFH TH
+    if len(sys.argv) > 1:
+        classes = sys.argv[1:]
+    else:
+        classes = sorted(instances.keys())
+
+    for building_type in classes:
+        tune_class(building_type)